@@ -0,0 +1,119 @@
+-- ==========================================
+-- Materialized daily balance series
+--
+-- account_daily_balances holds the net change of every account on every
+-- day it had live transactions. A balance on any day is the running sum
+-- of these rows, so balance charts read one row per account-day instead
+-- of the whole transaction history. Statement-level triggers keep the
+-- table current by applying the OLD/NEW deltas of each write.
+--   psql -d budget -f daily_balances.sql
+-- ==========================================
+
+CREATE TABLE IF NOT EXISTS public.account_daily_balances
+(
+    account_id uuid NOT NULL,
+    date date NOT NULL,
+    budget_id uuid NOT NULL,
+    amount numeric(15, 2) NOT NULL DEFAULT 0,
+    CONSTRAINT account_daily_balances_pkey PRIMARY KEY (account_id, date),
+    CONSTRAINT account_daily_balances_account_fkey FOREIGN KEY (account_id)
+        REFERENCES public.accounts (id) ON DELETE CASCADE,
+    CONSTRAINT account_daily_balances_budget_fkey FOREIGN KEY (budget_id)
+        REFERENCES public.budgets (id) ON DELETE CASCADE
+);
+
+-- Budget-wide series (net worth) read by date range
+CREATE INDEX IF NOT EXISTS ix_account_daily_balances_budget_date
+    ON public.account_daily_balances (budget_id, date);
+
+
+-- ==========================================
+-- Incremental refresh
+-- ==========================================
+CREATE OR REPLACE FUNCTION update_daily_balances_from_transitions()
+RETURNS TRIGGER AS $$
+DECLARE
+    deltas text;
+BEGIN
+    -- Transition tables only exist for the event that fired the trigger
+    IF TG_OP = 'INSERT' THEN
+        deltas := 'SELECT budget_id, account_id, date, amount
+                   FROM new_rows WHERE deleted IS FALSE';
+    ELSIF TG_OP = 'DELETE' THEN
+        deltas := 'SELECT budget_id, account_id, date, -amount AS amount
+                   FROM old_rows WHERE deleted IS FALSE';
+    ELSE
+        deltas := 'SELECT budget_id, account_id, date, -amount AS amount
+                   FROM old_rows WHERE deleted IS FALSE
+                   UNION ALL
+                   SELECT budget_id, account_id, date, amount
+                   FROM new_rows WHERE deleted IS FALSE';
+    END IF;
+
+    EXECUTE format($sql$
+        INSERT INTO account_daily_balances AS b (account_id, date, budget_id, amount)
+        SELECT account_id, date, budget_id, SUM(amount)
+        FROM (%s) d
+        GROUP BY account_id, date, budget_id
+        HAVING SUM(amount) <> 0
+        ON CONFLICT (account_id, date) DO UPDATE
+        SET amount = b.amount + EXCLUDED.amount
+    $sql$, deltas);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_daily_balances_insert ON transactions;
+CREATE TRIGGER trg_daily_balances_insert
+AFTER INSERT ON transactions
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_daily_balances_from_transitions();
+
+DROP TRIGGER IF EXISTS trg_daily_balances_update ON transactions;
+CREATE TRIGGER trg_daily_balances_update
+AFTER UPDATE ON transactions
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_daily_balances_from_transitions();
+
+DROP TRIGGER IF EXISTS trg_daily_balances_delete ON transactions;
+CREATE TRIGGER trg_daily_balances_delete
+AFTER DELETE ON transactions
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_daily_balances_from_transitions();
+
+
+-- ==========================================
+-- Full rebuild
+-- ==========================================
+-- Recompute the series from transactions, e.g. after loading data with
+-- triggers disabled. Returns the number of account-days written.
+--   SELECT rebuild_daily_balances();                -- all budgets
+--   SELECT rebuild_daily_balances('<budget id>');
+CREATE OR REPLACE FUNCTION rebuild_daily_balances(p_budget_id uuid DEFAULT NULL)
+RETURNS bigint AS $$
+DECLARE
+    written bigint;
+BEGIN
+    DELETE FROM account_daily_balances
+    WHERE p_budget_id IS NULL OR budget_id = p_budget_id;
+
+    INSERT INTO account_daily_balances (account_id, date, budget_id, amount)
+    SELECT account_id, date, budget_id, SUM(amount)
+    FROM transactions
+    WHERE deleted IS FALSE
+      AND (p_budget_id IS NULL OR budget_id = p_budget_id)
+    GROUP BY account_id, date, budget_id
+    HAVING SUM(amount) <> 0;
+
+    GET DIAGNOSTICS written = ROW_COUNT;
+    RETURN written;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Backfill existing history
+SELECT rebuild_daily_balances() AS account_days;
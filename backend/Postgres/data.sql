@@ -35,9 +35,13 @@ $$
         VALUES (7, 2025, new_budget_id)
         RETURNING id INTO new_month_id;
 
-        INSERT INTO public.categories (name, category_group_id, budget_id, month_id)
-        SELECT 'Groceries', cg.id, cg.budget_id, new_month_id
+        INSERT INTO public.category_names (name)
+        VALUES ('Groceries');
+
+        INSERT INTO public.categories (category_name_id, category_group_id, budget_id, month_id)
+        SELECT cn.id, cg.id, cg.budget_id, new_month_id
         FROM public.category_groups cg
+                 JOIN public.category_names cn ON cn.name = 'Groceries'
         WHERE cg.name = 'Monthly Expenses';
 
         INSERT INTO public.transactions (date, category_id, account_id, payee_id, amount, memo, budget_id)
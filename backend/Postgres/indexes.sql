@@ -0,0 +1,82 @@
+-- ==========================================
+-- Secondary indexes for the hot lookups
+--
+-- Run with psql outside a transaction block (CREATE INDEX CONCURRENTLY
+-- does not lock writes, but cannot run inside BEGIN/END):
+--   psql -d budget -f indexes.sql
+-- Partial indexes use `deleted = false`, the predicate the ORM emits for
+-- filter_by(deleted=False). The planner cannot match them to
+-- `deleted IS FALSE`, so queries must filter with `= false`.
+-- ==========================================
+
+-- ==========================================
+-- Transactions
+-- ==========================================
+-- Listing / keyset pagination: budget_id + ORDER BY date DESC, id DESC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_budget_date_id
+    ON public.transactions (budget_id, date DESC, id DESC)
+    WHERE deleted = false;
+
+-- Same order including deleted rows (deleted=all / deleted=true, exports)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_budget_date_id_all
+    ON public.transactions (budget_id, date, id);
+
+-- Filters and rollup foreign keys
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_account_date
+    ON public.transactions (account_id, date)
+    WHERE deleted = false;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_payee_date
+    ON public.transactions (payee_id, date)
+    WHERE deleted = false;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_category
+    ON public.transactions (category_id)
+    WHERE deleted = false;
+
+
+-- ==========================================
+-- Months
+-- ==========================================
+-- get_category_month, rollup triggers
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_months_budget_year_month
+    ON public.months (budget_id, year, month);
+
+
+-- ==========================================
+-- Categories
+-- ==========================================
+-- get_category_month: (budget_id, category_name_id, month_id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_categories_budget_name_month
+    ON public.categories (budget_id, category_name_id, month_id);
+
+-- Month views: every category of a month
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_categories_month
+    ON public.categories (month_id)
+    WHERE deleted = false;
+
+
+-- ==========================================
+-- Payees
+-- ==========================================
+-- get_payee / manage_payees: lower(name) = ... AND budget_id = ...
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_payees_budget_lower_name
+    ON public.payees (budget_id, lower(name));
+
+-- Form data: active payees of a budget
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_payees_budget_active
+    ON public.payees (budget_id)
+    WHERE deleted = false;
+
+
+-- ==========================================
+-- Accounts / category groups
+-- ==========================================
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_accounts_budget_active
+    ON public.accounts (budget_id)
+    WHERE deleted = false;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_category_groups_budget
+    ON public.category_groups (budget_id);
+
+ANALYZE public.transactions, public.months, public.categories, public.payees, public.accounts;
@@ -4,13 +4,14 @@ CREATE EXTENSION IF NOT EXISTS "pgcrypto";
 
 CREATE TABLE IF NOT EXISTS public.accounts
 (
-    id uuid NOT NULL DEFAULT gen_random_uuid() PRIMARY KEY,
+    id uuid NOT NULL DEFAULT gen_random_uuid(),
     name text COLLATE pg_catalog."default" NOT NULL,
     type_id uuid,
     deleted boolean DEFAULT false,
     balance numeric(15, 2),
     transfer_payee_id uuid,
     budget_id uuid NOT NULL,
+    change_version bigint NOT NULL DEFAULT 0,
     CONSTRAINT accounts_pkey PRIMARY KEY (id),
     CONSTRAINT accounts_name_key UNIQUE (name)
 );
@@ -30,16 +31,18 @@ CREATE TABLE IF NOT EXISTS public.months
 
 CREATE TABLE IF NOT EXISTS public.categories
 (
-    id uuid NOT NULL DEFAULT gen_random_uuid() PRIMARY KEY,
-    name text COLLATE pg_catalog."default" NOT NULL,
+    id uuid NOT NULL DEFAULT gen_random_uuid(),
+    category_name_id uuid NOT NULL,
     category_group_id uuid NOT NULL,
     hidden boolean DEFAULT false,
     deleted boolean DEFAULT false,
     budget_id uuid NOT NULL,
     budgeted numeric(15, 2) NOT NULL DEFAULT 0,
     activity numeric(15, 2) NOT NULL DEFAULT 0,
+    carryover numeric(15, 2) NOT NULL DEFAULT 0,
     balance numeric(15, 2) NOT NULL DEFAULT 0,
     month_id uuid NOT NULL,
+    change_version bigint NOT NULL DEFAULT 0,
     CONSTRAINT categories_pkey PRIMARY KEY (id)
 );
 
@@ -51,18 +54,19 @@ CREATE TABLE IF NOT EXISTS public.category_names
 
 CREATE TABLE IF NOT EXISTS public.payees
 (
-    id uuid NOT NULL DEFAULT gen_random_uuid() PRIMARY KEY,
+    id uuid NOT NULL DEFAULT gen_random_uuid(),
     name text COLLATE pg_catalog."default" NOT NULL,
     transfer_account_id uuid,
     deleted boolean DEFAULT false,
     budget_id uuid NOT NULL,
+    change_version bigint NOT NULL DEFAULT 0,
     CONSTRAINT payees_pkey PRIMARY KEY (id),
     CONSTRAINT payees_name_key UNIQUE (name)
 );
 
 CREATE TABLE IF NOT EXISTS public.transactions
 (
-    id uuid NOT NULL DEFAULT gen_random_uuid() PRIMARY KEY,
+    id uuid NOT NULL DEFAULT gen_random_uuid(),
     date date NOT NULL,
     category_id uuid,
     account_id uuid NOT NULL,
@@ -71,12 +75,13 @@ CREATE TABLE IF NOT EXISTS public.transactions
     memo text COLLATE pg_catalog."default",
     deleted boolean DEFAULT false,
     budget_id uuid NOT NULL,
+    change_version bigint NOT NULL DEFAULT 0,
     CONSTRAINT transactions_pkey PRIMARY KEY (id)
 );
 
 CREATE TABLE IF NOT EXISTS public.users
 (
-    id uuid NOT NULL DEFAULT gen_random_uuid() PRIMARY KEY,
+    id uuid NOT NULL DEFAULT gen_random_uuid(),
     login text COLLATE pg_catalog."default" NOT NULL,
     password text COLLATE pg_catalog."default" NOT NULL,
     active boolean DEFAULT false,
@@ -89,39 +94,56 @@ CREATE TABLE IF NOT EXISTS public.users
 
 CREATE TABLE IF NOT EXISTS public.accounts_type
 (
-    id uuid,
+    id uuid DEFAULT gen_random_uuid(),
     name text NOT NULL,
     PRIMARY KEY (id)
 );
 
 CREATE TABLE IF NOT EXISTS public.budgets
 (
-    id uuid,
+    id uuid DEFAULT gen_random_uuid(),
     name text,
+    change_version bigint NOT NULL DEFAULT 0,
     PRIMARY KEY (id)
 );
 
 CREATE TABLE IF NOT EXISTS public.category_groups
 (
-    id uuid NOT NULL DEFAULT gen_random_uuid() PRIMARY KEY,
+    id uuid NOT NULL DEFAULT gen_random_uuid(),
     name text COLLATE pg_catalog."default" NOT NULL,
     deleted boolean DEFAULT false,
     budget_id uuid NOT NULL,
-    CONSTRAINT categories_pkey PRIMARY KEY (id),
-    CONSTRAINT categories_name_key UNIQUE (name)
+    CONSTRAINT category_groups_pkey PRIMARY KEY (id),
+    CONSTRAINT category_groups_name_key UNIQUE (name)
 );
 
-ALTER TABLE IF EXISTS public.accounts
-    ADD FOREIGN KEY (id)
-    REFERENCES public.transactions (account_id) MATCH SIMPLE
+-- Idempotency-Key of a write request and its stored response (routes/utils/idempotency.py)
+CREATE TABLE IF NOT EXISTS public.idempotency_keys
+(
+    user_id uuid NOT NULL,
+    key varchar(255) NOT NULL,
+    request_hash varchar(64) NOT NULL,
+    status_code integer,
+    content_type varchar(100),
+    response_body bytea,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    CONSTRAINT idempotency_keys_pkey PRIMARY KEY (user_id, key),
+    CONSTRAINT idempotency_keys_user_fkey FOREIGN KEY (user_id)
+        REFERENCES public.users (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_created_at ON public.idempotency_keys (created_at);
+
+ALTER TABLE IF EXISTS public.transactions
+    ADD FOREIGN KEY (account_id)
+    REFERENCES public.accounts (id) MATCH SIMPLE
     ON UPDATE NO ACTION
     ON DELETE SET NULL
     NOT VALID;
 
 
-ALTER TABLE IF EXISTS public.categories
-    ADD FOREIGN KEY (id)
-    REFERENCES public.transactions (category_id) MATCH SIMPLE
+ALTER TABLE IF EXISTS public.transactions
+    ADD FOREIGN KEY (category_id)
+    REFERENCES public.categories (id) MATCH SIMPLE
     ON UPDATE NO ACTION
     ON DELETE SET NULL
     NOT VALID;
@@ -135,73 +157,73 @@ ALTER TABLE IF EXISTS public.payees
     NOT VALID;
 
 
-ALTER TABLE IF EXISTS public.payees
-    ADD FOREIGN KEY (id)
-    REFERENCES public.transactions (payee_id) MATCH SIMPLE
+ALTER TABLE IF EXISTS public.transactions
+    ADD FOREIGN KEY (payee_id)
+    REFERENCES public.payees (id) MATCH SIMPLE
     ON UPDATE NO ACTION
     ON DELETE SET NULL
     NOT VALID;
 
 
-ALTER TABLE IF EXISTS public.accounts_type
-    ADD FOREIGN KEY (id)
-    REFERENCES public.accounts (type_id) MATCH SIMPLE
+ALTER TABLE IF EXISTS public.accounts
+    ADD FOREIGN KEY (type_id)
+    REFERENCES public.accounts_type (id) MATCH SIMPLE
     ON UPDATE NO ACTION
     ON DELETE SET NULL
     NOT VALID;
 
 
-ALTER TABLE IF EXISTS public.budgets
-    ADD FOREIGN KEY (id)
-    REFERENCES public.payees (budget_id) MATCH SIMPLE
+ALTER TABLE IF EXISTS public.payees
+    ADD FOREIGN KEY (budget_id)
+    REFERENCES public.budgets (id) MATCH SIMPLE
     ON UPDATE NO ACTION
     ON DELETE CASCADE
     NOT VALID;
 
 
-ALTER TABLE IF EXISTS public.budgets
-    ADD FOREIGN KEY (id)
-    REFERENCES public.accounts (budget_id) MATCH SIMPLE
+ALTER TABLE IF EXISTS public.accounts
+    ADD FOREIGN KEY (budget_id)
+    REFERENCES public.budgets (id) MATCH SIMPLE
     ON UPDATE NO ACTION
     ON DELETE CASCADE
     NOT VALID;
 
 
-ALTER TABLE IF EXISTS public.budgets
-    ADD FOREIGN KEY (id)
-    REFERENCES public.transactions (budget_id) MATCH SIMPLE
+ALTER TABLE IF EXISTS public.transactions
+    ADD FOREIGN KEY (budget_id)
+    REFERENCES public.budgets (id) MATCH SIMPLE
     ON UPDATE NO ACTION
     ON DELETE CASCADE
     NOT VALID;
 
 
-ALTER TABLE IF EXISTS public.budgets
-    ADD FOREIGN KEY (id)
-    REFERENCES public.categories (budget_id) MATCH SIMPLE
+ALTER TABLE IF EXISTS public.categories
+    ADD FOREIGN KEY (budget_id)
+    REFERENCES public.budgets (id) MATCH SIMPLE
     ON UPDATE NO ACTION
     ON DELETE CASCADE
     NOT VALID;
 
 
-ALTER TABLE IF EXISTS public.budgets
-    ADD FOREIGN KEY (id)
-    REFERENCES public.category_groups (budget_id) MATCH SIMPLE
+ALTER TABLE IF EXISTS public.category_groups
+    ADD FOREIGN KEY (budget_id)
+    REFERENCES public.budgets (id) MATCH SIMPLE
     ON UPDATE NO ACTION
     ON DELETE CASCADE
     NOT VALID;
 
 
-ALTER TABLE IF EXISTS public.budgets
-    ADD FOREIGN KEY (id)
-    REFERENCES public.months (budget_id) MATCH SIMPLE
+ALTER TABLE IF EXISTS public.months
+    ADD FOREIGN KEY (budget_id)
+    REFERENCES public.budgets (id) MATCH SIMPLE
     ON UPDATE NO ACTION
     ON DELETE CASCADE
     NOT VALID;
 
 
-ALTER TABLE IF EXISTS public.category_groups
-    ADD FOREIGN KEY (id)
-    REFERENCES public.categories (category_group_id) MATCH SIMPLE
+ALTER TABLE IF EXISTS public.categories
+    ADD FOREIGN KEY (category_group_id)
+    REFERENCES public.category_groups (id) MATCH SIMPLE
     ON UPDATE NO ACTION
     ON DELETE SET NULL
     NOT VALID;
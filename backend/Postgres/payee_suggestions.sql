@@ -0,0 +1,146 @@
+-- ==========================================
+-- Payee suggestion frequency table
+--
+-- payee_suggestions counts how often each payee was used with each
+-- category name and account, with the amount total and the latest
+-- amount. The transaction form and imports read the most used row of a
+-- payee instead of scanning its history. Statement-level triggers apply
+-- the OLD/NEW deltas of every write, like the rollup triggers.
+--   psql -d budget -f payee_suggestions.sql
+-- ==========================================
+
+CREATE TABLE IF NOT EXISTS public.payee_suggestions
+(
+    budget_id uuid NOT NULL,
+    payee_id uuid NOT NULL,
+    category_name_id uuid,
+    account_id uuid NOT NULL,
+    uses integer NOT NULL DEFAULT 0,
+    amount_total numeric(15, 2) NOT NULL DEFAULT 0,
+    last_date date,
+    last_amount numeric(15, 2),
+    -- Uncategorized use is one row per payee and account, hence NULLS NOT DISTINCT
+    CONSTRAINT payee_suggestions_key UNIQUE NULLS NOT DISTINCT (payee_id, category_name_id, account_id),
+    CONSTRAINT payee_suggestions_payee_fkey FOREIGN KEY (payee_id)
+        REFERENCES public.payees (id) ON DELETE CASCADE,
+    CONSTRAINT payee_suggestions_budget_fkey FOREIGN KEY (budget_id)
+        REFERENCES public.budgets (id) ON DELETE CASCADE
+);
+
+-- Batch lookups by budget (imports)
+CREATE INDEX IF NOT EXISTS ix_payee_suggestions_budget_payee
+    ON public.payee_suggestions (budget_id, payee_id);
+
+-- Keeps the cleanup of fully reverted rows cheap
+CREATE INDEX IF NOT EXISTS ix_payee_suggestions_unused
+    ON public.payee_suggestions (payee_id)
+    WHERE uses <= 0;
+
+
+-- ==========================================
+-- Incremental refresh
+-- ==========================================
+CREATE OR REPLACE FUNCTION update_payee_suggestions_from_transitions()
+RETURNS TRIGGER AS $$
+DECLARE
+    deltas text;
+BEGIN
+    -- Transition tables only exist for the event that fired the trigger
+    IF TG_OP = 'INSERT' THEN
+        deltas := 'SELECT budget_id, payee_id, category_id, account_id, date, amount, 1 AS n
+                   FROM new_rows WHERE deleted IS FALSE';
+    ELSIF TG_OP = 'DELETE' THEN
+        deltas := 'SELECT budget_id, payee_id, category_id, account_id, date, amount, -1 AS n
+                   FROM old_rows WHERE deleted IS FALSE';
+    ELSE
+        deltas := 'SELECT budget_id, payee_id, category_id, account_id, date, amount, -1 AS n
+                   FROM old_rows WHERE deleted IS FALSE
+                   UNION ALL
+                   SELECT budget_id, payee_id, category_id, account_id, date, amount, 1 AS n
+                   FROM new_rows WHERE deleted IS FALSE';
+    END IF;
+
+    EXECUTE format($sql$
+        INSERT INTO payee_suggestions AS s
+            (budget_id, payee_id, category_name_id, account_id, uses, amount_total, last_date, last_amount)
+        SELECT d.budget_id, d.payee_id, c.category_name_id, d.account_id,
+               SUM(d.n), SUM(d.n * d.amount),
+               MAX(d.date) FILTER (WHERE d.n > 0),
+               (array_agg(d.amount ORDER BY d.date DESC) FILTER (WHERE d.n > 0))[1]
+        FROM (%s) d
+        LEFT JOIN categories c ON c.id = d.category_id
+        GROUP BY d.budget_id, d.payee_id, c.category_name_id, d.account_id
+        ON CONFLICT (payee_id, category_name_id, account_id) DO UPDATE
+        SET uses = s.uses + EXCLUDED.uses,
+            amount_total = s.amount_total + EXCLUDED.amount_total,
+            last_date = GREATEST(s.last_date, EXCLUDED.last_date),
+            last_amount = CASE WHEN EXCLUDED.last_date >= s.last_date OR s.last_date IS NULL
+                               THEN COALESCE(EXCLUDED.last_amount, s.last_amount)
+                               ELSE s.last_amount END
+    $sql$, deltas);
+
+    IF TG_OP <> 'INSERT' THEN
+        DELETE FROM payee_suggestions WHERE uses <= 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_payee_suggestions_insert ON transactions;
+CREATE TRIGGER trg_payee_suggestions_insert
+AFTER INSERT ON transactions
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_payee_suggestions_from_transitions();
+
+DROP TRIGGER IF EXISTS trg_payee_suggestions_update ON transactions;
+CREATE TRIGGER trg_payee_suggestions_update
+AFTER UPDATE ON transactions
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_payee_suggestions_from_transitions();
+
+DROP TRIGGER IF EXISTS trg_payee_suggestions_delete ON transactions;
+CREATE TRIGGER trg_payee_suggestions_delete
+AFTER DELETE ON transactions
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_payee_suggestions_from_transitions();
+
+
+-- ==========================================
+-- Full rebuild
+-- ==========================================
+-- Recompute the table from transactions, e.g. after loading data with
+-- triggers disabled. last_amount/last_date are exact after a rebuild;
+-- incrementally they follow the latest inserted or updated row.
+--   SELECT rebuild_payee_suggestions();                -- all budgets
+--   SELECT rebuild_payee_suggestions('<budget id>');
+CREATE OR REPLACE FUNCTION rebuild_payee_suggestions(p_budget_id uuid DEFAULT NULL)
+RETURNS bigint AS $$
+DECLARE
+    written bigint;
+BEGIN
+    DELETE FROM payee_suggestions
+    WHERE p_budget_id IS NULL OR budget_id = p_budget_id;
+
+    INSERT INTO payee_suggestions
+        (budget_id, payee_id, category_name_id, account_id, uses, amount_total, last_date, last_amount)
+    SELECT t.budget_id, t.payee_id, c.category_name_id, t.account_id,
+           COUNT(*), SUM(t.amount), MAX(t.date),
+           (array_agg(t.amount ORDER BY t.date DESC))[1]
+    FROM transactions t
+    LEFT JOIN categories c ON c.id = t.category_id
+    WHERE t.deleted IS FALSE
+      AND (p_budget_id IS NULL OR t.budget_id = p_budget_id)
+    GROUP BY t.budget_id, t.payee_id, c.category_name_id, t.account_id;
+
+    GET DIAGNOSTICS written = ROW_COUNT;
+    RETURN written;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Backfill existing history
+SELECT rebuild_payee_suggestions() AS payee_suggestions;
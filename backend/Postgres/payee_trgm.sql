@@ -0,0 +1,15 @@
+-- ==========================================
+-- Trigram index for payee search
+--
+-- Serves GET /payees/search on workers running without the in-memory
+-- payee index (PAYEE_INDEX_CACHE_TTL=0): lower(name) LIKE '%text%'.
+-- Needs the pg_trgm contrib extension. Run outside a transaction block:
+--   psql -d budget -f payee_trgm.sql
+-- ==========================================
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_payees_lower_name_trgm
+    ON public.payees USING gin (lower(name) gin_trgm_ops)
+    WHERE deleted = false;
+
+ANALYZE public.payees;
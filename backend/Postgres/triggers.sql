@@ -1,22 +1,56 @@
+-- ==========================================
+-- Rollups are maintained incrementally: every trigger applies the
+-- difference between the OLD and NEW row instead of re-running SUM over
+-- the whole history. A transaction contributes its amount only while
+-- `deleted IS FALSE`. Use reconcile_rollups() to verify (and repair)
+-- the cached totals against a full recompute.
+-- ==========================================
+
+-- Switching back from triggers_statement.sql: never run both sets
+DROP TRIGGER IF EXISTS trg_rollups_insert ON transactions;
+DROP TRIGGER IF EXISTS trg_rollups_update ON transactions;
+DROP TRIGGER IF EXISTS trg_rollups_delete ON transactions;
+
+
 -- ==========================================
 -- Accounts
 -- ==========================================
 CREATE OR REPLACE FUNCTION update_account_balance()
 RETURNS TRIGGER AS $$
+DECLARE
+    old_amount numeric(15, 2) := 0;
+    new_amount numeric(15, 2) := 0;
 BEGIN
-    -- Always recompute from transactions
-    UPDATE accounts
-    SET balance = COALESCE((
-        SELECT SUM(CASE
-            WHEN deleted IS FALSE THEN amount
-            ELSE 0
-        END)
-        FROM transactions
-        WHERE account_id = NEW.account_id
-    ), 0)
-    WHERE id = NEW.account_id;
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.deleted IS FALSE THEN
+        old_amount := OLD.amount;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.deleted IS FALSE THEN
+        new_amount := NEW.amount;
+    END IF;
 
-    RETURN NEW;
+    -- Same account: apply the net difference once
+    IF TG_OP = 'UPDATE' AND OLD.account_id IS NOT DISTINCT FROM NEW.account_id THEN
+        IF new_amount <> old_amount THEN
+            UPDATE accounts
+            SET balance = COALESCE(balance, 0) + new_amount - old_amount
+            WHERE id = NEW.account_id AND budget_id = NEW.budget_id;
+        END IF;
+        RETURN NULL;
+    END IF;
+
+    -- Insert, delete, or the row moved to another account
+    IF old_amount <> 0 THEN
+        UPDATE accounts
+        SET balance = COALESCE(balance, 0) - old_amount
+        WHERE id = OLD.account_id AND budget_id = OLD.budget_id;
+    END IF;
+    IF new_amount <> 0 THEN
+        UPDATE accounts
+        SET balance = COALESCE(balance, 0) + new_amount
+        WHERE id = NEW.account_id AND budget_id = NEW.budget_id;
+    END IF;
+
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -33,24 +67,40 @@ EXECUTE FUNCTION update_account_balance();
 -- ==========================================
 CREATE OR REPLACE FUNCTION update_category_activity()
 RETURNS TRIGGER AS $$
+DECLARE
+    old_amount numeric(15, 2) := 0;
+    new_amount numeric(15, 2) := 0;
 BEGIN
-    -- Always recompute activity from transactions
-    UPDATE categories
-    SET activity = COALESCE((
-        SELECT SUM(CASE
-            WHEN t.deleted IS FALSE THEN t.amount
-            ELSE 0
-        END)
-        FROM transactions t
-        JOIN months m ON EXTRACT(MONTH FROM t.date) = m.month AND EXTRACT(YEAR FROM t.date) = m.year
-        WHERE t.category_id = NEW.category_id
-          AND m.id = categories.month_id
-    ), 0)
-    WHERE id = NEW.category_id
-      AND month_id = (SELECT id FROM months WHERE month = EXTRACT(MONTH FROM NEW.date)
-                                            AND year = EXTRACT(YEAR FROM NEW.date));
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.deleted IS FALSE AND OLD.category_id IS NOT NULL THEN
+        old_amount := OLD.amount;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.deleted IS FALSE AND NEW.category_id IS NOT NULL THEN
+        new_amount := NEW.amount;
+    END IF;
 
-    RETURN NEW;
+    -- Categories are stored per month, so a date change moves the row
+    -- through category_id and is handled below like any other move.
+    IF TG_OP = 'UPDATE' AND OLD.category_id IS NOT DISTINCT FROM NEW.category_id THEN
+        IF new_amount <> old_amount THEN
+            UPDATE categories
+            SET activity = activity + new_amount - old_amount
+            WHERE id = NEW.category_id AND budget_id = NEW.budget_id;
+        END IF;
+        RETURN NULL;
+    END IF;
+
+    IF old_amount <> 0 THEN
+        UPDATE categories
+        SET activity = activity - old_amount
+        WHERE id = OLD.category_id AND budget_id = OLD.budget_id;
+    END IF;
+    IF new_amount <> 0 THEN
+        UPDATE categories
+        SET activity = activity + new_amount
+        WHERE id = NEW.category_id AND budget_id = NEW.budget_id;
+    END IF;
+
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -65,31 +115,50 @@ EXECUTE FUNCTION update_category_activity();
 -- ==========================================
 -- Months
 -- ==========================================
+CREATE OR REPLACE FUNCTION apply_month_activity(p_budget_id uuid, p_date date, p_delta numeric)
+RETURNS void AS $$
+BEGIN
+    IF p_delta = 0 THEN
+        RETURN;
+    END IF;
+
+    UPDATE months
+    SET activity = activity + p_delta,
+        to_be_budgeted = budgeted - (activity + p_delta)
+    WHERE budget_id = p_budget_id
+      AND year = EXTRACT(YEAR FROM p_date)::int
+      AND month = EXTRACT(MONTH FROM p_date)::int;
+END;
+$$ LANGUAGE plpgsql;
+
 CREATE OR REPLACE FUNCTION update_month_activity()
 RETURNS TRIGGER AS $$
 DECLARE
-    v_month INT := EXTRACT(MONTH FROM COALESCE(NEW.date, OLD.date));
-    v_year  INT := EXTRACT(YEAR  FROM COALESCE(NEW.date, OLD.date));
+    old_amount numeric(15, 2) := 0;
+    new_amount numeric(15, 2) := 0;
 BEGIN
-    -- Always recompute activity from transactions
-    UPDATE months
-    SET activity = COALESCE((
-        SELECT SUM(CASE
-            WHEN deleted IS FALSE THEN amount
-            ELSE 0
-        END)
-        FROM transactions
-        WHERE EXTRACT(MONTH FROM date) = v_month
-          AND EXTRACT(YEAR FROM date) = v_year
-    ), 0)
-    WHERE month = v_month AND year = v_year;
-
-    -- Always update to_be_budgeted
-    UPDATE months
-    SET to_be_budgeted = budgeted - activity
-    WHERE month = v_month AND year = v_year;
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.deleted IS FALSE THEN
+        old_amount := OLD.amount;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.deleted IS FALSE THEN
+        new_amount := NEW.amount;
+    END IF;
 
-    RETURN NEW;
+    IF TG_OP = 'UPDATE'
+       AND OLD.budget_id IS NOT DISTINCT FROM NEW.budget_id
+       AND date_trunc('month', OLD.date) = date_trunc('month', NEW.date) THEN
+        PERFORM apply_month_activity(NEW.budget_id, NEW.date, new_amount - old_amount);
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_month_activity(OLD.budget_id, OLD.date, -old_amount);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_month_activity(NEW.budget_id, NEW.date, new_amount);
+    END IF;
+
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -102,12 +171,16 @@ EXECUTE FUNCTION update_month_activity();
 
 
 -- ==========================================
--- Category balance (budget - activity)
+-- Category balance (carryover + budget + activity)
 -- ==========================================
+-- carryover: positive balance of the previous month, set by the month rollover.
+-- Unqualified like the triggers, so it follows the search_path (benchmark schemas)
+ALTER TABLE categories ADD COLUMN IF NOT EXISTS carryover numeric(15, 2) NOT NULL DEFAULT 0;
+
 CREATE OR REPLACE FUNCTION update_category_balance()
 RETURNS TRIGGER AS $$
 BEGIN
-    NEW.balance := COALESCE(NEW.budgeted,0) + COALESCE(NEW.activity,0);
+    NEW.balance := COALESCE(NEW.carryover,0) + COALESCE(NEW.budgeted,0) + COALESCE(NEW.activity,0);
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
@@ -119,5 +192,90 @@ FOR EACH ROW
 EXECUTE FUNCTION update_category_balance();
 
 
-UPDATE transactions SET id = id;
-UPDATE categories SET id = id;
\ No newline at end of file
+
+-- ==========================================
+-- Reconciliation
+-- ==========================================
+-- Compare cached rollups with a full recompute from transactions.
+-- Returns one row per mismatch. With p_fix = true the cached values are
+-- overwritten with the recomputed ones in the same call.
+--   SELECT * FROM reconcile_rollups();                 -- all budgets, report only
+--   SELECT * FROM reconcile_rollups('<budget id>', true);
+CREATE OR REPLACE FUNCTION reconcile_rollups(p_budget_id uuid DEFAULT NULL, p_fix boolean DEFAULT false)
+RETURNS TABLE(kind text, id uuid, budget_id uuid, cached numeric, expected numeric) AS $$
+BEGIN
+    CREATE TEMP TABLE IF NOT EXISTS rollup_mismatches
+    (
+        kind text,
+        id uuid,
+        budget_id uuid,
+        cached numeric,
+        expected numeric
+    ) ON COMMIT DROP;
+    TRUNCATE rollup_mismatches;
+
+    INSERT INTO rollup_mismatches
+    SELECT 'account', a.id, a.budget_id, COALESCE(a.balance, 0), COALESCE(s.total, 0)
+    FROM accounts a
+    LEFT JOIN (
+        SELECT t.account_id, SUM(t.amount) AS total
+        FROM transactions t
+        WHERE t.deleted IS FALSE
+          AND (p_budget_id IS NULL OR t.budget_id = p_budget_id)
+        GROUP BY t.account_id
+    ) s ON s.account_id = a.id
+    WHERE (p_budget_id IS NULL OR a.budget_id = p_budget_id)
+      AND COALESCE(a.balance, 0) <> COALESCE(s.total, 0);
+
+    INSERT INTO rollup_mismatches
+    SELECT 'category', c.id, c.budget_id, c.activity, COALESCE(s.total, 0)
+    FROM categories c
+    LEFT JOIN (
+        SELECT t.category_id, SUM(t.amount) AS total
+        FROM transactions t
+        WHERE t.deleted IS FALSE
+          AND t.category_id IS NOT NULL
+          AND (p_budget_id IS NULL OR t.budget_id = p_budget_id)
+        GROUP BY t.category_id
+    ) s ON s.category_id = c.id
+    WHERE (p_budget_id IS NULL OR c.budget_id = p_budget_id)
+      AND c.activity <> COALESCE(s.total, 0);
+
+    INSERT INTO rollup_mismatches
+    SELECT 'month', m.id, m.budget_id, m.activity, COALESCE(s.total, 0)
+    FROM months m
+    LEFT JOIN (
+        SELECT t.budget_id,
+               EXTRACT(YEAR FROM t.date)::int AS year,
+               EXTRACT(MONTH FROM t.date)::int AS month,
+               SUM(t.amount) AS total
+        FROM transactions t
+        WHERE t.deleted IS FALSE
+          AND (p_budget_id IS NULL OR t.budget_id = p_budget_id)
+        GROUP BY 1, 2, 3
+    ) s ON s.budget_id = m.budget_id AND s.year = m.year AND s.month = m.month
+    WHERE (p_budget_id IS NULL OR m.budget_id = p_budget_id)
+      AND m.activity <> COALESCE(s.total, 0);
+
+    IF p_fix THEN
+        UPDATE accounts a SET balance = r.expected
+        FROM rollup_mismatches r
+        WHERE r.kind = 'account' AND a.id = r.id;
+
+        UPDATE categories c SET activity = r.expected
+        FROM rollup_mismatches r
+        WHERE r.kind = 'category' AND c.id = r.id;
+
+        UPDATE months m SET activity = r.expected, to_be_budgeted = m.budgeted - r.expected
+        FROM rollup_mismatches r
+        WHERE r.kind = 'month' AND m.id = r.id;
+    END IF;
+
+    RETURN QUERY SELECT r.kind, r.id, r.budget_id, r.cached, r.expected FROM rollup_mismatches r;
+    DROP TABLE rollup_mismatches;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Bring existing cached totals in line before relying on deltas
+SELECT count(*) AS repaired_rollups FROM reconcile_rollups(NULL, true);
@@ -1,43 +1,119 @@
 #!/usr/bin/env python3
-from flask import jsonify
-from flask import Flask
 from dotenv import load_dotenv
-from extensions import db, migrate, jwt, cors
-from routes import user_bp, transaction_bp, category_bp, payee_bp, health_bp, budget_bp
-from flasgger import Swagger
 
+# Config reads the environment on import, so .env has to be loaded first
 load_dotenv()
-app = Flask(__name__)
-app.config.from_object('config.Config')
-
-# Initialize extensions
-db.init_app(app)
-migrate.init_app(app, db)
-jwt.init_app(app)
-cors.init_app(app)
-# Create swagger documentation
-swagger = Swagger(app, template_file='swagger/swagger.yml')
-
-# Register blueprints
+
+import threading
+
+import click
+from flask import jsonify
+from flask import Flask
+from extensions import db, jwt, cors
+from routes import (user_bp, transaction_bp, category_bp, payee_bp, health_bp, budget_bp, month_bp, report_bp, balance_bp,
+                    sync_bp)
+from db_replicas import init_replicas
+from profiling import init_profiling
+from serialization import FastJSONProvider
+from commands import (init_db_command, reconcile_rollups_command, rebuild_daily_balances_command,
+                      rebuild_payee_suggestions_command, rollover_months_command,
+                      purge_idempotency_keys_command)
+
 main_prefix = '/api/v1'
 budget_prefix = '/budgets/<uuid:budget_id>'
+swagger_template = 'swagger/swagger.yml'
+
+
+class LazySwaggerDocs:
+    """
+    WSGI middleware serving the Swagger UI and spec. flasgger and the parsed
+    swagger.yml live in a docs-only Flask app that is built on the first
+    request under the docs routes, so workers that never serve the docs
+    never pay for them.
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        config = app.config['SWAGGER']
+        self.prefixes = tuple({config['specs_route'].rstrip('/'), config.get('static_url_path', '/flasgger_static')}
+                              | {spec['route'] for spec in config['specs']})
+        self.docs_app = None
+        self.lock = threading.Lock()
 
-app.register_blueprint(user_bp, url_prefix=main_prefix + '/auth')
-app.register_blueprint(budget_bp, url_prefix=main_prefix + '/budgets')
-app.register_blueprint(transaction_bp, url_prefix=main_prefix + budget_prefix + '/transactions')
-app.register_blueprint(category_bp, url_prefix=main_prefix + budget_prefix + '/categories')
-app.register_blueprint(payee_bp, url_prefix=main_prefix + budget_prefix + '/payees')
-app.register_blueprint(health_bp, url_prefix=main_prefix + '/health')
+    def load(self) -> Flask:
+        with self.lock:
+            if self.docs_app is None:
+                from flasgger import Swagger
+
+                docs_app = Flask(__name__ + '.docs', root_path=self.app.root_path)
+                docs_app.config['SWAGGER'] = self.app.config['SWAGGER']
+                Swagger(docs_app, template_file=swagger_template)
+                self.docs_app = docs_app
+        return self.docs_app
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO', '').startswith(self.prefixes):
+            return self.load()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+
+def create_app(config_object='config.Config') -> Flask:
+    """
+    Application factory. Builds a configured app without touching the
+    database, so every server worker can call it cheaply; tables are created
+    by `flask init-db`/`flask db upgrade` (or Postgres/init.sql), not on import.
+    Swagger, Flask-Migrate and pandas are loaded on first use.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    app.json = FastJSONProvider(app)
+
+    # Initialize extensions
+    db.init_app(app)
+    if click.get_current_context(silent=True) is not None:
+        # Only the flask CLI needs the `db` commands (and alembic)
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    jwt.init_app(app)
+    cors.init_app(app)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(reconcile_rollups_command)
+    app.cli.add_command(rebuild_daily_balances_command)
+    app.cli.add_command(rebuild_payee_suggestions_command)
+    app.cli.add_command(rollover_months_command)
+    app.cli.add_command(purge_idempotency_keys_command)
+    # Swagger documentation, built on the first /api/v1/docs/ request
+    app.wsgi_app = LazySwaggerDocs(app)
+
+    # Register blueprints
+    app.register_blueprint(user_bp, url_prefix=main_prefix + '/auth')
+    app.register_blueprint(budget_bp, url_prefix=main_prefix + '/budgets')
+    app.register_blueprint(transaction_bp, url_prefix=main_prefix + budget_prefix + '/transactions')
+    app.register_blueprint(category_bp, url_prefix=main_prefix + budget_prefix + '/categories')
+    app.register_blueprint(payee_bp, url_prefix=main_prefix + budget_prefix + '/payees')
+    app.register_blueprint(month_bp, url_prefix=main_prefix + budget_prefix + '/months')
+    app.register_blueprint(report_bp, url_prefix=main_prefix + budget_prefix + '/reports')
+    app.register_blueprint(balance_bp, url_prefix=main_prefix + budget_prefix + '/balances')
+    app.register_blueprint(sync_bp, url_prefix=main_prefix + budget_prefix + '/sync')
+    app.register_blueprint(health_bp, url_prefix=main_prefix + '/health')
+    if app.config['DATABASE_REPLICA_URLS']:
+        init_replicas(app)
+    if app.config['PROFILING_ENABLED']:
+        init_profiling(app)
+
+    @app.route('/api/v1/routes', methods=['GET'])
+    def list_routes():
+        routes = []
+        for rule in app.url_map.iter_rules():
+            routes.append(str(rule.rule))
+        return jsonify(routes)
+
+    return app
 
-with app.app_context():
-    db.create_all()
 
 if __name__ == '__main__':
+    # Development server; production runs `gunicorn -c gunicorn.conf.py "app:create_app()"`.
+    # Create the tables first with `flask init-db`.
+    app = create_app()
     app.run(host='0.0.0.0', port=9000)
-
-@app.route('/api/v1/routes', methods=['GET'])
-def list_routes():
-    routes = []
-    for rule in app.url_map.iter_rules():
-        routes.append(str(rule.rule))
-    return jsonify(routes)
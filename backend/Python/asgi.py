@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from app import create_app, main_prefix
+from async_db import create_async_db
+from routes.async_reads import async_read_routes
+
+
+def create_asgi_app(config_object='config.Config') -> Starlette:
+    """
+    ASGI application serving the read-heavy GET endpoints on async handlers
+    and an async engine, and every other request through the Flask app on a
+    thread pool of ASYNC_WSGI_THREADS threads. Served with
+
+        gunicorn -c gunicorn.conf.py -k uvicorn_worker.UvicornWorker "asgi:create_asgi_app()"
+
+    so one worker keeps many concurrent reads in flight without a thread,
+    or a pooled connection, per waiting request.
+    """
+    flask_app = create_app(config_object)
+    config = flask_app.config
+    engine, sessionmaker = create_async_db(config['SQLALCHEMY_DATABASE_URI'], config['SQLALCHEMY_ENGINE_OPTIONS'])
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await engine.dispose()
+
+    app = Starlette(
+        routes=async_read_routes(main_prefix) + [
+            Mount('/', app=WSGIMiddleware(flask_app, workers=config['ASYNC_WSGI_THREADS'])),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.config = config
+    app.state.flask_app = flask_app
+    app.state.engine = engine
+    app.state.sessionmaker = sessionmaker
+    return app
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.engine.interfaces import BindTyping
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# -------------------------------
+# Async database access
+# -------------------------------
+# Async drivers replacing the sync ones of DATABASE_URL
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_database_url(database_uri: str) -> URL:
+    """
+    DATABASE_URL with its driver swapped for the async one
+    (postgresql[+psycopg2] -> postgresql+asyncpg, sqlite -> sqlite+aiosqlite).
+    """
+    url = make_url(database_uri)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+def async_engine_options(sync_options: dict) -> dict:
+    """
+    Pool settings of the sync engine translated for the async one. The async
+    engine always uses its own asyncio-aware queue pool.
+    """
+    options = {key: value for key, value in sync_options.items() if key not in ('poolclass', 'connect_args')}
+    server_options = sync_options.get('connect_args', {}).get('options', '')
+    if server_options.startswith('-c statement_timeout='):
+        options['connect_args'] = {'server_settings': {'statement_timeout': server_options.split('=', 1)[1]}}
+    return options
+
+
+def create_async_db(database_uri: str, sync_options: dict):
+    """
+    Async engine and session factory for DATABASE_URL. Returns (engine, sessionmaker).
+    """
+    url = async_database_url(database_uri)
+    engine = create_async_engine(url, **async_engine_options(sync_options))
+    if url.get_backend_name() == 'postgresql':
+        # The models map the uuid columns to String(36). Like psycopg2, let the
+        # server infer parameter types instead of casting them to VARCHAR, and
+        # exchange uuid values as text
+        engine.sync_engine.dialect.bind_typing = BindTyping.NONE
+        event.listen(engine.sync_engine, 'connect', _uuid_as_text)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+def _uuid_as_text(dbapi_connection, connection_record):
+    dbapi_connection.run_async(
+        lambda connection: connection.set_type_codec('uuid', schema='pg_catalog', encoder=str, decoder=str,
+                                                     format='text')
+    )
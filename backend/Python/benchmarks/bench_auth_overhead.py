@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of the per-request overhead of token_required.
+
+Compares a protected no-op endpoint with the user lookup on every request,
+with the authenticated-user cache, and with AUTH_TRUST_TOKEN_CLAIMS.
+Uses DATABASE_URL when set, an in-memory SQLite database otherwise:
+
+    python benchmarks/bench_auth_overhead.py --requests 5000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt  # noqa: E402
+from flask import Blueprint  # noqa: E402
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User  # noqa: E402
+from routes.utils.db_utils import token_required, user_cache  # noqa: E402
+
+bench_bp = Blueprint('bench_auth', __name__)
+
+
+@bench_bp.route('/bench/auth')
+@token_required
+def protected(current_user):
+    return 'ok'
+
+
+MODES = {
+    'lookup every request': {'AUTH_USER_CACHE_TTL': 0, 'AUTH_TRUST_TOKEN_CLAIMS': False},
+    'user cache': {'AUTH_USER_CACHE_TTL': 60, 'AUTH_TRUST_TOKEN_CLAIMS': False},
+    'trust token claims': {'AUTH_USER_CACHE_TTL': 0, 'AUTH_TRUST_TOKEN_CLAIMS': True},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.register_blueprint(bench_bp)
+    with app.app_context():
+        db.create_all()
+        user = User(login='bench_auth', password='x', email='bench_auth@example.com', name='Bench', active=True)
+        db.session.add(user)
+        db.session.commit()
+        user_id = str(user.id)
+
+    token = jwt.encode({'user_id': user_id, 'exp': datetime.now(timezone.utc) + timedelta(hours=1)},
+                       Config.SECRET_KEY, algorithm="HS256")
+    headers = {'Authorization': f'Bearer {token}'}
+    client = app.test_client()
+
+    try:
+        baseline = None
+        for mode, config in MODES.items():
+            app.config.update(config)
+            user_cache.clear()
+            client.get('/bench/auth', headers=headers)  # warm up
+
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                client.get('/bench/auth', headers=headers)
+            per_request = (time.perf_counter() - start) / args.requests * 1e6
+
+            baseline = baseline or per_request
+            print(f'{mode:<22} {per_request:8.1f} us/request  ({baseline / per_request:.2f}x)')
+    finally:
+        with app.app_context():
+            User.query.filter_by(id=user_id).delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
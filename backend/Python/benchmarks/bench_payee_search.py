@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Time payee suggestions from the in-memory index against the SQL fallback.
+
+Seeds a budget with --payees payees and a few transactions each, then runs
+every prefix of a set of typed names through both search paths. Uses
+DATABASE_URL when set, an in-memory SQLite database otherwise:
+
+    python benchmarks/bench_payee_search.py --payees 5000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Account, Budget, Payee, Transaction  # noqa: E402
+from routes.utils.payee_index import get_payee_index, search_payees_sql  # noqa: E402
+
+WORDS = ['market', 'grocer', 'coffee', 'bakery', 'fuel', 'pharmacy', 'cinema', 'books', 'garden', 'hardware',
+         'pizza', 'sushi', 'taxi', 'hotel', 'gym', 'florist', 'butcher', 'deli', 'outlet', 'station']
+
+
+def seed(payees):
+    budget_id = uuid.uuid4()
+    key = budget_id.hex if db.engine.dialect.name == 'sqlite' else str(budget_id)
+    account = Account(id=uuid.uuid4(), name=f'Account {budget_id.hex}', budget_id=key)
+    db.session.add_all([Budget(id=key, name='Payee search benchmark'), account])
+    db.session.flush()
+    account_id = account.id.hex if db.engine.dialect.name == 'sqlite' else str(account.id)
+
+    rng = random.Random(0)
+    names = set()
+    while len(names) < payees:
+        names.add(f'{rng.choice(string.ascii_uppercase)}{"".join(rng.choices(string.ascii_lowercase, k=5))} '
+                  f'{rng.choice(WORDS).title()}')
+    rows = [{'id': str(uuid.uuid4()), 'name': name, 'budget_id': key, 'deleted': False} for name in names]
+    db.session.execute(insert(Payee), rows)
+    db.session.execute(insert(Transaction), [
+        {'id': str(uuid.uuid4()), 'date': date(2025, 1, 1) - timedelta(days=rng.randrange(700)),
+         'account_id': account_id, 'payee_id': rng.choice(rows)['id'], 'amount': -10, 'budget_id': key,
+         'deleted': False}
+        for _ in range(payees * 3)
+    ])
+    db.session.commit()
+    return key, sorted(names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--payees', type=int, default=5000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        budget_id, names = seed(args.payees)
+        typed = [name[:length] for name in random.Random(1).sample(names, 50) for length in range(1, 8)]
+        typed += [word[:length] for word in WORDS for length in range(3, 6)]
+
+        start = time.perf_counter()
+        get_payee_index(budget_id)
+        print(f'index build ({args.payees} payees)  {(time.perf_counter() - start) * 1000:8.1f} ms')
+
+        for label, search in [('in-memory index', lambda q: get_payee_index(budget_id).search(q, 10)),
+                              ('SQL LIKE fallback', lambda q: search_payees_sql(budget_id, q, 10))]:
+            timings = []
+            for query in typed:
+                start = time.perf_counter()
+                search(query)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            print(f'{label:<24} median {timings[len(timings) // 2] * 1e6:8.1f} us   '
+                  f'p99 {timings[int(len(timings) * 0.99)] * 1e6:8.1f} us   ({len(timings)} queries)')
+
+
+if __name__ == '__main__':
+    main()
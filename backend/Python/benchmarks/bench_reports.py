@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Time the reports endpoints on a large synthetic budget.
+
+Seeds a budget with --rows transactions spread over five years, then
+requests every report through the test client. Uses DATABASE_URL when set,
+an in-memory SQLite database otherwise:
+
+    python benchmarks/bench_reports.py --rows 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Account, Budget, Category, CategoryGroup, CategoryName, Month, Payee, Transaction, User  # noqa: E402
+
+REPORTS = [
+    ('spending', {'group_by': 'category'}),
+    ('spending', {'group_by': 'payee'}),
+    ('spending', {'group_by': 'account'}),
+    ('spending', {'group_by': 'month'}),
+    ('trends', {'window': 3}),
+    ('trends', {'window': 12, 'date_from': '2023-01-01'}),
+]
+
+
+def seed(rows):
+    """
+    Create a user and a budget with `rows` transactions. Returns (user id, budget UUID).
+    """
+    budget_id = uuid.uuid4()
+    key = budget_id.hex if db.engine.dialect.name == 'sqlite' else str(budget_id)
+    user = User(login=f'bench_{budget_id.hex[:8]}', password='x', email=f'{budget_id.hex[:8]}@example.com',
+                name='Bench', active=True)
+    db.session.add_all([user, Budget(id=key, name='Reports benchmark')])
+
+    accounts = [Account(id=uuid.uuid4(), name=f'Account {uuid.uuid4().hex}', budget_id=key) for _ in range(5)]
+    payees = [Payee(name=f'Payee {uuid.uuid4().hex}', budget_id=key) for _ in range(200)]
+    names = [CategoryName(name=f'Category {uuid.uuid4().hex}') for _ in range(30)]
+    group = CategoryGroup(name=f'Group {uuid.uuid4().hex}', budget_id=key)
+    db.session.add_all(accounts + payees + names + [group])
+    db.session.flush()
+
+    categories = []
+    for year in range(2021, 2026):
+        for month_number in range(1, 13):
+            month = Month(year=year, month=month_number, budget_id=key)
+            db.session.add(month)
+            db.session.flush()
+            month_categories = [Category(category_name_id=n.id, category_group_id=group.id, budget_id=key,
+                                         month_id=month.id) for n in names]
+            db.session.add_all(month_categories)
+            categories.append(month_categories)
+    db.session.flush()
+
+    account_ids = [a.id.hex if db.engine.dialect.name == 'sqlite' else str(a.id) for a in accounts]
+    category_ids = [[c.id for c in month] for month in categories]
+    rng = random.Random(0)
+    batch = []
+    for _ in range(rows):
+        day = date(2021, 1, 1) + timedelta(days=rng.randrange(5 * 365))
+        income = rng.random() < 0.05
+        batch.append({
+            'id': str(uuid.uuid4()), 'date': day, 'budget_id': key,
+            'account_id': rng.choice(account_ids), 'payee_id': rng.choice(payees).id,
+            'category_id': None if income else rng.choice(category_ids[(day.year - 2021) * 12 + day.month - 1]),
+            'amount': round(rng.uniform(1000, 5000) if income else -rng.uniform(1, 300), 2),
+            'deleted': False,
+        })
+        if len(batch) == 10000:
+            db.session.execute(insert(Transaction), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Transaction), batch)
+    db.session.commit()
+    return str(user.id), budget_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        user_id, budget_id = seed(args.rows)
+        print(f'seeded {args.rows} transactions in {time.perf_counter() - start:.1f}s')
+
+    token = jwt.encode({'user_id': user_id, 'exp': datetime.now(timezone.utc) + timedelta(hours=1)},
+                       Config.SECRET_KEY, algorithm="HS256")
+    headers = {'Authorization': f'Bearer {token}'}
+    client = app.test_client()
+
+    for report, params in REPORTS:
+        url = f'/api/v1/budgets/{budget_id}/reports/{report}'
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(url, query_string=params, headers=headers)
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.get_data(as_text=True)
+        label = report + ' ' + ' '.join(f'{k}={v}' for k, v in params.items())
+        print(f'{label:<40} best {min(timings) * 1000:7.1f} ms  median {sorted(timings)[len(timings) // 2] * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark row-level (triggers.sql) vs statement-level (triggers_statement.sql)
+rollup triggers on bulk writes.
+
+Runs in a scratch schema of the database given by DATABASE_URL (or --dsn),
+so it never touches real data:
+
+    python benchmarks/bench_rollup_triggers.py --rows 10000
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+import psycopg2
+
+POSTGRES_DIR = Path(__file__).resolve().parents[2] / 'Postgres'
+SCHEMA = 'rollup_bench'
+
+# Only the columns the rollup triggers touch
+TABLES = """
+CREATE TABLE accounts (id uuid PRIMARY KEY, budget_id uuid NOT NULL, balance numeric(15, 2));
+CREATE TABLE months (id uuid PRIMARY KEY, month integer NOT NULL, year integer NOT NULL,
+                     budgeted numeric(15, 2) NOT NULL DEFAULT 0, activity numeric(15, 2) NOT NULL DEFAULT 0,
+                     to_be_budgeted numeric(15, 2) NOT NULL DEFAULT 0, budget_id uuid NOT NULL);
+CREATE TABLE categories (id uuid PRIMARY KEY, budget_id uuid NOT NULL, month_id uuid NOT NULL,
+                         budgeted numeric(15, 2) NOT NULL DEFAULT 0, activity numeric(15, 2) NOT NULL DEFAULT 0,
+                         carryover numeric(15, 2) NOT NULL DEFAULT 0, balance numeric(15, 2) NOT NULL DEFAULT 0);
+CREATE TABLE transactions (id uuid PRIMARY KEY DEFAULT gen_random_uuid(), date date NOT NULL, category_id uuid,
+                           account_id uuid NOT NULL, payee_id uuid NOT NULL, amount numeric(15, 2) NOT NULL,
+                           memo text, deleted boolean DEFAULT false, budget_id uuid NOT NULL);
+CREATE INDEX ON months (budget_id, year, month);
+"""
+
+SEED = """
+INSERT INTO accounts SELECT gen_random_uuid(), %(budget)s, 0 FROM generate_series(1, 5);
+INSERT INTO months (id, month, year, budget_id)
+    SELECT gen_random_uuid(), m, 2025, %(budget)s FROM generate_series(1, 12) m;
+INSERT INTO categories (id, budget_id, month_id)
+    SELECT gen_random_uuid(), %(budget)s, m.id FROM months m, generate_series(1, 20);
+"""
+
+BULK_INSERT = """
+INSERT INTO transactions (date, category_id, account_id, payee_id, amount, budget_id)
+SELECT d, c.id, a.id, gen_random_uuid(), (g %% 200) - 100, %(budget)s
+FROM generate_series(1, %(rows)s) g
+CROSS JOIN LATERAL (SELECT date '2025-01-01' + (g %% 365) AS d) dd
+JOIN months m ON m.year = 2025 AND m.month = EXTRACT(MONTH FROM dd.d)
+CROSS JOIN LATERAL (SELECT id FROM categories WHERE month_id = m.id LIMIT 1 OFFSET g %% 20) c
+CROSS JOIN LATERAL (SELECT id FROM accounts ORDER BY id LIMIT 1 OFFSET g %% 5) a
+"""
+
+MASS_SOFT_DELETE = "UPDATE transactions SET deleted = true WHERE budget_id = %(budget)s"
+MASS_DELETE = "DELETE FROM transactions WHERE budget_id = %(budget)s"
+
+
+def run_variant(conn, trigger_files, rows, budget):
+    with conn.cursor() as cur:
+        cur.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+        cur.execute(f'CREATE SCHEMA {SCHEMA}')
+        cur.execute(f'SET search_path TO {SCHEMA}, public')
+        cur.execute(TABLES)
+        for name in trigger_files:
+            cur.execute((POSTGRES_DIR / name).read_text())
+        cur.execute(SEED, {'budget': budget})
+        conn.commit()
+
+        results = {}
+        for label, sql in (('bulk insert', BULK_INSERT),
+                           ('mass soft-delete', MASS_SOFT_DELETE),
+                           ('mass delete', MASS_DELETE)):
+            start = time.perf_counter()
+            cur.execute(sql, {'budget': budget, 'rows': rows})
+            conn.commit()
+            results[label] = time.perf_counter() - start
+
+        cur.execute('SELECT count(*) FROM reconcile_rollups()')
+        mismatches = cur.fetchone()[0]
+        cur.execute(f'DROP SCHEMA {SCHEMA} CASCADE')
+        conn.commit()
+    return results, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL'), help='Postgres DSN (default: $DATABASE_URL)')
+    parser.add_argument('--rows', type=int, default=10000, help='Transactions per bulk statement')
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error('Set DATABASE_URL or pass --dsn.')
+
+    budget = '00000000-0000-0000-0000-000000000001'
+    conn = psycopg2.connect(args.dsn.replace('postgresql+psycopg2://', 'postgresql://'))
+    try:
+        variants = {
+            'row-level': ['triggers.sql'],
+            'statement-level': ['triggers.sql', 'triggers_statement.sql'],
+        }
+        results = {name: run_variant(conn, files, args.rows, budget) for name, files in variants.items()}
+    finally:
+        conn.close()
+
+    print(f"{'operation':<18}" + ''.join(f'{name:>27}' for name in results))
+    for label in results['row-level'][0]:
+        cells = ''.join(
+            f'{timings[label] * 1000:>10.1f} ms {args.rows / timings[label]:>9.0f} r/s'
+            for timings, _ in results.values()
+        )
+        print(f'{label:<18}{cells}')
+    for name, (_, mismatches) in results.items():
+        print(f'{name}: {mismatches} rollup mismatches after run')
+
+
+if __name__ == '__main__':
+    main()
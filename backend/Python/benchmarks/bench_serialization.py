@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Compare ways of turning a large transaction list into a JSON body.
+
+  legacy    ORM instances, the previous per-column to_dict loop, Flask's default JSON provider
+  compiled  ORM instances, the precompiled model serializer, orjson
+  rows      Query.with_entities row tuples, rows_to_dicts, orjson (GET /transactions)
+
+Each variant is timed as fetch + to dicts + encode. Uses DATABASE_URL when
+set, an in-memory SQLite database otherwise:
+
+    python benchmarks/bench_serialization.py --rows 50000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Account, Budget, Payee, Transaction  # noqa: E402
+from serialization import dumps_bytes, rows_to_dicts  # noqa: E402
+
+COLUMNS = tuple(c.name for c in Transaction.__table__.columns)
+
+
+def legacy_to_dict(instance) -> dict:
+    result = {}
+    for c in instance.__table__.columns:
+        try:
+            result[c.name] = getattr(instance, c.name)
+        except AttributeError:
+            result[c.name] = None
+    return result
+
+
+def seed(rows):
+    """
+    Create a budget with `rows` transactions. Returns the budget key.
+    """
+    budget_id = uuid.uuid4()
+    key = budget_id.hex if db.engine.dialect.name == 'sqlite' else str(budget_id)
+    db.session.add(Budget(id=key, name='Serialization benchmark'))
+    accounts = [Account(id=uuid.uuid4(), name=f'Account {uuid.uuid4().hex}', budget_id=key) for _ in range(5)]
+    payees = [Payee(name=f'Payee {uuid.uuid4().hex}', budget_id=key) for _ in range(200)]
+    db.session.add_all(accounts + payees)
+    db.session.flush()
+
+    account_ids = [a.id.hex if db.engine.dialect.name == 'sqlite' else str(a.id) for a in accounts]
+    rng = random.Random(0)
+    batch = []
+    for i in range(rows):
+        batch.append({
+            'id': str(uuid.uuid4()), 'date': date(2021, 1, 1) + timedelta(days=rng.randrange(5 * 365)),
+            'budget_id': key, 'account_id': rng.choice(account_ids), 'payee_id': rng.choice(payees).id,
+            'amount': round(-rng.uniform(1, 300), 2), 'memo': f'memo {i}' if i % 3 else None, 'deleted': False,
+        })
+        if len(batch) == 10000:
+            db.session.execute(insert(Transaction), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Transaction), batch)
+    db.session.commit()
+    return key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    default_provider = DefaultJSONProvider(app)
+    with app.app_context():
+        db.create_all()
+        key = seed(args.rows)
+        query = Transaction.query.filter_by(budget_id=key).order_by(Transaction.date, Transaction.id)
+
+        def legacy():
+            instances = query.all()
+            data = [legacy_to_dict(t) for t in instances]
+            return instances, data, default_provider.dumps(data, separators=(',', ':')).encode()
+
+        def compiled():
+            instances = query.all()
+            data = Transaction.serialize_many(instances)
+            return instances, data, dumps_bytes(data)
+
+        def rows():
+            result = query.with_entities(*[getattr(Transaction, name) for name in COLUMNS]).all()
+            data = rows_to_dicts(COLUMNS, result)
+            return result, data, dumps_bytes(data)
+
+        baseline = None
+        for name, variant in (('legacy', legacy), ('compiled', compiled), ('rows', rows)):
+            timings = []
+            for _ in range(args.repeat):
+                # Start every run with an empty identity map, as a request would
+                db.session.remove()
+                start = time.perf_counter()
+                fetched, data, body = variant()
+                timings.append(time.perf_counter() - start)
+                assert len(data) == args.rows
+            median = sorted(timings)[len(timings) // 2]
+            baseline = baseline or median
+            print(f'{name:<9} median {median * 1000:8.1f} ms   best {min(timings) * 1000:8.1f} ms   '
+                  f'{baseline / median:5.1f}x   {len(body) / 1e6:5.1f} MB')
+
+        # Stage breakdown on the already fetched instances/rows
+        db.session.remove()
+        instances = query.all()
+        data = [legacy_to_dict(t) for t in instances]
+        for label, func in (('to_dict loop', lambda: [legacy_to_dict(t) for t in instances]),
+                            ('precompiled serializer', lambda: Transaction.serialize_many(instances)),
+                            ('flask default encoder', lambda: default_provider.dumps(data, separators=(',', ':'))),
+                            ('orjson encoder', lambda: dumps_bytes(data))):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                func()
+            print(f'  {label:<24} {(time.perf_counter() - start) / args.repeat * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Measure cold start: how long a fresh interpreter needs to import the app and
+run create_app(), which is what every gunicorn worker (or CLI call) pays.
+
+Each run is a new process, so nothing is cached between runs. Also lists the
+slowest imports (python -X importtime) and times the first and a warm request
+to the Swagger docs, which are built lazily:
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+STARTUP = 'from app import create_app; create_app()'
+DOCS = '''
+import time
+from app import create_app
+client = create_app().test_client()
+for label in ('first', 'warm'):
+    start = time.perf_counter()
+    assert client.get('/api/v1/docs/apispec_1.json').status_code == 200
+    print(label, (time.perf_counter() - start) * 1000)
+'''
+LAZY_MODULES = ('flasgger', 'flask_migrate', 'pandas', 'numpy')
+
+
+def run(code, *flags):
+    env = dict(os.environ, DATABASE_URL=os.environ.get('DATABASE_URL', 'sqlite://'))
+    return subprocess.run([sys.executable, *flags, '-c', code], cwd=BASE_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def slowest_imports(top):
+    """
+    Top-level packages by cumulative import time, in ms.
+    """
+    totals = {}
+    for line in run(STARTUP, '-X', 'importtime').stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Only entries imported directly by a first-party module are roots
+        if name.startswith(' ' * 3) and not name.startswith(' ' * 4):
+            root = name.strip().split('.')[0]
+            totals[root] = totals.get(root, 0) + int(cumulative) / 1000
+    return sorted(totals.items(), key=lambda item: -item[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    timer = f'import time; start = time.perf_counter(); {STARTUP}; print((time.perf_counter() - start) * 1000)'
+    timings = [float(run(timer).stdout) for _ in range(args.runs)]
+    print(f'create_app() in a fresh process: median {statistics.median(timings):7.1f} ms   '
+          f'min {min(timings):7.1f} ms   ({args.runs} runs)')
+
+    process = run(f'import sys; {STARTUP}; print(",".join(m for m in {LAZY_MODULES!r} if m in sys.modules))')
+    print(f'deferred modules loaded at startup: {process.stdout.strip() or "none"}')
+
+    print('slowest imports (cumulative):')
+    for name, ms in slowest_imports(args.top):
+        print(f'  {name:<24} {ms:7.1f} ms')
+
+    for line in run(DOCS).stdout.splitlines():
+        label, ms = line.split()
+        print(f'{label} docs request: {float(ms):7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
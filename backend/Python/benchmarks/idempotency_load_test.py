@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Check that Idempotency-Key suppresses duplicate writes under concurrent retries.
+
+Starts `gunicorn -c gunicorn.conf.py "app:create_app()"` and sends every one of
+--keys POST /transactions requests --retries times at once, each copy with the
+same Idempotency-Key and from its own connection, spread over all workers. A
+copy whose connection drops is retried. Afterwards every key must have produced exactly
+one transaction, and all answers for a key must be identical.
+--without-key sends the same requests without the header, as a control:
+it should report duplicated keys.
+
+Meant for Postgres, where concurrent claims of a key block on its primary
+key instead of failing with "database is locked":
+
+    DATABASE_URL=postgresql+psycopg2://... python benchmarks/idempotency_load_test.py --workers 4 --keys 200
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+# Also puts the project on sys.path and defaults DATABASE_URL to a SQLite file
+from load_test import seed, wait_until_ready
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Account, Category, CategoryGroup, CategoryName, Month, Transaction  # noqa: E402
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+
+def seed_account(budget_id):
+    """
+    Create the account the transactions are booked on and a January 2025
+    category for them. Returns (account id, category name id).
+    """
+    app = create_app()
+    with app.app_context():
+        key = budget_id.hex if db.engine.dialect.name == 'sqlite' else str(budget_id)
+        account = Account(id=uuid.uuid4(), name=f'Idempotency {budget_id.hex[:8]}', budget_id=key)
+        category_name = CategoryName(name=f'Retries {budget_id.hex[:8]}')
+        group = CategoryGroup(name=f'Idempotency {budget_id.hex[:8]}', budget_id=key)
+        month = Month(month=1, year=2025, budget_id=key)
+        db.session.add_all([account, category_name, group, month])
+        db.session.flush()
+        db.session.add(Category(category_name_id=category_name.id, category_group_id=group.id, budget_id=key,
+                                month_id=month.id))
+        db.session.commit()
+        return account.id, category_name.id
+
+
+def count_transactions(budget_id) -> Counter:
+    """
+    Number of stored transactions per memo (the memo carries the key).
+    """
+    app = create_app()
+    with app.app_context():
+        key = budget_id.hex if db.engine.dialect.name == 'sqlite' else str(budget_id)
+        rows = db.session.execute(
+            select(Transaction.memo, func.count()).where(Transaction.budget_id == key).group_by(Transaction.memo)
+        ).all()
+        return Counter({memo: count for memo, count in rows})
+
+
+def send_until_done(port, path, body, headers, key, results, lock, start):
+    """
+    POST `body` until it gets an answer; record it in `results`.
+    """
+    start.wait()
+    attempts = 0
+    while True:
+        attempts += 1
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        try:
+            connection.request('POST', path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.05)
+            continue
+        finally:
+            connection.close()
+        with lock:
+            results.append((key, response.status, data,
+                            response.headers.get('Idempotent-Replayed') == 'true', attempts))
+        return
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=1, help='Threads per worker (WEB_THREADS).')
+    parser.add_argument('--keys', type=int, default=100, help='Distinct writes (idempotency keys).')
+    parser.add_argument('--retries', type=int, default=8, help='Concurrent copies sent per key.')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--without-key', action='store_true', help='Omit Idempotency-Key (control run).')
+    args = parser.parse_args()
+
+    token, budget_id = seed()
+    account_id, category_id = seed_account(budget_id)
+    path = f'/api/v1/budgets/{budget_id}/transactions'
+
+    env = dict(os.environ, WEB_WORKERS=str(args.workers), WEB_THREADS=str(args.threads),
+               WEB_BIND=f'127.0.0.1:{args.port}', WEB_ACCESS_LOG='/dev/null', WEB_LOG_LEVEL='warning',
+               WEB_MAX_REQUESTS='0')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()'],
+                              cwd=BASE_DIR, env=env)
+    results = []
+    lock = threading.Lock()
+    try:
+        wait_until_ready(args.port)
+        started = time.perf_counter()
+        for number in range(args.keys):
+            key = f'load-{budget_id.hex[:8]}-{number}'
+            body = json.dumps({'date': '2025-01-15', 'account_id': str(account_id), 'category_id': str(category_id),
+                               'amount': '-1.00', 'payee_name': f'Retry Shop {budget_id.hex[:8]}', 'memo': key})
+            headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+            if not args.without_key:
+                headers['Idempotency-Key'] = key
+            start = threading.Event()
+            threads = [threading.Thread(target=send_until_done,
+                                        args=(args.port, path, body, headers, key, results, lock, start))
+                       for _ in range(args.retries)]
+            for thread in threads:
+                thread.start()
+            start.set()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    stored = count_transactions(budget_id)
+    answers = {}
+    for key, status, data, _, _ in results:
+        answers.setdefault(key, set()).add((status, data))
+    duplicated = sorted(key for key, count in stored.items() if count > 1)
+    missing = args.keys - len(stored)
+    inconsistent = sorted(key for key, seen in answers.items() if len(seen) > 1)
+    failed = sum(1 for _, status, _, _, _ in results if status >= 400)
+    replayed = sum(1 for result in results if result[3])
+    retried = sum(result[4] - 1 for result in results)
+
+    print(f'{args.workers} worker(s), {args.keys} keys x {args.retries} concurrent copies '
+          f'in {elapsed:.1f}s ({len(results) / elapsed:.0f} req/s)')
+    print(f'{len(results)} answers: {replayed} replayed, {failed} errors, {retried} retried after a disconnect')
+    print(f'transactions stored: {sum(stored.values())} (duplicated keys {len(duplicated)}, missing {missing}, '
+          f'keys with differing answers {len(inconsistent)})')
+    if duplicated or missing or inconsistent or failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Measure how API throughput scales with the number of gunicorn workers.
+
+For every worker count, starts `gunicorn -c gunicorn.conf.py "app:create_app()"`,
+runs --concurrency keep-alive clients against an authenticated endpoint for
+--duration seconds and reports requests/s and latency percentiles.
+
+Uses DATABASE_URL when set, a temporary SQLite file otherwise (workers are
+separate processes, so an in-memory database cannot be shared):
+
+    python benchmarks/load_test.py --workers 1,2,4 --concurrency 16 --duration 10
+
+--asgi serves asgi:create_asgi_app() on uvicorn workers instead, so the
+async read API answers the GET endpoints. --db-latency-ms routes the
+server's Postgres (TCP) connections through a local proxy that delays every
+reply, to simulate a database across the network:
+
+    python benchmarks/load_test.py --workers 1 --db-latency-ms 5 --asgi
+"""
+import argparse
+import asyncio
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = f"sqlite:///{tempfile.mkdtemp()}/load_test.db"
+
+import jwt  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Budget, User  # noqa: E402
+
+
+def seed():
+    """
+    Create the tables, a user and an empty budget. Returns (token, budget UUID).
+    """
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        budget_id = uuid.uuid4()
+        user = User(login=f'load_{budget_id.hex[:8]}', password='x', email=f'{budget_id.hex[:8]}@example.com',
+                    name='Load test', active=True)
+        key = budget_id.hex if db.engine.dialect.name == 'sqlite' else str(budget_id)
+        db.session.add_all([user, Budget(id=key, name='Load test')])
+        db.session.commit()
+        token = jwt.encode({'user_id': str(user.id), 'exp': datetime.now(timezone.utc) + timedelta(hours=1)},
+                           Config.SECRET_KEY, algorithm="HS256")
+    return token, budget_id
+
+
+def start_latency_proxy(host, port, delay):
+    """
+    Forward a local TCP port to host:port, delaying every chunk sent back by
+    `delay` seconds. Runs on a background event loop; returns the local port.
+    """
+    loop = asyncio.new_event_loop()
+
+    async def pipe(reader, writer, pause):
+        try:
+            while data := await reader.read(65536):
+                if pause:
+                    await asyncio.sleep(pause)
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle(client_reader, client_writer):
+        upstream_reader, upstream_writer = await asyncio.open_connection(host, port)
+        await asyncio.gather(pipe(client_reader, upstream_writer, 0), pipe(upstream_reader, client_writer, delay))
+
+    server = loop.run_until_complete(asyncio.start_server(handle, '127.0.0.1', 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1]
+
+
+def wait_until_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/api/v1/health/status')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start in time')
+
+
+def run_load(port, path, headers, concurrency, duration):
+    """
+    Hammer `path` from `concurrency` threads. Returns (requests, errors, latencies).
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        failed = 0
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), errors[0], sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2,4', help='Comma-separated worker counts.')
+    parser.add_argument('--threads', type=int, default=1, help='Threads per worker (WEB_THREADS).')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--asgi', action='store_true', help='Serve the ASGI app on uvicorn workers.')
+    parser.add_argument('--db-latency-ms', type=float, default=0,
+                        help='Delay added to every database reply (Postgres over TCP only).')
+    parser.add_argument('--path', default='/api/v1/budgets/{budget_id}/transactions?limit=50',
+                        help='Endpoint to load; {budget_id} is replaced with the seeded budget.')
+    args = parser.parse_args()
+
+    token, budget_id = seed()
+    path = args.path.format(budget_id=budget_id)
+    headers = {'Authorization': f'Bearer {token}'}
+    print(f'{os.cpu_count()} CPU(s), {args.concurrency} clients, {args.duration:.0f}s per run, GET {path}')
+    app = 'asgi:create_asgi_app()' if args.asgi else 'app:create_app()'
+    database_url = os.environ['DATABASE_URL']
+    if args.db_latency_ms:
+        url = make_url(database_url)
+        proxy_port = start_latency_proxy(url.host, url.port or 5432, args.db_latency_ms / 1000)
+        database_url = url.set(host='127.0.0.1', port=proxy_port).render_as_string(hide_password=False)
+        print(f'database replies delayed by {args.db_latency_ms:g} ms')
+
+    for workers in (int(w) for w in args.workers.split(',')):
+        # No max_requests restarts: they reset the connections of in-flight clients
+        env = dict(os.environ, DATABASE_URL=database_url, WEB_WORKERS=str(workers), WEB_THREADS=str(args.threads),
+                   WEB_BIND=f'127.0.0.1:{args.port}', WEB_ACCESS_LOG='/dev/null', WEB_LOG_LEVEL='warning',
+                   WEB_MAX_REQUESTS='0')
+        if args.asgi:
+            env['WEB_WORKER_CLASS'] = 'uvicorn_worker.UvicornWorker'
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', app],
+                                  cwd=BASE_DIR, env=env)
+        try:
+            wait_until_ready(args.port)
+            requests, errors, latencies = run_load(args.port, path, headers, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+
+        if not latencies:
+            print(f'workers={workers:<3} no successful requests ({errors} errors)')
+            continue
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000
+        print(f'{app:<24} workers={workers:<3} threads={args.threads:<3} {requests / args.duration:8.1f} req/s   '
+              f'p50 {p50:6.1f} ms   p95 {p95:6.1f} ms   errors {errors}')
+
+
+if __name__ == '__main__':
+    main()
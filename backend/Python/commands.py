@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+from datetime import date, datetime, timedelta, timezone
+
+import click
+from flask.cli import with_appcontext
+from flask import current_app
+from sqlalchemy import delete, select, text
+from extensions import db
+from models import Budget, IdempotencyKey
+from routes.months import parse_month
+from routes.utils.rollover import next_month, rollover_months
+
+# -------------------------------
+# CLI Commands
+# -------------------------------
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """
+    Create missing tables from the models. Run once per deployment instead of
+    on every worker start; Postgres gets its schema from Postgres/init.sql.
+    """
+    db.create_all()
+    click.echo("Database tables created.")
+
+
+@click.command('reconcile-rollups')
+@click.option('--budget-id', default=None, help='Only check this budget.')
+@click.option('--fix', is_flag=True, help='Overwrite mismatching cached totals with the recomputed ones.')
+@with_appcontext
+def reconcile_rollups_command(budget_id, fix):
+    """
+    Verify account/category/month rollups against a full recompute.
+    Wraps the reconcile_rollups() function from Postgres/triggers.sql.
+    Exits with status 1 when mismatches are found and --fix is not set.
+    """
+    mismatches = db.session.execute(
+        text("SELECT kind, id, budget_id, cached, expected FROM reconcile_rollups(CAST(:budget_id AS uuid), :fix)"),
+        {'budget_id': budget_id, 'fix': fix}
+    ).all()
+    db.session.commit()
+
+    for m in mismatches:
+        click.echo(f"{m.kind} {m.id} (budget {m.budget_id}): cached={m.cached} expected={m.expected}")
+    click.echo(f"{len(mismatches)} mismatching rollup(s){' repaired' if fix and mismatches else ''}.")
+
+    if mismatches and not fix:
+        raise SystemExit(1)
+
+
+@click.command('rebuild-daily-balances')
+@click.option('--budget-id', default=None, help='Only rebuild this budget.')
+@with_appcontext
+def rebuild_daily_balances_command(budget_id):
+    """
+    Recompute the account_daily_balances series from transactions.
+    Wraps the rebuild_daily_balances() function from Postgres/daily_balances.sql.
+    """
+    written = db.session.execute(
+        text("SELECT rebuild_daily_balances(CAST(:budget_id AS uuid))"),
+        {'budget_id': budget_id}
+    ).scalar()
+    db.session.commit()
+    click.echo(f"{written} account-day(s) written.")
+
+
+@click.command('rebuild-payee-suggestions')
+@click.option('--budget-id', default=None, help='Only rebuild this budget.')
+@with_appcontext
+def rebuild_payee_suggestions_command(budget_id):
+    """
+    Recompute the payee_suggestions frequency table from transactions.
+    Wraps the rebuild_payee_suggestions() function from Postgres/payee_suggestions.sql.
+    """
+    written = db.session.execute(
+        text("SELECT rebuild_payee_suggestions(CAST(:budget_id AS uuid))"),
+        {'budget_id': budget_id}
+    ).scalar()
+    db.session.commit()
+    click.echo(f"{written} payee suggestion row(s) written.")
+
+
+@click.command('rollover-months')
+@click.option('--budget-id', default=None, help='Only roll over this budget.')
+@click.option('--through', default=None, help='Last month to create, YYYY-MM. Defaults to next month.')
+@with_appcontext
+def rollover_months_command(budget_id, through):
+    """
+    Create the categories of the coming months ahead of time, carrying
+    positive balances forward, one budget per transaction. Idempotent; meant
+    to run from cron before each month starts.
+    """
+    today = date.today()
+    period = parse_month(through) if through else next_month(today.year, today.month)
+    budget_ids = [budget_id] if budget_id else db.session.scalars(select(Budget.id)).all()
+    for key in budget_ids:
+        result = rollover_months(key, period)
+        db.session.commit()
+        click.echo(f"budget {key}: {len(result['months'])} month(s), "
+                   f"{result['created']} category row(s) created, {result['updated']} carryover(s) updated.")
+
+
+@click.command('purge-idempotency-keys')
+@with_appcontext
+def purge_idempotency_keys_command():
+    """
+    Delete the Idempotency-Key records older than IDEMPOTENCY_KEY_TTL.
+    Expired keys are also replaced when reused; this keeps the table small.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=current_app.config['IDEMPOTENCY_KEY_TTL'])
+    deleted = db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)).rowcount
+    db.session.commit()
+    click.echo(f"{deleted} expired idempotency key(s) deleted.")
@@ -1,12 +1,77 @@
 import os
 
+
+def env_flag(name: str, default: str = "false") -> bool:
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
+
+
+def engine_options(database_uri) -> dict:
+    """
+    SQLAlchemy engine options from the environment. SQLite (tests, local runs)
+    keeps its default single-connection pool.
+    """
+    if not database_uri or database_uri.startswith("sqlite"):
+        return {}
+
+    from db_pool import InstrumentedQueuePool
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        # Connections kept open per worker process, and extra ones allowed under load
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+        # Seconds a request waits for a free connection before failing
+        "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+        # Replace connections older than this, before the server or a proxy drops them
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": env_flag("DB_POOL_PRE_PING", "true"),
+    }
+    statement_timeout = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 0))
+    if statement_timeout > 0 and database_uri.startswith("postgresql"):
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
+
+
 class Config:
     # If `SECRET_KEY` is not found in the environment variables, it falls back to the default value `"dev_secret"`
     SECRET_KEY = os.environ.get("FLASK_SECRET_KEY", "dev_secret")
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Comma-separated read replica URLs; GET/HEAD requests read from them round-robin
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",")
+                             if url.strip()]
+    # Replicas lagging more than this are skipped; when none qualifies reads use the primary
+    DB_REPLICA_MAX_LAG_MS = float(os.environ.get("DB_REPLICA_MAX_LAG_MS", 1000))
+    # Seconds between lag checks of a replica, and before a failed replica is tried again
+    DB_REPLICA_CHECK_SECONDS = float(os.environ.get("DB_REPLICA_CHECK_SECONDS", 5))
+    DB_REPLICA_RETRY_SECONDS = float(os.environ.get("DB_REPLICA_RETRY_SECONDS", 30))
+    # After a successful write, the same client reads from the primary for this long
+    DB_READ_YOUR_WRITES_SECONDS = float(os.environ.get("DB_READ_YOUR_WRITES_SECONDS", 5))
     DEBUG = os.environ.get("FLASK_DEBUG", False)
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "jwt_secret")
+    # Per-worker cache of users resolved by token_required (0 disables it)
+    AUTH_USER_CACHE_TTL = int(os.environ.get("AUTH_USER_CACHE_TTL", 60))
+    AUTH_USER_CACHE_SIZE = int(os.environ.get("AUTH_USER_CACHE_SIZE", 4096))
+    # Trust the signed token claims and skip the user lookup entirely.
+    # A deactivated user keeps access until the token expires.
+    AUTH_TRUST_TOKEN_CLAIMS = env_flag("AUTH_TRUST_TOKEN_CLAIMS")
+    # Per-worker cache of the transaction form data (categories, payees, accounts)
+    FORM_DATA_CACHE_TTL = int(os.environ.get("FORM_DATA_CACHE_TTL", 300))
+    FORM_DATA_CACHE_SIZE = int(os.environ.get("FORM_DATA_CACHE_SIZE", 1024))
+    # Per-worker payee autocomplete index (0 searches the database instead)
+    PAYEE_INDEX_CACHE_TTL = int(os.environ.get("PAYEE_INDEX_CACHE_TTL", 300))
+    PAYEE_INDEX_CACHE_SIZE = int(os.environ.get("PAYEE_INDEX_CACHE_SIZE", 256))
+    # Seconds a stored Idempotency-Key response is replayed
+    IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", 86400))
+    # Threads running the Flask (write) endpoints under the ASGI server (asgi.py)
+    ASYNC_WSGI_THREADS = int(os.environ.get("ASYNC_WSGI_THREADS", 10))
+    # Per-endpoint latency/SQL metrics, Server-Timing headers and /metrics
+    PROFILING_ENABLED = env_flag("PROFILING_ENABLED")
+    # Sample request stacks and write the profile of requests slower than this (0 disables it)
+    PROFILE_SLOW_MS = int(os.environ.get("PROFILE_SLOW_MS", 0))
+    PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 5))
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
     SWAGGER = {
         "specs_route": "/api/v1/docs/",
         'title': 'Home budget project API',
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# -------------------------------
+# Connection pool instrumentation
+# -------------------------------
+
+
+class PoolMetrics:
+    """
+    Counters for the connection checkouts of one pool in this worker process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.connects = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record_checkout(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'checkout_wait_ms': {
+                    'avg': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    'max': round(self.wait_max * 1000, 3),
+                },
+            }
+
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool recording how long each checkout waited, checkout timeouts
+    and new connections in its own `metrics`, so the primary's and each
+    replica's pool are counted separately.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep counting where this one left off
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def _create_connection(self):
+        self.metrics.record_connect()
+        return super()._create_connection()
+
+
+def pool_status(pool) -> dict:
+    """
+    Current occupancy of an engine pool plus the recorded checkout metrics.
+    Pools without a size limit (SQLite) only report their class.
+    """
+    status = {'class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+            'in_use': pool.checkedout(),
+            'idle': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update(pool.metrics.snapshot())
+    return status
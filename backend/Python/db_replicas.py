@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+import hashlib
+import itertools
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+
+# -------------------------------
+# Read replica routing
+# -------------------------------
+# GET/HEAD requests read from the replicas in DATABASE_REPLICA_URLS; every
+# other request, every write statement and any request of a client that
+# wrote within DB_READ_YOUR_WRITES_SECONDS stays on the primary.
+
+# Replay lag of a standby in milliseconds, as seen by the standby: 0 when it
+# streams from the primary and has replayed everything it received, 0 on a
+# server that is not in recovery. A standby whose WAL receiver is not
+# streaming cannot tell what it is missing, so its lag is the age of the
+# last replayed transaction, or NULL (unknown, not usable) before the first
+# one. The receiver's status is visible to superusers and pg_read_all_stats
+# members; for other roles the standby always counts as not streaming.
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming')
+             AND pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) * 1000
+    END
+""")
+
+READ_METHODS = ('GET', 'HEAD')
+
+# Header a client sends to read its own writes from another worker
+READ_PRIMARY_HEADER = 'X-Read-Primary'
+
+
+class Replica:
+    """
+    A replica engine with the last measured lag and its failure window.
+    """
+
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.lag_ms = None
+        self.checked_at = 0.0
+        self.failed_until = 0.0
+        self.error = None
+
+    def healthy(self, max_lag_ms: float, now: float) -> bool:
+        return (now >= self.failed_until and self.error is None
+                and self.lag_ms is not None and self.lag_ms <= max_lag_ms)
+
+
+class ReplicaRouter:
+    """
+    Picks a replica engine for a read, round-robin over the replicas whose
+    lag is at most `max_lag_ms`. Lag is measured at most every
+    `check_interval` seconds per replica; a replica that fails the check is
+    skipped for `retry_seconds`. Returns None, meaning the primary, when no
+    replica qualifies.
+    """
+
+    def __init__(self, engines: dict, max_lag_ms: float, check_interval: float, retry_seconds: float):
+        self.replicas = [Replica(name, engine) for name, engine in engines.items()]
+        self.max_lag_ms = max_lag_ms
+        self.check_interval = check_interval
+        self.retry_seconds = retry_seconds
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def check(self, replica: Replica, now: float):
+        try:
+            with replica.engine.connect() as connection:
+                # Only Postgres replicates; other databases (SQLite copies in tests) never lag
+                lag = connection.execute(REPLICA_LAG_SQL).scalar() if connection.dialect.name == 'postgresql' else 0
+        except DBAPIError as e:
+            replica.lag_ms, replica.error = None, str(e.orig).strip()
+            replica.failed_until = now + self.retry_seconds
+        else:
+            replica.lag_ms, replica.error = (None if lag is None else float(lag)), None
+        replica.checked_at = now
+
+    def usable(self, replica: Replica, now: float) -> bool:
+        if now < replica.failed_until:
+            return False
+        if now - replica.checked_at >= self.check_interval:
+            with self._lock:
+                # Another thread may have checked it while this one waited
+                if now - replica.checked_at >= self.check_interval:
+                    self.check(replica, now)
+        return replica.healthy(self.max_lag_ms, now)
+
+    def engine_for_read(self):
+        if not self.replicas:
+            return None
+        now = time.monotonic()
+        start = next(self._next)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if self.usable(replica, now):
+                return replica.engine
+        return None
+
+    def status(self) -> list:
+        from db_pool import pool_status
+
+        now = time.monotonic()
+        return [{
+            'name': replica.name,
+            'lag_ms': replica.lag_ms,
+            'usable': replica.healthy(self.max_lag_ms, now),
+            'error': replica.error,
+            'pool': pool_status(replica.engine.pool),
+        } for replica in self.replicas]
+
+    def dispose(self):
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+
+class RoutingSession(Session):
+    """
+    db.session sending the reads of replica-routed requests to a replica.
+    Flushes, INSERT/UPDATE/DELETE statements and SELECT ... FOR UPDATE
+    always use the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context() and g.get('db_read_replica'):
+            is_write = clause is not None and (getattr(clause, 'is_dml', False)
+                                               or getattr(clause, '_for_update_arg', None) is not None)
+            if not is_write:
+                # One replica per request, so its reads see one consistent replica
+                if 'db_replica_engine' not in g:
+                    g.db_replica_engine = current_app.extensions['db_replicas'].engine_for_read()
+                if g.db_replica_engine is not None:
+                    return g.db_replica_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def commit(self):
+        # While info['defer_commit'] is set (see routes.utils.idempotency) a
+        # commit only flushes and expires, as a commit would; the caller
+        # commits the whole transaction later.
+        if self.info.get('defer_commit'):
+            self.flush()
+            self.expire_all()
+            return
+        super().commit()
+
+
+def use_primary(f):
+    """
+    Keep every query of a view on the primary, for reads that must never go
+    back in time between requests. Goes above token_required.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.db_read_replica = False
+        return f(*args, **kwargs)
+
+    return decorated
+
+
+def client_key() -> str:
+    """
+    The client of the current request, for read-your-writes pinning.
+    """
+    credentials = request.headers.get('Authorization') or request.remote_addr or ''
+    return hashlib.sha1(credentials.encode()).hexdigest()
+
+
+def init_replicas(app):
+    """
+    Create the replica engines of DATABASE_REPLICA_URLS and route the reads
+    of GET/HEAD requests to them.
+    """
+    from config import engine_options
+    from routes.utils.cache import TTLCache
+
+    engines = {
+        f'replica_{number}': create_engine(url, **engine_options(url))
+        for number, url in enumerate(app.config['DATABASE_REPLICA_URLS'])
+    }
+    router = ReplicaRouter(engines,
+                           max_lag_ms=app.config['DB_REPLICA_MAX_LAG_MS'],
+                           check_interval=app.config['DB_REPLICA_CHECK_SECONDS'],
+                           retry_seconds=app.config['DB_REPLICA_RETRY_SECONDS'])
+    app.extensions['db_replicas'] = router
+    # Clients that wrote recently, read from the primary
+    recent_writers = TTLCache(maxsize=65536, ttl=app.config['DB_READ_YOUR_WRITES_SECONDS'])
+
+    @app.before_request
+    def _route_reads():
+        g.db_read_replica = (
+            request.method in READ_METHODS
+            and not request.headers.get(READ_PRIMARY_HEADER)
+            and recent_writers.get(client_key()) is None
+        )
+
+    @app.after_request
+    def _pin_writers(response):
+        if request.method not in READ_METHODS and request.method != 'OPTIONS' and response.status_code < 400:
+            recent_writers.set(client_key(), True)
+        return response
+
+    return router
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Gunicorn settings for production serving:
+
+    gunicorn -c gunicorn.conf.py "app:create_app()"
+
+or, with the async read API (asgi.py) and WEB_WORKER_CLASS=uvicorn_worker.UvicornWorker:
+
+    gunicorn -c gunicorn.conf.py "asgi:create_asgi_app()"
+
+Every worker is a separate process with its own connection pool, so keep
+WEB_WORKERS * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below the Postgres
+max_connections. Per-worker caches (users, form data, payee index) are
+not shared between workers.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("WEB_BIND", "0.0.0.0:9000")
+workers = int(os.environ.get("WEB_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+# More than one thread switches to the threaded worker; the DB pool should
+# then allow at least `threads` connections per worker
+threads = int(os.environ.get("WEB_THREADS", 1))
+worker_class = os.environ.get("WEB_WORKER_CLASS") or ("gthread" if threads > 1 else "sync")
+
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("WEB_KEEPALIVE", 5))
+# Restart workers periodically to bound memory growth of long-lived processes
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("WEB_MAX_REQUESTS_JITTER", 100))
+# Import the app once in the master and fork it; create_app() opens no
+# connections, so forked workers never share a database socket
+preload_app = os.environ.get("WEB_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+accesslog = os.environ.get("WEB_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.environ.get("WEB_LOG_LEVEL", "info")
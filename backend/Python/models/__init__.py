@@ -12,15 +12,16 @@ from typing import List
 from .base import BaseModel
 
 # Domain models in alphabetical order
-from .account import Account, AccountsType
+from .account import Account, AccountsType, AccountDailyBalance
 from .budget import Budget
 from .category import (
     Category,
     CategoryName,
     CategoryGroup,
 )
+from .idempotency import IdempotencyKey
 from .month import Month
-from .payee import Payee
+from .payee import Payee, PayeeSuggestion
 from .transaction import Transaction
 from .user import User
 
@@ -32,6 +33,7 @@ __all__: List[str] = [
     # Account related
     'Account',
     'AccountsType',
+    'AccountDailyBalance',
 
     # Budget
     'Budget',
@@ -42,8 +44,10 @@ __all__: List[str] = [
     'CategoryGroup',
 
     # Other models
+    'IdempotencyKey',
     'Month',
     'Payee',
+    'PayeeSuggestion',
     'Transaction',
     'User',
 ]
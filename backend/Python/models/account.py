@@ -16,6 +16,8 @@ class Account(BaseModel):
     balance = db.Column(db.Numeric(15, 2), nullable=True)
     transfer_payee_id = db.Column(db.String(36), nullable=True)  # Should be a UUID too
     budget_id = db.Column(db.String(36), db.ForeignKey('budgets.id'), nullable=False)
+    # Version of the budget's last change to this row, set by Postgres/change_feed.sql
+    change_version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
 
     accountsType = db.relationship('AccountsType', back_populates='accounts')
     transactions = db.relationship('Transaction', back_populates='account')
@@ -34,4 +36,20 @@ class AccountsType(BaseModel):
     id = db.Column(db.String(36), primary_key=True)
     name = db.Column(db.Text, nullable=False)
 
-    accounts = db.relationship('Account', back_populates='accountsType')
\ No newline at end of file
+    accounts = db.relationship('Account', back_populates='accountsType')
+
+# -------------------------------
+# AccountDailyBalance Model
+# -------------------------------
+
+class AccountDailyBalance(BaseModel):
+    """
+    Net change of an account on one day, maintained by the daily balance
+    triggers (Postgres/daily_balances.sql).
+    """
+    __tablename__ = 'account_daily_balances'
+
+    account_id = db.Column(db.String(36), db.ForeignKey('accounts.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    budget_id = db.Column(db.String(36), db.ForeignKey('budgets.id'), nullable=False)
+    amount = db.Column(db.Numeric(15, 2), nullable=False, default=0)
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 from extensions import db
+from operator import attrgetter, itemgetter
 import uuid
 
 # -------------------------------
@@ -12,15 +13,38 @@ class BaseModel(db.Model):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
+    @classmethod
+    def serializer(cls):
+        """
+        Function converting an instance of this model to a dictionary of its
+        columns. Built once per model: loaded values are read straight from
+        the instance __dict__, skipping the attribute instrumentation;
+        expired or unloaded columns fall back to regular attribute access.
+        """
+        serialize = cls.__dict__.get('_serializer')
+        if serialize is None:
+            names = tuple(c.name for c in cls.__table__.columns)
+            loaded = itemgetter(*names)
+            getter = attrgetter(*names)
+
+            def serialize(instance):
+                try:
+                    return dict(zip(names, loaded(instance.__dict__)))
+                except KeyError:
+                    return dict(zip(names, getter(instance)))
+
+            cls._serializer = serialize
+        return serialize
+
+    @classmethod
+    def serialize_many(cls, instances) -> list:
+        """Convert a list of instances to dictionaries."""
+        serialize = cls.serializer()
+        return [serialize(instance) for instance in instances]
+
     def to_dict(self) -> dict:
         """Convert model instance to dictionary representation."""
-        result = {}
-        for c in self.__table__.columns:
-            try:
-                result[c.name] = getattr(self, c.name)
-            except AttributeError:
-                result[c.name] = None
-        return result
+        return self.serializer()(self)
 
     def __repr__(self):
         values = ", ".join(f"{c.name}={getattr(self, c.name)!r}" for c in self.__table__.columns)
@@ -13,6 +13,9 @@ class Budget(BaseModel):
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.Text, nullable=True)
+    # Counter bumped by every write to the budget's transactions, payees, categories
+    # and accounts (Postgres/change_feed.sql); sync tokens carry it
+    change_version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
 
     accounts = db.relationship('Account', backref='budget')
     categories = db.relationship('Category', backref='budget')
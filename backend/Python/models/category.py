@@ -19,8 +19,12 @@ class Category(BaseModel):
     budget_id = db.Column(db.String(36), db.ForeignKey('budgets.id'), nullable=False)
     budgeted = db.Column(db.Numeric(15, 2), default=0)
     activity = db.Column(db.Numeric(15, 2), default=0)
+    # Positive balance carried forward from the previous month by the rollover
+    carryover = db.Column(db.Numeric(15, 2), default=0)
     balance = db.Column(db.Numeric(15, 2), default=0)
     month_id = db.Column(db.String(36), db.ForeignKey('months.id'), nullable=False)
+    # Version of the budget's last change to this row, set by Postgres/change_feed.sql
+    change_version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
 
     transactions = db.relationship('Transaction', back_populates='category')
     category_group = db.relationship('CategoryGroup', back_populates='categories')
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+from datetime import datetime, timezone
+
+from models.base import BaseModel, db
+
+# -------------------------------
+# IdempotencyKey Model
+# -------------------------------
+
+class IdempotencyKey(BaseModel):
+    """
+    An Idempotency-Key sent with a write request and the response it got.
+    The row is claimed in the same transaction as the write; status_code is
+    NULL until the response is stored.
+    """
+    __tablename__ = 'idempotency_keys'
+
+    user_id = db.Column(db.String(36), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)
+    content_type = db.Column(db.String(100), nullable=True)
+    response_body = db.Column(db.LargeBinary, nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc),
+                           index=True)
@@ -16,6 +16,32 @@ class Payee(BaseModel):
     transfer_account_id = db.Column(db.String(36), db.ForeignKey('accounts.id'), nullable=True)
     deleted = db.Column(db.Boolean, default=False)
     budget_id = db.Column(db.String(36), db.ForeignKey('budgets.id'), nullable=False)
+    # Version of the budget's last change to this row, set by Postgres/change_feed.sql
+    change_version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
 
     transactions = db.relationship('Transaction', back_populates='payee')
-    transfer_account = db.relationship('Account')
\ No newline at end of file
+    transfer_account = db.relationship('Account')
+
+# -------------------------------
+# PayeeSuggestion Model
+# -------------------------------
+
+class PayeeSuggestion(BaseModel):
+    """
+    How often a payee was used with a category name and account, maintained
+    by the payee suggestion triggers (Postgres/payee_suggestions.sql).
+    """
+    __tablename__ = 'payee_suggestions'
+    __table_args__ = (db.UniqueConstraint('payee_id', 'category_name_id', 'account_id', name='payee_suggestions_key'),)
+
+    budget_id = db.Column(db.String(36), db.ForeignKey('budgets.id'), nullable=False)
+    payee_id = db.Column(db.String(36), db.ForeignKey('payees.id'), nullable=False)
+    category_name_id = db.Column(db.String(36), db.ForeignKey('category_names.id'), nullable=True)
+    account_id = db.Column(db.String(36), db.ForeignKey('accounts.id'), nullable=False)
+    uses = db.Column(db.Integer, nullable=False, default=0)
+    amount_total = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    last_date = db.Column(db.Date, nullable=True)
+    last_amount = db.Column(db.Numeric(15, 2), nullable=True)
+
+    # The table has no primary key (uncategorized rows have a NULL category)
+    __mapper_args__ = {'primary_key': [payee_id, category_name_id, account_id]}
@@ -19,6 +19,8 @@ class Transaction(BaseModel):
     memo = db.Column(db.Text, nullable=True)
     deleted = db.Column(db.Boolean, default=False)
     budget_id = db.Column(db.String(36), db.ForeignKey('budgets.id'), nullable=False)
+    # Version of the budget's last change to this row, set by Postgres/change_feed.sql
+    change_version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
 
     category = db.relationship('Category', back_populates='transactions')
     account = db.relationship('Account', back_populates='transactions')
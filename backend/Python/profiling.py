@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from db_pool import pool_status
+from extensions import db
+
+# -------------------------------
+# Request latency and SQL metrics
+# -------------------------------
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestMetrics:
+    """
+    Per-endpoint latency histograms and SQL totals of this worker process.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = defaultdict(lambda: {
+                'count': 0, 'seconds': 0.0, 'buckets': [0] * len(self.buckets),
+                'sql_statements': 0, 'sql_seconds': 0.0,
+            })
+            self.responses = Counter()
+
+    def record(self, endpoint, method, status, seconds, sql_statements, sql_seconds):
+        with self._lock:
+            entry = self.endpoints[(endpoint, method)]
+            entry['count'] += 1
+            entry['seconds'] += seconds
+            slot = bisect_left(self.buckets, seconds)
+            if slot < len(self.buckets):
+                entry['buckets'][slot] += 1
+            entry['sql_statements'] += sql_statements
+            entry['sql_seconds'] += sql_seconds
+            self.responses[(endpoint, method, status)] += 1
+
+    def render(self) -> list:
+        """
+        The metrics in the Prometheus text exposition format, one line per item.
+        """
+        with self._lock:
+            endpoints = sorted((key, dict(entry, buckets=list(entry['buckets'])))
+                               for key, entry in self.endpoints.items())
+            responses = sorted(self.responses.items())
+
+        lines = ['# HELP http_requests_total Responses by endpoint, method and status.',
+                 '# TYPE http_requests_total counter']
+        for (endpoint, method, status), count in responses:
+            lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+        lines += ['# HELP http_request_duration_seconds Request latency by endpoint.',
+                  '# TYPE http_request_duration_seconds histogram']
+        for (endpoint, method), entry in endpoints:
+            labels = f'endpoint="{endpoint}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry['buckets']):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {entry["count"]}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {entry["seconds"]:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {entry["count"]}')
+
+        lines += ['# HELP http_request_sql_statements_total SQL statements executed by requests.',
+                  '# TYPE http_request_sql_statements_total counter']
+        lines += [f'http_request_sql_statements_total{{endpoint="{endpoint}",method="{method}"}} '
+                  f'{entry["sql_statements"]}' for (endpoint, method), entry in endpoints]
+        lines += ['# HELP http_request_sql_seconds_total Time requests spent executing SQL.',
+                  '# TYPE http_request_sql_seconds_total counter']
+        lines += [f'http_request_sql_seconds_total{{endpoint="{endpoint}",method="{method}"}} '
+                  f'{entry["sql_seconds"]:.6f}' for (endpoint, method), entry in endpoints]
+        return lines
+
+
+request_metrics = RequestMetrics()
+
+
+def pool_metric_lines(pool) -> list:
+    """
+    Connection pool gauges and counters from pool_status().
+    """
+    status = pool_status(pool)
+    lines = []
+    for name, kind in (('in_use', 'gauge'), ('idle', 'gauge'), ('overflow', 'gauge'),
+                       ('checkouts', 'counter'), ('timeouts', 'counter'), ('connects', 'counter')):
+        if name in status:
+            metric = f'db_pool_{name}_total' if kind == 'counter' else f'db_pool_{name}'
+            lines += [f'# TYPE {metric} {kind}', f'{metric} {status[name]}']
+    return lines
+
+
+# -------------------------------
+# SQL timing
+# -------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['profile_start'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile' in g:
+        g.profile['sql_statements'] += 1
+        g.profile['sql_seconds'] += time.perf_counter() - conn.info['profile_start']
+
+
+# -------------------------------
+# Slow request sampling profiler
+# -------------------------------
+
+class StackSampler:
+    """
+    Samples the stacks of the threads serving profiled requests every
+    `interval` seconds from one background thread. The samples of a request
+    are returned as collapsed stacks ("outer;inner" -> count), the input
+    format of flamegraph tools.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_running(self):
+        # Threads do not survive a fork, so each gunicorn worker starts its own
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, stacks in self.active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[collapse_stack(frame)] += 1
+
+    def start(self):
+        with self._lock:
+            self._ensure_running()
+            self.active[threading.get_ident()] = Counter()
+
+    def stop(self) -> Counter:
+        with self._lock:
+            return self.active.pop(threading.get_ident(), Counter())
+
+
+def collapse_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def dump_profile(directory, endpoint, seconds, stacks) -> str:
+    """
+    Write the collapsed stacks of a slow request to `directory`. Returns the path.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{datetime.now():%Y%m%dT%H%M%S%f}-{os.getpid()}-{endpoint}'
+                                   f'-{seconds * 1000:.0f}ms.folded')
+    with open(path, 'w') as file:
+        file.writelines(f'{stack} {count}\n' for stack, count in stacks.most_common())
+    return path
+
+
+# -------------------------------
+# Flask integration
+# -------------------------------
+
+def metrics():
+    """
+    Prometheus metrics of the worker serving the request.
+    """
+    lines = request_metrics.render() + pool_metric_lines(db.engine.pool)
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+def init_profiling(app: Flask):
+    """
+    Record the latency and SQL time of every request, add a Server-Timing
+    header and serve /metrics. With PROFILE_SLOW_MS set, requests are also
+    sampled and the stacks of those slower than the threshold are written
+    to PROFILE_DIR.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    slow_seconds = app.config['PROFILE_SLOW_MS'] / 1000
+    sampler = StackSampler(app.config['PROFILE_INTERVAL_MS'] / 1000) if slow_seconds > 0 else None
+
+    @app.before_request
+    def start_profile():
+        g.profile = {'start': time.perf_counter(), 'sql_statements': 0, 'sql_seconds': 0.0}
+        if sampler:
+            sampler.start()
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        seconds = time.perf_counter() - profile['start']
+        stacks = sampler.stop() if sampler else None
+        endpoint = request.endpoint or 'unmatched'
+
+        request_metrics.record(endpoint, request.method, response.status_code, seconds,
+                               profile['sql_statements'], profile['sql_seconds'])
+        response.headers['Server-Timing'] = (
+            f'db;dur={profile["sql_seconds"] * 1000:.2f};desc="{profile["sql_statements"]} statements", '
+            f'app;dur={(seconds - profile["sql_seconds"]) * 1000:.2f}, total;dur={seconds * 1000:.2f}'
+        )
+        if stacks and seconds >= slow_seconds:
+            path = dump_profile(current_app.config['PROFILE_DIR'], endpoint, seconds, stacks)
+            current_app.logger.warning('Slow request %s %s took %.0f ms, profile written to %s',
+                                       request.method, request.path, seconds * 1000, path)
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', metrics, methods=['GET'])
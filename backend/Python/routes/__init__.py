@@ -3,6 +3,10 @@ from . import transactions
 from . import payees
 from . import categories
 from . import budgets
+from . import months
+from . import reports
+from . import balances
+from . import sync
 
 from .users import user_bp
 from .transactions import transaction_bp
@@ -10,6 +14,10 @@ from .categories import category_bp
 from .payees import payee_bp
 from .health import health_bp
 from .budgets import budget_bp
+from .months import month_bp
+from .reports import report_bp
+from .balances import balance_bp
+from .sync import sync_bp
 
 __all__ = [
     'user_bp',
@@ -18,4 +26,8 @@ __all__ = [
     'payee_bp',
     'health_bp',
     'budget_bp',
+    'month_bp',
+    'report_bp',
+    'balance_bp',
+    'sync_bp',
 ]
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+from functools import wraps
+
+from sqlalchemy import select
+from starlette.responses import Response
+from starlette.routing import Route
+
+from models import Budget, User
+from serialization import dumps_bytes, rows_to_dicts
+from .categories import CATEGORY_COLUMNS, category_list
+from .payees import PAYEE_COLUMNS, payee_list
+from .transactions import transaction_page, transaction_page_body
+from .utils.db_utils import AuthUser, claims_user, decode_auth_header, user_cache
+
+# -------------------------------
+# Async read API
+# -------------------------------
+# The list endpoints dashboards load in parallel, served by the ASGI app in
+# asgi.py on an async session. They build the same statements as the Flask
+# views, so both return identical bodies; every other request goes to Flask.
+BUDGET_COLUMNS = tuple(Budget.__table__.columns.keys())
+
+
+def json_response(body, status_code: int = 200) -> Response:
+    return Response(dumps_bytes(body) + b'\n', status_code=status_code, media_type='application/json')
+
+
+async def load_auth_user(session, user_id: str, use_cache: bool):
+    """
+    Async counterpart of db_utils.load_auth_user, sharing its user cache.
+    """
+    if use_cache:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+    row = (await session.execute(
+        select(User.id, User.login, User.name, User.email, User.active).where(User.id == user_id)
+    )).first()
+    if row is None:
+        return None
+    auth_user = AuthUser(str(row.id), row.login, row.name, row.email, row.active)
+    if use_cache:
+        user_cache.set(auth_user.id, auth_user)
+    return auth_user
+
+
+def async_token_required(handler):
+    """
+    token_required for async handlers. The handler is called with the
+    request, the current user and an async session that is closed, and its
+    connection returned to the pool, when the handler returns.
+    """
+    @wraps(handler)
+    async def decorated(request):
+        data, error = decode_auth_header(request.headers.get('Authorization'))
+        if error:
+            return json_response({'message': error}, 401)
+
+        config = request.app.state.config
+        async with request.app.state.sessionmaker() as session:
+            if config.get('AUTH_TRUST_TOKEN_CLAIMS'):
+                current_user = claims_user(data)
+            else:
+                current_user = await load_auth_user(session, data['user_id'],
+                                                    config.get('AUTH_USER_CACHE_TTL', 0) > 0)
+
+            if current_user is None or not current_user.active:
+                return json_response({'message': 'Token is invalid!'}, 401)
+
+            return await handler(request, current_user, session)
+
+    return decorated
+
+
+@async_token_required
+async def get_budgets(request, current_user, session):
+    rows = (await session.execute(select(*Budget.__table__.columns))).all()
+    return json_response(rows_to_dicts(BUDGET_COLUMNS, rows))
+
+
+@async_token_required
+async def get_transactions(request, current_user, session):
+    """
+    Same query params and body as GET /transactions.
+    """
+    try:
+        statement, names, limit = transaction_page(request.path_params['budget_id'], request.query_params)
+    except ValueError as e:
+        return json_response({"status": "error", "message": str(e)}, 400)
+
+    rows = (await session.execute(statement)).all()
+    return json_response(transaction_page_body(rows, names, limit))
+
+
+@async_token_required
+async def get_categories(request, current_user, session):
+    rows = (await session.execute(category_list(request.path_params['budget_id'], request.query_params))).all()
+    return json_response(rows_to_dicts(CATEGORY_COLUMNS, rows))
+
+
+@async_token_required
+async def get_payees(request, current_user, session):
+    rows = (await session.execute(payee_list(request.path_params['budget_id']))).all()
+    return json_response(rows_to_dicts(PAYEE_COLUMNS, rows))
+
+
+def async_read_routes(main_prefix: str) -> list:
+    """
+    Starlette routes of the async read API, at the same URLs as the Flask views.
+    """
+    budget_path = main_prefix + '/budgets/{budget_id:uuid}'
+    return [
+        Route(main_prefix + '/budgets', get_budgets, methods=['GET']),
+        Route(budget_path + '/transactions', get_transactions, methods=['GET']),
+        Route(budget_path + '/categories', get_categories, methods=['GET']),
+        Route(budget_path + '/payees', get_payees, methods=['GET']),
+    ]
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+from datetime import date, timedelta
+from typing import TYPE_CHECKING
+
+from flask import jsonify, request, Blueprint
+from sqlalchemy import Float, cast, func, select
+from .reports import parse_date_range
+from .utils.db_utils import token_required
+from models import AccountDailyBalance
+from extensions import db
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+balance_bp = Blueprint('balances', __name__)
+
+# Downsampling buckets; every point is the balance at the end of its bucket
+INTERVALS = {'day': 'D', 'week': 'W-SUN', 'month': 'ME'}
+MAX_POINTS = 2000
+
+
+def balance_filters(budget_id, account_id) -> list:
+    filters = [AccountDailyBalance.budget_id == budget_id]
+    if account_id:
+        filters.append(AccountDailyBalance.account_id == account_id)
+    return filters
+
+
+def balance_range(budget_id, account_id, date_from, date_to):
+    """
+    First and last day of the series. Open bounds are taken from the daily
+    changes in range (the end defaults to today when there are none).
+    Returns (None, None) when there is nothing to chart.
+    """
+    if date_from and date_to:
+        return date_from, date_to
+    query = select(func.min(AccountDailyBalance.date), func.max(AccountDailyBalance.date)).where(
+        *balance_filters(budget_id, account_id))
+    if date_from:
+        query = query.where(AccountDailyBalance.date >= date_from)
+    if date_to:
+        query = query.where(AccountDailyBalance.date <= date_to)
+    first, last = db.session.execute(query).one()
+    start = date_from or first
+    if start is None:
+        return None, None
+    return start, date_to or last or date.today()
+
+
+def point_count(start: date, end: date, interval: str) -> int:
+    """
+    Number of points balance_series() returns for a range, without building it.
+    """
+    if interval == 'day':
+        return (end - start).days + 1
+    if interval == 'week':
+        # Weekly buckets run Monday to Sunday
+        start_monday = start - timedelta(days=start.weekday())
+        end_monday = end - timedelta(days=end.weekday())
+        return (end_monday - start_monday).days // 7 + 1
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def balance_series(budget_id, account_id, start: date, end: date, interval) -> 'pd.DataFrame':
+    """
+    Balance of each account at the end of every interval from `start` to
+    `end` (inclusive), built from the pre-aggregated daily changes. One
+    column per account.
+    """
+    import pandas as pd
+
+    filters = balance_filters(budget_id, account_id)
+    rows = db.session.execute(
+        select(AccountDailyBalance.account_id, func.sum(cast(AccountDailyBalance.amount, Float)))
+        .where(*filters, AccountDailyBalance.date < start)
+        .group_by(AccountDailyBalance.account_id)
+    ).all()
+    opening = pd.Series({account: float(total) for account, total in rows}, dtype='float64')
+
+    query = (
+        select(AccountDailyBalance.account_id, AccountDailyBalance.date, cast(AccountDailyBalance.amount, Float))
+        .where(*filters, AccountDailyBalance.date.between(start, end))
+    )
+    changes = pd.DataFrame.from_records(db.session.connection().execute(query).fetchall(),
+                                        columns=['account_id', 'date', 'amount'])
+
+    if changes.empty and opening.empty:
+        return pd.DataFrame()
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+
+    daily = (
+        changes.assign(date=pd.to_datetime(changes['date']))
+        .pivot(index='date', columns='account_id', values='amount')
+        .reindex(index=pd.date_range(start, end, freq='D'),
+                 columns=opening.index.union(changes['account_id'].unique()))
+        .fillna(0.0)
+    )
+    balances = daily.cumsum() + opening.reindex(daily.columns, fill_value=0.0)
+
+    series = balances.resample(INTERVALS[interval]).last()
+    # The last bucket may extend past `end`; label it with the last included day
+    series.index = series.index.where(series.index <= end, end)
+    return series
+
+
+# -------------------------------
+# Balances Endpoints
+# -------------------------------
+@balance_bp.route('', methods=['GET'])
+@token_required
+def get_balances(current_user, budget_id):
+    """
+    Account balances and net worth over time.
+    Query params:
+        account_id: only this account
+        date_from, date_to: inclusive date range (YYYY-MM-DD)
+        interval: day, week or month (default month)
+    Returns: points per account and their total, one per interval.
+    """
+    interval = request.args.get('interval', 'month')
+    if interval not in INTERVALS:
+        return jsonify({"status": "error", "message": "'interval' must be one of: day, week, month."}), 400
+    try:
+        date_from, date_to = parse_date_range(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if date_from and date_to and date_from > date_to:
+        return jsonify({"status": "error", "message": "'date_to' must not be before 'date_from'."}), 400
+
+    account_id = request.args.get('account_id')
+    start, end = balance_range(budget_id, account_id, date_from, date_to)
+    if start is None:
+        return jsonify({'interval': interval, 'accounts': [], 'total': []}), 200
+    # Checked before the daily frame is built: its size grows with the range
+    if point_count(start, end, interval) > MAX_POINTS:
+        return jsonify({"status": "error",
+                        "message": f"Range has more than {MAX_POINTS} points, use a coarser interval."}), 400
+
+    series = balance_series(budget_id, account_id, start, end, interval)
+
+    dates = [d.date().isoformat() for d in series.index]
+    accounts = [
+        {'account_id': account, 'points': [{'date': d, 'balance': round(b, 2)} for d, b in zip(dates, series[account])]}
+        for account in series.columns
+    ]
+    total = [{'date': d, 'balance': round(b, 2)} for d, b in zip(dates, series.sum(axis=1))] if accounts else []
+    return jsonify({'interval': interval, 'accounts': accounts, 'total': total}), 200
@@ -13,4 +13,4 @@ budget_bp = Blueprint('budgets', __name__)
 @token_required
 def get_budgets(current_user):
     budgets = Budget.query.all()
-    return jsonify([b.to_dict() for b in budgets]), 200
\ No newline at end of file
+    return jsonify(Budget.serialize_many(budgets)), 200
\ No newline at end of file
@@ -1,32 +1,58 @@
 #!/usr/bin/env python3
 from flask import jsonify, request, Blueprint
 from .utils.db_utils import commit_session, token_required
-from models import Category
+from .utils.idempotency import idempotent
+from models import Category, CategoryName, CategoryGroup
 from extensions import db
+from serialization import rows_to_dicts
+from sqlalchemy import select
 
 category_bp = Blueprint('categories', __name__)
 
+
+CATEGORY_COLUMNS = tuple(Category.__table__.columns.keys()) + ('name', 'category_group_name')
+
+
+def category_list(budget_id, args):
+    """
+    Statement selecting a budget's categories with their category and group
+    names as row tuples, shared with the async read API.
+    """
+    statement = (
+        select(*Category.__table__.columns, CategoryName.name, CategoryGroup.name)
+        .join(CategoryName, CategoryName.id == Category.category_name_id)
+        .outerjoin(CategoryGroup, CategoryGroup.id == Category.category_group_id)
+        .where(Category.budget_id == budget_id)
+    )
+
+    # Get category if it's provided
+    category = args.get("category_name")
+    if category:
+        statement = statement.where(CategoryName.name.ilike(f"%{category}%"))
+
+    month_id = args.get("month_id")
+    if month_id:
+        statement = statement.where(Category.month_id == month_id)
+    return statement
+
+
 # -------------------------------
 # Categories Endpoints
 # -------------------------------
 @category_bp.route('', methods=['GET','POST'])
 @token_required
+@idempotent
 def get_categories(current_user, budget_id):
     """
     Get all categories.
-    GET: Retrieve categories list.
+    GET: Retrieve categories list with their category and group names.
+    Query params:
+        category_name: case-insensitive substring filter on the category name
+        month_id: only categories of this month
     """
     if request.method == 'GET':
-        # Get category if it's provided
-        category = request.args.get("category_name")
-
-        query = Category.query.filter_by(name=category, budget_id=budget_id)
-
-        if category:
-            query =  query.filter(Category.name.ilike(f"%{category}%"))
-
-        category = query.all()
-        return jsonify([c.to_dict() for c in category]), 200
+        rows = db.session.execute(category_list(budget_id, request.args)).all()
+        return jsonify(rows_to_dicts(CATEGORY_COLUMNS, rows)), 200
 
     elif request.method == 'POST':
         if request.is_json:
@@ -46,6 +72,7 @@ def get_categories(current_user, budget_id):
 
 @category_bp.route('/<string:category_id>', methods=['PATCH'])
 @token_required
+@idempotent
 def update_category(current_user, budget_id, category_id):
     """
     PATCH /categories/<category_id>
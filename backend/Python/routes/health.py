@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
-from flask import jsonify, Blueprint
+from flask import jsonify, Blueprint, current_app
+from sqlalchemy import text
 from extensions import db
+from db_pool import pool_status
 
 health_bp = Blueprint('health', __name__)
 # -------------------------------
@@ -12,16 +14,39 @@ def status():
     """
     Endpoint to check API and database status.
     Returns:
-        JSON with status "OK" if API and DB are healthy, otherwise "ERROR"
+        JSON with status "OK" if API and DB are healthy, otherwise "ERROR",
+        the connection pool occupancy of this worker and, when read replicas
+        are configured, their last measured lag and pools.
     """
     db_status = "OK"
     try:
         # A very lightweight query to check database connectivity
-        db.session.execute('SELECT 1')
+        db.session.execute(text('SELECT 1'))
     except Exception as e:
         db_status = f"ERROR: {str(e)}"
 
-    return jsonify({
+    body = {
         "status": "OK",
-        "database": db_status
-    })
\ No newline at end of file
+        "database": db_status,
+        "pool": pool_status(db.engine.pool),
+    }
+    if 'db_replicas' in current_app.extensions:
+        body["replicas"] = current_app.extensions['db_replicas'].status()
+    return jsonify(body)
+
+
+@health_bp.route('/pool', methods=['GET'])
+def pool():
+    """
+    Connection pool metrics of the worker serving the request.
+    Returns:
+        JSON with the pool limits, connections in use, idle and in overflow,
+        and the number of checkouts, timeouts and new connections with the
+        average and maximum time a checkout waited for a connection.
+    """
+    options = current_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    return jsonify({
+        "pool": pool_status(db.engine.pool),
+        "recycle": options.get('pool_recycle'),
+        "pre_ping": options.get('pool_pre_ping', False),
+    })
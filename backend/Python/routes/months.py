@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+import uuid
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from flask import jsonify, request, Blueprint
+from sqlalchemy import and_, case, func, select, tuple_, update
+from sqlalchemy.orm import aliased
+from .utils.db_utils import commit_session, token_required
+from .utils.idempotency import idempotent
+from .utils.rollover import (MAX_ROLLOVER_MONTHS, latest_category_month, month_range, next_month, previous_month,
+                             rollover_months)
+from models import Month, Category, CategoryName, CategoryGroup
+from extensions import db
+
+month_bp = Blueprint('months', __name__)
+
+MAX_SUMMARY_MONTHS = 120
+
+# Presets of the bulk assignment, applied to every category of the month
+ASSIGN_PRESETS = ('copy_last_month', 'cover_overspending')
+
+
+def parse_month(value: str):
+    """
+    Parse a 'YYYY-MM' string into (year, month).
+    Raises ValueError when the format is invalid.
+    """
+    try:
+        year, month = (int(part) for part in value.split('-'))
+    except (AttributeError, ValueError) as e:
+        raise ValueError(f"Invalid month '{value}'. Expected YYYY-MM.") from e
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid month '{value}'. Expected YYYY-MM.")
+    return year, month
+
+
+def month_summaries(budget_id, start, end) -> list:
+    """
+    Build month summaries between two (year, month) bounds, inclusive.
+    Months, categories and their names are read in a single query from the
+    rollup columns maintained by the database triggers.
+    """
+    rows = (
+        db.session.query(
+            Month.id, Month.year, Month.month, Month.budgeted, Month.activity, Month.to_be_budgeted,
+            Category.id.label('category_id'), Category.category_name_id, Category.hidden,
+            Category.budgeted.label('category_budgeted'), Category.activity.label('category_activity'),
+            Category.balance.label('category_balance'),
+            CategoryName.name.label('category_name'),
+            CategoryGroup.id.label('category_group_id'), CategoryGroup.name.label('category_group_name'),
+        )
+        .outerjoin(Category, and_(Category.month_id == Month.id, Category.deleted == False))  # noqa: E712
+        .outerjoin(CategoryName, CategoryName.id == Category.category_name_id)
+        .outerjoin(CategoryGroup, CategoryGroup.id == Category.category_group_id)
+        .filter(
+            Month.budget_id == budget_id,
+            Month.deleted == False,  # noqa: E712
+            tuple_(Month.year, Month.month) >= start,
+            tuple_(Month.year, Month.month) <= end,
+        )
+        .order_by(Month.year, Month.month, CategoryGroup.name, CategoryName.name)
+        .all()
+    )
+
+    months = {}
+    for row in rows:
+        summary = months.get(row.id)
+        if summary is None:
+            summary = months[row.id] = {
+                'id': row.id,
+                'month': f'{row.year:04d}-{row.month:02d}',
+                'budgeted': row.budgeted,
+                'activity': row.activity,
+                'to_be_budgeted': row.to_be_budgeted,
+                'category_groups': {},
+            }
+        if row.category_id is None:
+            continue
+
+        group = summary['category_groups'].get(row.category_group_id)
+        if group is None:
+            group = summary['category_groups'][row.category_group_id] = {
+                'id': row.category_group_id,
+                'name': row.category_group_name,
+                'budgeted': Decimal(0),
+                'activity': Decimal(0),
+                'balance': Decimal(0),
+                'categories': [],
+            }
+        group['budgeted'] += row.category_budgeted or 0
+        group['activity'] += row.category_activity or 0
+        group['balance'] += row.category_balance or 0
+        group['categories'].append({
+            'id': row.category_id,
+            'category_name_id': row.category_name_id,
+            'name': row.category_name,
+            'hidden': row.hidden,
+            'budgeted': row.category_budgeted,
+            'activity': row.category_activity,
+            'balance': row.category_balance,
+        })
+
+    for summary in months.values():
+        summary['category_groups'] = list(summary['category_groups'].values())
+    return list(months.values())
+
+
+def parse_assignments(data) -> dict:
+    """
+    Validate the {category_id: amount} map of a bulk assignment, keyed by
+    canonical id strings.
+    Raises ValueError when it is not an object of numeric amounts.
+    """
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError("'assigned' must be an object mapping category ids to amounts.")
+    assignments = {}
+    for category_id, amount in data.items():
+        try:
+            key = str(uuid.UUID(category_id))
+        except ValueError as e:
+            raise ValueError(f"Invalid category id '{category_id}'.") from e
+        if isinstance(amount, bool):
+            raise ValueError(f"Amount for category '{category_id}' must be a number.")
+        try:
+            assignments[key] = Decimal(str(amount)).quantize(Decimal('0.01'))
+        except (InvalidOperation, ValueError) as e:
+            raise ValueError(f"Amount for category '{category_id}' must be a number.") from e
+    return assignments
+
+
+def assign_month(month, assignments: dict, preset=None) -> int:
+    """
+    Set the budgeted amount of many categories of `month` with a single
+    UPDATE, then refresh the month's budgeted and to_be_budgeted once.
+    `preset` fills every category first; explicit assignments win over it:
+        copy_last_month     budgeted of the same category in the previous month
+        cover_overspending  raise budgeted so that no balance stays negative
+    The balance (carryover + budgeted + activity) is written alongside
+    budgeted so it is also right where the trg_update_category_balance
+    trigger does not exist (SQLite).
+    Returns the number of categories updated. The caller commits.
+    """
+    new_budgeted = Category.budgeted
+    if preset == 'copy_last_month':
+        previous = aliased(Category)
+        previous_id = (
+            select(Month.id)
+            .where(Month.budget_id == month.budget_id,
+                   tuple_(Month.year, Month.month) == previous_month(month.year, month.month))
+            .scalar_subquery()
+        )
+        last_budgeted = (
+            select(previous.budgeted)
+            .where(previous.month_id == previous_id,
+                   previous.category_name_id == Category.category_name_id,
+                   previous.deleted == False)  # noqa: E712
+            .limit(1)
+            .scalar_subquery()
+        )
+        new_budgeted = func.coalesce(last_budgeted, Category.budgeted)
+    elif preset == 'cover_overspending':
+        new_budgeted = case((Category.balance < 0, Category.budgeted - Category.balance), else_=Category.budgeted)
+
+    if assignments:
+        new_budgeted = case(assignments, value=Category.id, else_=new_budgeted)
+
+    criteria = [Category.month_id == month.id, Category.deleted == False]  # noqa: E712
+    if not preset:
+        criteria.append(Category.id.in_(list(assignments)))
+
+    updated = db.session.execute(
+        update(Category)
+        .where(*criteria)
+        .values(budgeted=new_budgeted,
+                balance=new_budgeted + func.coalesce(Category.carryover, 0) + func.coalesce(Category.activity, 0))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    month_budgeted = (
+        select(func.coalesce(func.sum(Category.budgeted), 0))
+        .where(Category.month_id == month.id, Category.deleted == False)  # noqa: E712
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(Month)
+        .where(Month.id == month.id)
+        .values(budgeted=month_budgeted, to_be_budgeted=month_budgeted - Month.activity)
+        .execution_options(synchronize_session=False)
+    )
+    return updated
+
+
+# -------------------------------
+# Months Endpoints
+# -------------------------------
+@month_bp.route('', methods=['GET'])
+@token_required
+def get_months(current_user, budget_id):
+    """
+    Get month summaries for a range of months.
+    Query params:
+        from: first month, YYYY-MM (required)
+        to: last month, YYYY-MM (defaults to `from`)
+    Returns: list of month summaries ordered by month.
+    """
+    if not request.args.get('from'):
+        return jsonify({"status": "error", "message": "'from' is required."}), 400
+    try:
+        start = parse_month(request.args['from'])
+        end = parse_month(request.args.get('to') or request.args['from'])
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    span = (end[0] - start[0]) * 12 + end[1] - start[1] + 1
+    if span < 1:
+        return jsonify({"status": "error", "message": "'to' must not be before 'from'."}), 400
+    if span > MAX_SUMMARY_MONTHS:
+        return jsonify({"status": "error",
+                        "message": f"At most {MAX_SUMMARY_MONTHS} months can be requested at once."}), 400
+
+    return jsonify(month_summaries(budget_id, start, end)), 200
+
+
+@month_bp.route('/rollover', methods=['POST'])
+@token_required
+def rollover(current_user, budget_id):
+    """
+    POST /months/rollover
+    Create the categories of the coming months ahead of time, carrying the
+    positive balances forward. Safe to repeat: existing categories only get
+    their carryover refreshed.
+    JSON body (optional):
+        through: last month to create, YYYY-MM (defaults to next month)
+        from: first month, YYYY-MM (defaults to the month after the latest
+              month that has categories)
+    Returns: {"months": [...], "created": n, "updated": n}
+    """
+    data = request.get_json(silent=True) or {}
+    today = date.today()
+    try:
+        through = parse_month(data['through']) if data.get('through') else next_month(today.year, today.month)
+        start = parse_month(data['from']) if data.get('from') else None
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if start is None:
+        latest = latest_category_month(budget_id, through)
+        if latest is None:
+            return jsonify({'months': [], 'created': 0, 'updated': 0}), 200
+        start = next_month(*latest)
+
+    span = len(month_range(start, through))
+    if span < 1:
+        return jsonify({"status": "error", "message": "'through' must not be before 'from'."}), 400
+    if span > MAX_ROLLOVER_MONTHS:
+        return jsonify({"status": "error",
+                        "message": f"At most {MAX_ROLLOVER_MONTHS} months can be rolled over at once."}), 400
+
+    result = rollover_months(budget_id, through, start)
+    success, error_response, status_code = commit_session()
+    if not success:
+        return error_response, status_code
+    return jsonify(result), 200
+
+
+@month_bp.route('/<string:month>', methods=['GET'])
+@token_required
+def get_month(current_user, budget_id, month):
+    """
+    Get the budget view of one month.
+    GET: category groups with their categories, budgeted, activity and
+    balance, and the month's to_be_budgeted.
+    """
+    try:
+        period = parse_month(month)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    summaries = month_summaries(budget_id, period, period)
+    if not summaries:
+        return jsonify({"status": "error", "message": "Month not found."}), 404
+    return jsonify(summaries[0]), 200
+
+
+@month_bp.route('/<string:month>/categories', methods=['PATCH'])
+@token_required
+@idempotent
+def assign_categories(current_user, budget_id, month):
+    """
+    PATCH /months/<YYYY-MM>/categories
+    Assign many categories of a month in one transaction.
+    JSON body:
+        assigned: { "<category id>": <number>, ... } (optional)
+        preset: "copy_last_month" | "cover_overspending" (optional)
+    At least one of them is required. Returns the month summary.
+    """
+    try:
+        year, month_number = parse_month(month)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "message": "Invalid JSON body."}), 400
+
+    preset = data.get('preset')
+    if preset is not None and preset not in ASSIGN_PRESETS:
+        return jsonify({"status": "error",
+                        "message": f"'preset' must be one of: {', '.join(ASSIGN_PRESETS)}."}), 400
+    try:
+        assignments = parse_assignments(data.get('assigned'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if not assignments and not preset:
+        return jsonify({"status": "error", "message": "'assigned' or 'preset' is required."}), 400
+
+    target = Month.query.filter(
+        Month.budget_id == budget_id,
+        Month.year == year,
+        Month.month == month_number,
+        Month.deleted == False,  # noqa: E712
+    ).first()
+    if not target:
+        return jsonify({"status": "error", "message": "Month not found."}), 404
+
+    if assignments:
+        known = set(map(str, db.session.scalars(
+            select(Category.id).where(Category.month_id == target.id,
+                                      Category.deleted == False,  # noqa: E712
+                                      Category.id.in_(list(assignments)))
+        )))
+        unknown = sorted(set(assignments) - known)
+        if unknown:
+            return jsonify({"status": "error",
+                            "message": f"Categories not found in {month}: {', '.join(unknown)}."}), 404
+
+    assign_month(target, assignments, preset)
+    success, error_response, status_code = commit_session()
+    if not success:
+        return error_response, status_code
+    return jsonify(month_summaries(budget_id, (year, month_number), (year, month_number))[0]), 200
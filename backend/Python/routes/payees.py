@@ -1,27 +1,44 @@
 #!/usr/bin/env python3
-from flask import jsonify, request, Blueprint
+from flask import jsonify, request, Blueprint, current_app
 from .utils.db_utils import commit_session, token_required
+from .utils.idempotency import idempotent
+from .utils.payee_index import get_payee_index, search_payees_sql
+from .utils.suggestions import get_payee_suggestion
 from models import Payee
 from extensions import db
-from sqlalchemy import func
+from serialization import rows_to_dicts
+from sqlalchemy import func, select
 
 
 
 payee_bp = Blueprint('payees', __name__)
+
+MAX_SEARCH_RESULTS = 50
+PAYEE_COLUMNS = tuple(Payee.__table__.columns.keys())
+
+
+def payee_list(budget_id):
+    """
+    Statement selecting a budget's payees as row tuples, shared with the async read API.
+    """
+    return select(*Payee.__table__.columns).where(Payee.budget_id == budget_id)
+
+
 # -------------------------------
 # Payee Endpoints
 # -------------------------------
 
 @payee_bp.route('', methods=['GET', 'POST'])
 @token_required
+@idempotent
 def manage_payees(current_user, budget_id):
     """
     GET: List all payees.
     POST: Add a new payee.
     """
     if request.method == 'GET':
-        payee_data = Payee.query.filter(Payee.budget_id == budget_id).all()
-        return jsonify([p.to_dict() for p in payee_data]), 200
+        rows = db.session.execute(payee_list(budget_id)).all()
+        return jsonify(rows_to_dicts(PAYEE_COLUMNS, rows)), 200
 
     elif request.method == 'POST':
         if request.is_json:
@@ -50,8 +67,47 @@ def manage_payees(current_user, budget_id):
     return jsonify({"status": "error", "message": "Method not allowed."}), 405
 
 
+@payee_bp.route('/search', methods=['GET'])
+@token_required
+def search_payees(current_user, budget_id):
+    """
+    GET: Payee suggestions for autocomplete.
+    Query params:
+        q: typed text; matches name prefixes, word prefixes and substrings
+        limit: maximum number of suggestions (default 10)
+    Returns: payees ranked by match quality, then by recent usage.
+    """
+    query = request.args.get('q', '')
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), MAX_SEARCH_RESULTS))
+    except ValueError:
+        return jsonify({"status": "error", "message": "'limit' must be an integer."}), 400
+
+    if current_app.config['PAYEE_INDEX_CACHE_TTL'] > 0:
+        results = get_payee_index(budget_id).search(query, limit)
+    else:
+        results = search_payees_sql(budget_id, query, limit)
+    return jsonify(results), 200
+
+
+@payee_bp.route('/<string:payee_id>/suggestion', methods=['GET'])
+@token_required
+def payee_suggestion(current_user, budget_id, payee_id):
+    """
+    GET: Suggested values for a new transaction with this payee.
+    Returns: the payee's most used category name and account, the average
+    amount for that category, the latest amount and how many transactions
+    the suggestion is based on. Read from the precomputed payee_suggestions table.
+    """
+    suggestion = get_payee_suggestion(budget_id, payee_id)
+    if suggestion is None:
+        return jsonify({"status": "error", "message": "No suggestion for this payee."}), 404
+    return jsonify(suggestion), 200
+
+
 @payee_bp.route('/<string:payee_id>', methods=['GET', 'PUT', 'PATCH', 'DELETE'])
 @token_required
+@idempotent
 def manage_payee(current_user, budget_id, payee_id):
     """
     Manage a specific payee by ID.
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+from flask import jsonify, request, Blueprint
+from .transactions import parse_date
+from .utils.db_utils import token_required
+from .utils.reports import (GROUP_COLUMNS, load_transactions_frame, month_label, monthly_trends, name_lookup,
+                            opening_balance, spending_by)
+
+report_bp = Blueprint('reports', __name__)
+
+MAX_ROLLING_WINDOW = 24
+
+
+def parse_date_range(args):
+    """
+    Read the optional date_from/date_to query arguments.
+    Raises ValueError on bad input.
+    """
+    date_from = parse_date(args['date_from']) if args.get('date_from') else None
+    date_to = parse_date(args['date_to']) if args.get('date_to') else None
+    return date_from, date_to
+
+
+# -------------------------------
+# Reports Endpoints
+# -------------------------------
+@report_bp.route('/spending', methods=['GET'])
+@token_required
+def get_spending(current_user, budget_id):
+    """
+    Spending report.
+    GET: Total outflow per category, payee, account or month.
+    Query params:
+        group_by: category (default), payee, account or month
+        date_from, date_to: inclusive date range (YYYY-MM-DD)
+    """
+    group_by = request.args.get('group_by', 'category')
+    if group_by != 'month' and group_by not in GROUP_COLUMNS:
+        return jsonify({"status": "error",
+                        "message": "'group_by' must be one of: category, payee, account, month."}), 400
+    try:
+        date_from, date_to = parse_date_range(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    key = 'month' if group_by == 'month' else GROUP_COLUMNS[group_by][0]
+    frame = load_transactions_frame(budget_id, ('amount', key), date_from, date_to)
+    report = spending_by(frame, group_by)
+
+    if group_by == 'month':
+        data = [{'month': month_label(month), 'amount': round(amount, 2), 'count': int(count)}
+                for month, amount, count in report.itertuples()]
+    else:
+        names = name_lookup(group_by, report.index)
+        data = [{'id': item_id if isinstance(item_id, str) else None, 'name': names.get(item_id),
+                 'amount': round(amount, 2), 'count': int(count)}
+                for item_id, amount, count in report.itertuples()]
+    return jsonify({'group_by': group_by, 'data': data}), 200
+
+
+@report_bp.route('/trends', methods=['GET'])
+@token_required
+def get_trends(current_user, budget_id):
+    """
+    Income vs. expense report.
+    GET: Monthly income, expense and net with rolling averages and net worth.
+    Query params:
+        window: months in the rolling averages (default 3)
+        date_from, date_to: inclusive date range (YYYY-MM-DD)
+    """
+    try:
+        window = int(request.args.get('window', 3))
+        date_from, date_to = parse_date_range(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if not 1 <= window <= MAX_ROLLING_WINDOW:
+        return jsonify({"status": "error", "message": f"'window' must be between 1 and {MAX_ROLLING_WINDOW}."}), 400
+
+    opening = opening_balance(budget_id, date_from) if date_from else 0.0
+    frame = load_transactions_frame(budget_id, ('month', 'amount'), date_from, date_to)
+    report = monthly_trends(frame, window, opening)
+
+    data = [{'month': month_label(month), **{column: round(value, 2) for column, value in row.items()}}
+            for month, row in zip(report.index, report.to_dict('records'))]
+    return jsonify({'window': window, 'data': data}), 200
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+import base64
+import json
+
+from flask import jsonify, request, Blueprint
+from sqlalchemy import select
+
+from .categories import CATEGORY_COLUMNS, category_list
+from .payees import PAYEE_COLUMNS, payee_list
+from .transactions import TRANSACTION_COLUMNS
+from .utils.db_utils import token_required
+from db_replicas import use_primary
+from models import Account, Budget, Category, Payee, Transaction
+from extensions import db
+from serialization import rows_to_dicts
+
+sync_bp = Blueprint('sync', __name__)
+
+ACCOUNT_COLUMNS = tuple(c.name for c in Account.__table__.columns)
+
+
+# -------------------------------
+# Sync tokens
+# -------------------------------
+# A sync token is the budget's change_version at the time of a sync, so the
+# next sync returns the rows stamped with a later version.
+
+def encode_sync_token(budget_id, version: int) -> str:
+    raw = json.dumps([str(budget_id), version], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_sync_token(token: str, budget_id) -> int:
+    """
+    Decode a token produced by `encode_sync_token` for this budget.
+    Returns the version. Raises ValueError on malformed input or a token of another budget.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        token_budget_id, version = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid sync token.") from e
+    if token_budget_id != str(budget_id) or not isinstance(version, int) or version < 0:
+        raise ValueError("Invalid sync token.")
+    return version
+
+
+def changed_rows(budget_id, since, upto) -> dict:
+    """
+    Transactions, payees, categories and accounts of a budget changed in
+    (since, upto], including soft-deleted ones. Without `since`, all live rows.
+    """
+    def changes(statement, model):
+        if since is None:
+            return statement.where(model.deleted == False)  # noqa: E712
+        return statement.where(model.change_version > since, model.change_version <= upto)
+
+    statements = {
+        'transactions': (TRANSACTION_COLUMNS, changes(
+            select(*Transaction.__table__.columns).where(Transaction.budget_id == budget_id), Transaction)),
+        'payees': (PAYEE_COLUMNS, changes(payee_list(budget_id), Payee)),
+        'categories': (CATEGORY_COLUMNS, changes(category_list(budget_id, {}), Category)),
+        'accounts': (ACCOUNT_COLUMNS, changes(
+            select(*Account.__table__.columns).where(Account.budget_id == budget_id), Account)),
+    }
+    return {
+        kind: rows_to_dicts(names, db.session.execute(statement).all())
+        for kind, (names, statement) in statements.items()
+    }
+
+
+# -------------------------------
+# Sync Endpoint
+# -------------------------------
+
+@sync_bp.route('', methods=['GET'])
+@use_primary
+@token_required
+def sync(current_user, budget_id):
+    """
+    Change feed for offline clients.
+    Without `since`, returns every live transaction, payee, category and
+    account (`full: true`); with the `sync_token` of the previous response,
+    only the rows written or soft-deleted since, so a refresh after one edit
+    transfers a few rows. Read from the primary: a replica behind the one
+    that issued a token would send the client into a full resync.
+    Query params:
+        since: sync token of the previous sync
+    """
+    version = db.session.scalar(select(Budget.change_version).where(Budget.id == budget_id))
+    if version is None:
+        return jsonify({"status": "error", "message": "Budget not found."}), 404
+
+    since = None
+    token = request.args.get('since')
+    if token:
+        try:
+            since = decode_sync_token(token, budget_id)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        if since > version:
+            # A token from ahead of this database (e.g. restored from a backup): start over
+            since = None
+
+    body = changed_rows(budget_id, since, version)
+    body.update(sync_token=encode_sync_token(budget_id, version), full=since is None)
+    return jsonify(body), 200
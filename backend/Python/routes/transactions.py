@@ -1,12 +1,211 @@
 #!/usr/bin/env python3
-from flask import jsonify, request, Blueprint
-from .utils.db_utils import commit_session, get_payee, get_category_month, get_form_data, token_required
-from models import Transaction
+from flask import jsonify, request, Blueprint, Response, stream_with_context
+from .utils.db_utils import (commit_session, get_payee, get_category_month, get_form_data, token_required,
+                             resolve_payees, resolve_category_months)
+from .utils.idempotency import idempotent
+from .utils.pagination import parse_limit, encode_cursor, decode_cursor
+from .utils.suggestions import predict_categories
+from models import Transaction, Category, CategoryName, Account, Payee
 from extensions import db
+from serialization import dumps_bytes, rows_to_dicts
+from sqlalchemy import tuple_, insert, select
+from sqlalchemy.orm import aliased, joinedload
+from decimal import Decimal, InvalidOperation
 from datetime import datetime, date
+import csv
+import io
+import uuid
 
 
 transaction_bp = Blueprint('transactions', __name__)
+
+EXPORT_BATCH_SIZE = 1000
+TRANSACTION_NAME_OPTIONS = (
+    joinedload(Transaction.account),
+    joinedload(Transaction.payee),
+    joinedload(Transaction.category).joinedload(Category.category_name),
+)
+MAX_IMPORT_ROWS = 10000
+TRANSACTION_COLUMNS = tuple(c.name for c in Transaction.__table__.columns)
+NAME_COLUMNS = ('account_name', 'payee_name', 'category_name')
+# -------------------------------
+# Helper Functions
+# -------------------------------
+
+def parse_date(value: str) -> date:
+    """
+    Parse a YYYY-MM-DD query argument. Raises ValueError on bad input.
+    """
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError as e:
+        raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD.") from e
+
+
+def transaction_filters(budget_id, args) -> list:
+    """
+    WHERE criteria selecting a budget's transactions from request query arguments.
+    Raises ValueError when a filter value is malformed.
+    """
+    criteria = [Transaction.budget_id == budget_id]
+
+    deleted = args.get('deleted', 'false').lower()
+    if deleted == 'false':
+        criteria.append(Transaction.deleted == False)  # noqa: E712
+    elif deleted == 'true':
+        criteria.append(Transaction.deleted == True)  # noqa: E712
+    elif deleted != 'all':
+        raise ValueError("'deleted' must be one of: true, false, all.")
+
+    if args.get('date_from'):
+        criteria.append(Transaction.date >= parse_date(args['date_from']))
+    if args.get('date_to'):
+        criteria.append(Transaction.date <= parse_date(args['date_to']))
+
+    if args.get('account_id'):
+        criteria.append(Transaction.account_id == args['account_id'])
+    if args.get('payee_id'):
+        criteria.append(Transaction.payee_id == args['payee_id'])
+    if args.get('category_id'):
+        criteria.append(Transaction.category_id == args['category_id'])
+    if args.get('category_name_id'):
+        # Categories are stored per month, so match every month of the category
+        criteria.append(Transaction.category_id.in_(
+            select(Category.id).where(
+                Category.budget_id == budget_id,
+                Category.category_name_id == args['category_name_id'],
+            )
+        ))
+
+    return criteria
+
+
+def filter_transactions(budget_id, args):
+    """
+    Build a Transaction query for a budget from request query arguments.
+    Raises ValueError when a filter value is malformed.
+    """
+    return Transaction.query.filter(*transaction_filters(budget_id, args))
+
+
+def transaction_page(budget_id, args):
+    """
+    Statement selecting one page of transactions, newest first, as plain row
+    tuples (no ORM instances, identity map or per-row to_dict). Shared by the
+    Flask view and the async read API.
+    Returns (statement, column names, limit); raises ValueError on bad arguments.
+    """
+    limit = parse_limit(args.get('limit'))
+    criteria = transaction_filters(budget_id, args)
+    cursor = args.get('cursor')
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        criteria.append(tuple_(Transaction.date, Transaction.id) < tuple_(cursor_date, cursor_id))
+
+    columns = [getattr(Transaction, name) for name in TRANSACTION_COLUMNS]
+    names = TRANSACTION_COLUMNS
+    statement = select(*columns)
+    if args.get('expand') == 'names':
+        # Many-to-one outer joins: the names come back in the same SELECT
+        category = aliased(Category)
+        statement = (
+            select(*columns, Account.name, Payee.name, CategoryName.name)
+            .outerjoin(Account, Account.id == Transaction.account_id)
+            .outerjoin(Payee, Payee.id == Transaction.payee_id)
+            .outerjoin(category, category.id == Transaction.category_id)
+            .outerjoin(CategoryName, CategoryName.id == category.category_name_id)
+        )
+        names += NAME_COLUMNS
+
+    # Fetch one extra row to know whether another page exists
+    statement = (
+        statement
+        .where(*criteria)
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+        .limit(limit + 1)
+    )
+    return statement, names, limit
+
+
+def transaction_page_body(rows, names, limit) -> dict:
+    """
+    Response body of a page fetched with transaction_page().
+    """
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].date, rows[-1].id)
+    return {'data': rows_to_dicts(names, rows), 'next_cursor': next_cursor}
+
+
+def parse_import_row(raw) -> dict:
+    """
+    Validate one imported row and normalise its values.
+    Raises ValueError with a message suitable for the per-row error report.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("Row must be an object.")
+
+    for field in ('payee_name', 'category_id', 'memo'):
+        if raw.get(field) is not None and not isinstance(raw[field], str):
+            raise ValueError(f"'{field}' must be a string.")
+
+    payee_name = (raw.get('payee_name') or '').strip()
+    if not payee_name:
+        raise ValueError("Payee name is required.")
+    if not raw.get('account_id'):
+        raise ValueError("'account_id' is required.")
+    try:
+        account_id = uuid.UUID(str(raw['account_id']).strip())
+    except ValueError:
+        raise ValueError("'account_id' must be a UUID.")
+    if not raw.get('date'):
+        raise ValueError("'date' is required.")
+
+    try:
+        amount = Decimal(str(raw.get('amount')).strip())
+    except (InvalidOperation, ValueError):
+        raise ValueError("'amount' must be a number.")
+    if not amount.is_finite():
+        raise ValueError("'amount' must be a number.")
+
+    category_id = (raw.get('category_id') or '').strip() or None
+    if category_id:
+        try:
+            category_id = str(uuid.UUID(category_id))
+        except ValueError:
+            raise ValueError("'category_id' must be a UUID.")
+
+    return {
+        'date': parse_date(str(raw['date']).strip()),
+        'account_id': account_id,
+        'payee_name': payee_name,
+        'category_id': category_id,
+        'amount': amount,
+        'memo': raw.get('memo') or None,
+    }
+
+
+def read_import_rows():
+    """
+    Read import rows from the request: a JSON array, a CSV body or a CSV file upload.
+    Raises ValueError when the payload cannot be read.
+    """
+    if request.is_json:
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of transactions.")
+        return rows
+
+    if 'file' in request.files:
+        text = io.TextIOWrapper(request.files['file'].stream, encoding='utf-8-sig')
+    elif request.mimetype == 'text/csv':
+        text = io.StringIO(request.get_data(as_text=True))
+    else:
+        raise ValueError("Expected a JSON array or a CSV upload.")
+    return list(csv.DictReader(text))
+
+
 # -------------------------------
 # Transaction Endpoints
 # -------------------------------
@@ -39,6 +238,9 @@ def update_transaction(current_user, budget_id, transaction_id):
 
         payee, _ = get_payee(budget_id, payee_name)
         category, _ = get_category_month(budget_id, data['category_id'], datetime.strptime(data['date'], "%Y-%m-%d").date())
+        if category is None:
+            db.session.rollback()
+            return jsonify({"status": "error", "message": "Category not found for the transaction month."}), 400
 
         # Update transaction fields
         transaction.date = data.get('date', transaction.date)
@@ -62,16 +264,86 @@ def update_transaction(current_user, budget_id, transaction_id):
 @token_required
 def get_transactions(current_user, budget_id):
     """
-    Retrieve all transactions.
+    Retrieve a page of transactions, newest first.
+    Query params:
+        limit: page size (default 100, max 1000)
+        cursor: opaque cursor returned as `next_cursor` by the previous page
+        date_from, date_to: inclusive date range (YYYY-MM-DD)
+        account_id, payee_id, category_id, category_name_id: exact-match filters
+        deleted: "false" (default), "true" or "all"
+        expand: "names" adds account_name, payee_name and category_name to each row
     Returns:
-        JSON list of all transactions as dictionaries.
+        JSON with `data` (list of transactions) and `next_cursor` (null on the last page).
     """
-    transactions_data = Transaction.query.filter(Transaction.budget_id == budget_id).all()
-    return jsonify([t.to_dict() for t in transactions_data])
+    try:
+        statement, names, limit = transaction_page(budget_id, request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    rows = db.session.execute(statement).all()
+    return jsonify(transaction_page_body(rows, names, limit))
+
+
+@transaction_bp.route("/export", methods=['GET'])
+@token_required
+def export_transactions(current_user, budget_id):
+    """
+    Stream transactions as NDJSON or CSV.
+    Accepts the same filters as GET /transactions (without pagination).
+    Query params:
+        format: "ndjson" (default) or "csv"
+    Rows are read through a server-side cursor and written as they arrive,
+    so memory use does not grow with the size of the export.
+    """
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({"status": "error", "message": "'format' must be one of: ndjson, csv."}), 400
+
+    try:
+        query = filter_transactions(budget_id, request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    columns = TRANSACTION_COLUMNS
+    rows = (
+        query
+        .with_entities(*[getattr(Transaction, name) for name in columns])
+        .order_by(Transaction.date, Transaction.id)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+
+    def generate_ndjson():
+        for row in rows:
+            yield dumps_bytes(dict(zip(columns, row))) + b'\n'
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for i, row in enumerate(rows, 1):
+            writer.writerow(row)
+            # Flush the buffer every batch instead of every row
+            if i % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    if export_format == 'csv':
+        generator, mimetype = generate_csv(), 'text/csv'
+    else:
+        generator, mimetype = generate_ndjson(), 'application/x-ndjson'
+
+    return Response(
+        stream_with_context(generator),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=transactions.{export_format}'},
+    )
 
 
 @transaction_bp.route("", methods=['POST'])
 @token_required
+@idempotent
 def add_transaction(current_user, budget_id):
     """
     Add a new transaction.
@@ -86,21 +358,24 @@ def add_transaction(current_user, budget_id):
         return jsonify({"status": "error", "message": "Payee name is required."}), 400
 
     payee, _ = get_payee(budget_id, payee_name)
-    category, _ = get_category_month(budget_id, data['category_id'], datetime.strptime(data['date'], "%Y-%m-%d").date())
+    transaction_date = datetime.strptime(data['date'], "%Y-%m-%d").date()
+    category, _ = get_category_month(budget_id, data['category_id'], transaction_date)
+    if category is None:
+        db.session.rollback()
+        return jsonify({"status": "error", "message": "Category not found for the transaction month."}), 400
 
     transaction = Transaction(
-        date=data['date'],
+        date=transaction_date,
         account_id=data['account_id'],
         payee_id=payee.id,
         category_id=category.id,
         amount=data['amount'],
         memo=data.get('memo'),
-        budget_id = budget_id
+        budget_id=str(budget_id)
     )
 
     db.session.add(transaction)
     success, error_response, status_code = commit_session()
-    # print(success, file=sys.stderr)
     if success:
         return jsonify(transaction.to_dict()), 200
     else:
@@ -108,22 +383,129 @@ def add_transaction(current_user, budget_id):
 
 
 
+@transaction_bp.route("/import", methods=['POST'])
+@token_required
+@idempotent
+def import_transactions(current_user, budget_id):
+    """
+    Import many transactions in one database transaction.
+    Accepts a JSON array of TransactionInput objects, or CSV (body or `file` upload)
+    with the same column names. Payees and categories are resolved with a few
+    set-based queries and valid rows are inserted in a single batch.
+    Query params:
+        categorize: 'auto' fills a missing category with the payee's most used one
+    Returns:
+        JSON with the number of imported (and auto-categorized) rows and
+        per-row errors (1-based row numbers).
+    """
+    auto_categorize = request.args.get('categorize') == 'auto'
+    try:
+        raw_rows = read_import_rows()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if len(raw_rows) > MAX_IMPORT_ROWS:
+        return jsonify({"status": "error", "message": f"At most {MAX_IMPORT_ROWS} rows can be imported at once."}), 400
+
+    errors = []
+    rows = []
+    for number, raw in enumerate(raw_rows, 1):
+        try:
+            rows.append((number, parse_import_row(raw)))
+        except ValueError as e:
+            errors.append({'row': number, 'message': str(e)})
+
+    predicted = set()
+    if auto_categorize:
+        categories_by_payee = predict_categories(budget_id, [
+            row['payee_name'] for _, row in rows if not row['category_id']
+        ])
+        for number, row in rows:
+            if not row['category_id'] and row['payee_name'].lower() in categories_by_payee:
+                row['category_id'] = categories_by_payee[row['payee_name'].lower()]
+                predicted.add(number)
+
+    account_ids = {a.id for a in db.session.query(Account.id).filter(
+        Account.budget_id == budget_id,
+        Account.id.in_({row['account_id'] for _, row in rows})
+    )} if rows else set()
+    category_ids = resolve_category_months(budget_id, [
+        (row['category_id'], row['date']) for _, row in rows if row['category_id']
+    ])
+
+    valid_rows = []
+    categorized = 0
+    for number, row in rows:
+        if row['account_id'] not in account_ids:
+            errors.append({'row': number, 'message': "Account not found."})
+            continue
+        category_id = None
+        if row['category_id']:
+            category_id = category_ids.get((row['category_id'], row['date'].year, row['date'].month))
+            if number in predicted:
+                # A suggested category missing that month leaves the row uncategorized
+                categorized += category_id is not None
+            elif category_id is None:
+                errors.append({'row': number, 'message': "Category not found for the transaction month."})
+                continue
+        valid_rows.append(dict(row, category_id=category_id))
+
+    # Only create payees for rows that will actually be imported
+    payee_ids = resolve_payees(budget_id, [row['payee_name'] for row in valid_rows])
+    new_transactions = [{
+        'id': str(uuid.uuid4()),
+        'date': row['date'],
+        'account_id': str(row['account_id']),
+        'payee_id': payee_ids[row['payee_name'].lower()],
+        'category_id': row['category_id'],
+        'amount': row['amount'],
+        'memo': row['memo'],
+        'deleted': False,
+        'budget_id': str(budget_id),
+    } for row in valid_rows]
+
+    errors.sort(key=lambda e: e['row'])
+    if not new_transactions:
+        db.session.rollback()
+        return jsonify({"status": "error", "message": "No valid transactions to import.", "errors": errors}), 400
+
+    db.session.execute(insert(Transaction), new_transactions)
+    success, error_response, status_code = commit_session()
+    if success:
+        result = {"status": "success", "imported": len(new_transactions), "errors": errors}
+        if auto_categorize:
+            result["categorized"] = categorized
+        return jsonify(result), 200
+    else:
+        return error_response, status_code
+
+
 @transaction_bp.route('/form-data')
 @token_required
 def transaction_form_data(current_user, budget_id):
     """
     Get supporting data needed for transaction form.
+    The lists are served from a per-budget cache. The response carries an ETag;
+    send it back in If-None-Match to get 304 Not Modified while nothing changed.
     Returns:
         JSON including categories, payees, accounts, and current date.
     """
-    categories, payees, accounts = get_form_data(budget_id)
+    form_data = get_form_data(budget_id)
     current_date = date.today().isoformat()
-    return jsonify({
-        'categories': categories,
-        'payees': payees,
-        'accounts': accounts,
-        'date': current_date
-    })
+    etag = f'{form_data.digest}-{current_date}'
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify({
+            'categories': form_data.categories,
+            'payees': form_data.payees,
+            'accounts': form_data.accounts,
+            'date': current_date
+        })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @transaction_bp.route('/<string:transaction_id>/form-data')
@@ -134,20 +516,20 @@ def transaction_add_form_data(current_user, budget_id, transaction_id):
     Returns:
         JSON with transaction data plus categories, payees, and accounts.
     """
-    transaction = Transaction.query.get(transaction_id)
+    transaction = db.session.get(Transaction, transaction_id, options=TRANSACTION_NAME_OPTIONS)
     if not transaction:
         return jsonify({"status": "error", "message": "Transaction not found."}), 404
 
-    categories, payees, accounts = get_form_data(budget_id)
+    form_data = get_form_data(budget_id)
 
     return jsonify({
         'date': transaction.date.isoformat() if transaction.date else None,
         'account_id': transaction.account_id,
         'payee_name': transaction.payee.name,
-        'category_id': transaction.category.category_name.id,
+        'category_id': transaction.category.category_name.id if transaction.category else None,
         'memo': transaction.memo,
         'amount': float(transaction.amount),
-        'categories': categories,
-        'payees': payees,
-        'accounts': accounts,
+        'categories': form_data.categories,
+        'payees': form_data.payees,
+        'accounts': form_data.accounts,
     })
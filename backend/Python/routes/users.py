@@ -65,7 +65,8 @@ def login(in_login=None,in_password=None):
         if not user or not check_password_hash(user.password, password):
             return jsonify({'message': 'Invalid login or password'}), 401
 
-        token = jwt.encode({'user_id': str(user.id), 'exp': datetime.now(timezone.utc) + timedelta(hours=1)},
+        token = jwt.encode({'user_id': str(user.id), 'login': user.login, 'name': user.name,
+                            'exp': datetime.now(timezone.utc) + timedelta(hours=1)},
                            Config.SECRET_KEY, algorithm="HS256")
 
         # Return token in JSON, not cookie
@@ -4,13 +4,34 @@ from functools import wraps
 from extensions import db
 from config import Config
 from models import Month, Category, Payee, CategoryName, Account
-from flask import jsonify, request
-from sqlalchemy import func
+from flask import jsonify, request, current_app
+from sqlalchemy import func, insert, tuple_, event
+from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, DataError, OperationalError, ProgrammingError, StatementError, InvalidRequestError, DBAPIError
 from datetime import date
+from collections import defaultdict, namedtuple
+from itertools import chain
+from .cache import TTLCache
+from .rollover import rollover_up_to
+import hashlib
+import json
 import jwt
+import threading
+import uuid
 from models import User
 
+FormData = namedtuple('FormData', ['categories', 'payees', 'accounts', 'digest'])
+
+form_data_cache = TTLCache(maxsize=Config.FORM_DATA_CACHE_SIZE, ttl=Config.FORM_DATA_CACHE_TTL)
+_form_data_versions = defaultdict(int)
+_form_data_epoch = 0
+_form_data_lock = threading.Lock()
+
+# Authenticated user as seen by the routes; a plain snapshot so it can be
+# shared between requests without touching a database session
+AuthUser = namedtuple('AuthUser', ['id', 'login', 'name', 'email', 'active'])
+user_cache = TTLCache(maxsize=Config.AUTH_USER_CACHE_SIZE, ttl=Config.AUTH_USER_CACHE_TTL)
+
 # -------------------------------
 # Helper Functions
 # -------------------------------
@@ -23,63 +44,206 @@ def get_payee(budget_id, payee_name: str):
     ).filter(Payee.budget_id == budget_id).first()
     if existing_payee:
         return existing_payee, False
-    new_payee = Payee(name=payee_name)
+    new_payee = Payee(name=payee_name, budget_id=budget_id)
     db.session.add(new_payee)
     db.session.flush()  # Get ID without committing
     return new_payee, True
 
 def get_category_month(budget_id, category_name_id: str, transaction_date: date):
     """
-    Return an existing Category.
-    """
-    month = (
-        Month.query
-        .filter_by(budget_id=budget_id, month=transaction_date.month, year=transaction_date.year)
-        .first()
-    )
-    if not month:
-        month = Month(
-            month=transaction_date.month,
-            year=transaction_date.year,
-            budgeted=0,
-            activity=0,
-            to_be_budgeted=0,
-            deleted=False,
-            budget_id=budget_id
-        )
-        db.session.add(month)
-        db.session.flush()  # gets month.id
-
-    category = (
-        Category.query
-        .filter_by(
-            budget_id=budget_id,
-            category_name_id=category_name_id,
-            month_id=month.id
+    Return the Category of `category_name_id` in the month of `transaction_date`
+    and whether it had to be created. A month that was not rolled over ahead
+    of time is rolled over here, creating all of its categories at once.
+    Returns (None, True) when the month has no such category: the category
+    does not exist, or the date is before the first month with categories or
+    more than MAX_ROLLOVER_MONTHS after the latest one.
+    """
+    def find():
+        return (
+            Category.query
+            .join(Month, Month.id == Category.month_id)
+            .filter(
+                Category.budget_id == budget_id,
+                Category.category_name_id == category_name_id,
+                Month.budget_id == budget_id,
+                Month.year == transaction_date.year,
+                Month.month == transaction_date.month,
+            )
+            .first()
         )
-        .first()
-    )
 
+    category = find()
     if category:
         return category, False
 
-    return category, True
+    rollover_up_to(budget_id, [(transaction_date.year, transaction_date.month)])
+    return find(), True
+
+
+def resolve_payees(budget_id, payee_names) -> dict:
+    """
+    Resolve many payee names at once, creating the missing ones.
+    Returns a dict mapping lower-cased name -> payee id.
+    """
+    wanted = {}
+    for name in payee_names:
+        wanted.setdefault(name.lower(), name)
+    if not wanted:
+        return {}
+
+    rows = db.session.query(func.lower(Payee.name), Payee.id).filter(
+        Payee.budget_id == budget_id,
+        func.lower(Payee.name).in_(list(wanted))
+    ).all()
+    resolved = {name: payee_id for name, payee_id in rows}
+
+    missing = [
+        {'id': str(uuid.uuid4()), 'name': wanted[key], 'budget_id': str(budget_id), 'deleted': False}
+        for key in wanted if key not in resolved
+    ]
+    if missing:
+        db.session.execute(insert(Payee), missing)
+        mark_form_data_changed(budget_id)
+        resolved.update({p['name'].lower(): p['id'] for p in missing})
+    return resolved
+
+
+def resolve_category_months(budget_id, pairs) -> dict:
+    """
+    Resolve many (category_name_id, date) pairs to Category ids at once.
+    Months up to the latest one (within MAX_ROLLOVER_MONTHS) are rolled over
+    first and missing months are created in bulk, like `get_category_month`
+    does for one. Returns a dict mapping (category_name_id, year, month) -> category id;
+    pairs without a category for that month are left out.
+    """
+    keys = {(category_name_id, d.year, d.month) for category_name_id, d in pairs}
+    if not keys:
+        return {}
+    periods = {(year, month) for _, year, month in keys}
+    rollover_up_to(budget_id, periods)
+
+    months = db.session.query(Month.id, Month.year, Month.month).filter(
+        Month.budget_id == budget_id,
+        tuple_(Month.year, Month.month).in_(list(periods))
+    ).all()
+    month_ids = {(m.year, m.month): m.id for m in months}
 
+    missing = [
+        {'id': str(uuid.uuid4()), 'year': year, 'month': month, 'budgeted': 0, 'activity': 0,
+         'to_be_budgeted': 0, 'deleted': False, 'budget_id': str(budget_id)}
+        for year, month in periods if (year, month) not in month_ids
+    ]
+    if missing:
+        db.session.execute(insert(Month), missing)
+        month_ids.update({(m['year'], m['month']): m['id'] for m in missing})
 
-def get_form_data(budget_id):
+    categories = db.session.query(Category.id, Category.category_name_id, Category.month_id).filter(
+        Category.budget_id == budget_id,
+        Category.category_name_id.in_({category_name_id for category_name_id, _, _ in keys}),
+        Category.month_id.in_(list(month_ids.values()))
+    ).all()
+    periods_by_month_id = {month_id: period for period, month_id in month_ids.items()}
+    return {
+        (c.category_name_id, *periods_by_month_id[c.month_id]): c.id
+        for c in categories
+    }
+
+
+def budget_key(budget_id) -> str:
+    """
+    Normalise a budget id (UUID, hex or dashed string) to one cache key.
+    """
+    try:
+        return str(uuid.UUID(str(budget_id)))
+    except ValueError:
+        return str(budget_id)
+
+
+def mark_form_data_changed(budget_id=None):
+    """
+    Schedule the form data cache of a budget (or of every budget when None)
+    to be invalidated once the current session commits.
+    """
+    key = None if budget_id is None else budget_key(budget_id)
+    db.session.info.setdefault('form_data_budgets', set()).add(key)
+
+
+def bump_form_data_version(budget_id=None):
+    """
+    Invalidate cached form data of one budget, or of all budgets when None.
+    """
+    global _form_data_epoch
+    with _form_data_lock:
+        if budget_id is None:
+            _form_data_epoch += 1
+        else:
+            _form_data_versions[budget_key(budget_id)] += 1
+
+
+def form_data_version(key: str):
+    with _form_data_lock:
+        return _form_data_epoch, _form_data_versions[key]
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_form_data_changes(session, flush_context):
+    changed = session.info.setdefault('form_data_budgets', set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, CategoryName):
+            changed.add(None)
+        elif isinstance(obj, (Payee, Account, Category)) and obj.budget_id is not None:
+            changed.add(budget_key(obj.budget_id))
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_form_data_versions(session):
+    for budget_id in session.info.pop('form_data_budgets', ()):
+        bump_form_data_version(budget_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_form_data_changes(session):
+    session.info.pop('form_data_budgets', None)
+
+
+def get_form_data(budget_id) -> FormData:
     """
     Retrieve form data for transactions: categories, payees, accounts.
+    The lists are cached per budget until a payee, account or category of the
+    budget changes (or FORM_DATA_CACHE_TTL expires, for writes made by other workers).
     """
-    categories = [{'id': c.id, 'name': c.name} for c in CategoryName.query.all()]
-    payees = [{'id': p.id, 'name': p.name} for p in Payee.query.filter_by(
-        budget_id= budget_id,
-        deleted= False
-    ).all()]
-    accounts = [{'id': a.id, 'name': a.name} for a in Account.query.filter_by(
-        budget_id= budget_id,
-        deleted= False
-    ).all()]
-    return categories, payees, accounts
+    key = budget_key(budget_id)
+    # Read the version before the data, so a write committed meanwhile
+    # leaves the cached entry outdated instead of looking current
+    version = form_data_version(key)
+    cached = form_data_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    categories = [{'id': c.id, 'name': c.name} for c in (
+        db.session.query(CategoryName.id, CategoryName.name)
+        .join(Category, Category.category_name_id == CategoryName.id)
+        .filter(Category.budget_id == budget_id)
+        .distinct()
+        .order_by(CategoryName.name)
+    )]
+    payees = [{'id': p.id, 'name': p.name} for p in (
+        db.session.query(Payee.id, Payee.name)
+        .filter_by(budget_id=budget_id, deleted=False)
+        .order_by(Payee.name)
+    )]
+    accounts = [{'id': str(a.id), 'name': a.name} for a in (
+        db.session.query(Account.id, Account.name)
+        .filter_by(budget_id=budget_id, deleted=False)
+        .order_by(Account.name)
+    )]
+
+    digest = hashlib.sha1(
+        json.dumps([categories, payees, accounts], separators=(',', ':')).encode()
+    ).hexdigest()
+    form_data = FormData(categories, payees, accounts, digest)
+    form_data_cache.set(key, (version, form_data))
+    return form_data
 
 
 def commit_session():
@@ -148,23 +312,88 @@ def commit_session():
             "message": "An unexpected error occurred while saving to the database.",
         }), 500
 
+@event.listens_for(Session, 'after_flush')
+def _collect_user_changes(session, flush_context):
+    changed = session.info.setdefault('changed_users', set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(str(obj.id))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_cached_users(session):
+    for user_id in session.info.pop('changed_users', ()):
+        user_cache.pop(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_changes(session):
+    session.info.pop('changed_users', None)
+
+
+def load_auth_user(user_id: str):
+    """
+    Return the AuthUser for a token's user id, or None if the user does not exist.
+    Resolved users are kept in a per-worker TTL/LRU cache, invalidated on user writes.
+    """
+    use_cache = current_app.config.get('AUTH_USER_CACHE_TTL', 0) > 0
+    if use_cache:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+    user = User.query.filter_by(id=user_id).first()
+    if user is None:
+        return None
+    auth_user = AuthUser(str(user.id), user.login, user.name, user.email, user.active)
+    if use_cache:
+        user_cache.set(auth_user.id, auth_user)
+    return auth_user
+
+
+def decode_auth_header(authorization):
+    """
+    Validate a "Bearer <token>" Authorization header.
+    Returns (claims, None) with claims['user_id'] as a string, or (None, error message).
+    """
+    parts = (authorization or '').split()  # Bearer YourTokenHere
+    token = parts[1] if len(parts) == 2 else None
+
+    if not token:
+        return None, 'Token is missing!'
+
+    try:
+        data = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
+        data['user_id'] = str(data['user_id'])
+    except:
+        return None, 'Token is invalid!'
+    return data, None
+
+
+def claims_user(data) -> AuthUser:
+    """
+    AuthUser built from trusted token claims, without a database lookup.
+    """
+    return AuthUser(data['user_id'], data.get('login'), data.get('name'), None, True)
+
+
 # Token decorator for secure routes
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        headers = request.headers
-        bearer = headers.get('Authorization')  # Bearer YourTokenHere
-        token = bearer.split()[1]
+        data, error = decode_auth_header(request.headers.get('Authorization'))
+        if error:
+            return jsonify({'message': error}), 401
 
-        if not token:
-            return jsonify({'message': 'Token is missing!'}), 401
+        if current_app.config.get('AUTH_TRUST_TOKEN_CLAIMS'):
+            # The signature is trusted as-is: no database lookup until the token expires
+            current_user = claims_user(data)
+        else:
+            current_user = load_auth_user(data['user_id'])
 
-        try:
-            data = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
-            current_user = User.query.filter_by(id=data['user_id']).first()
-        except:
+        if current_user is None or not current_user.active:
             return jsonify({'message': 'Token is invalid!'}), 401
 
         return f(current_user, *args, **kwargs)
 
-    return decorated
\ No newline at end of file
+    return decorated
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from flask import Response, current_app, jsonify, make_response, request
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from .db_utils import commit_session
+from models import IdempotencyKey
+
+# -------------------------------
+# Idempotent writes
+# -------------------------------
+# A client retrying a write sends the same Idempotency-Key header; the
+# first request claims the key, does its write and stores its response in
+# one transaction, so a key is either unused or answered, even if the
+# worker dies halfway; retries get the stored response back without
+# touching anything else. Keys are scoped to the user and expire after
+# IDEMPOTENCY_KEY_TTL seconds.
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint() -> str:
+    """
+    Hash of everything that makes up the request, so a key reused for a
+    different request is detected.
+    """
+    digest = hashlib.sha256()
+    for part in (request.method, request.full_path, request.content_type or ''):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def stored_key(user_id: str, key: str):
+    """
+    The current row of a key as plain columns, outside the identity map so
+    repeated reads see other transactions' commits.
+    """
+    return db.session.execute(
+        select(IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.content_type,
+               IdempotencyKey.response_body, IdempotencyKey.created_at)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    ).first()
+
+
+def claim_key(user_id: str, key: str, fingerprint: str, ttl: float):
+    """
+    Claim `key` for this request by inserting its row, uncommitted, into the
+    current transaction. Returns None when claimed, the existing row otherwise.
+    A row only becomes visible together with its response; a concurrent
+    claim of the same key waits for the first transaction on the primary
+    key and then finds the answered row, or claims the key if it rolled back.
+    """
+    existing = stored_key(user_id, key)
+    if existing is not None:
+        created_at = existing.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        if created_at > datetime.now(timezone.utc) - timedelta(seconds=ttl):
+            return existing
+        db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.user_id == user_id,
+                                                        IdempotencyKey.key == key))
+
+    db.session.add(IdempotencyKey(user_id=user_id, key=key, request_hash=fingerprint))
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        existing = stored_key(user_id, key)
+        if existing is None:
+            raise
+        return existing
+    return None
+
+
+def idempotent(f):
+    """
+    Deduplicate retried writes carrying an Idempotency-Key header. Goes
+    below token_required; GET requests and requests without the header are
+    passed through. Only successful (< 400) responses are stored, so a
+    failed request can be retried with the same key.
+    """
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or request.method in ('GET', 'HEAD'):
+            return f(current_user, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"status": "error",
+                            "message": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters."}), 400
+
+        fingerprint = request_fingerprint()
+        existing = claim_key(current_user.id, key, fingerprint, current_app.config['IDEMPOTENCY_KEY_TTL'])
+        if existing is not None:
+            db.session.rollback()
+            if existing.request_hash != fingerprint:
+                return jsonify({"status": "error",
+                                "message": f"{IDEMPOTENCY_HEADER} was already used for a different request."}), 422
+            response = Response(existing.response_body, status=existing.status_code,
+                                content_type=existing.content_type)
+            response.headers[REPLAYED_HEADER] = 'true'
+            return response
+
+        # The handler's commit_session() only flushes; its work is committed
+        # below, together with the response
+        db.session.info['defer_commit'] = True
+        try:
+            response = make_response(f(current_user, *args, **kwargs))
+        except Exception:
+            # Drops the claim together with the failed request's work
+            db.session.rollback()
+            raise
+        finally:
+            db.session.info.pop('defer_commit', None)
+        if response.status_code >= 400:
+            db.session.rollback()
+            return response
+
+        db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == current_user.id, IdempotencyKey.key == key)
+            .values(status_code=response.status_code, content_type=response.content_type,
+                    response_body=response.get_data())
+        )
+        success, error_response, status_code = commit_session()
+        if not success:
+            return error_response, status_code
+        return response
+
+    return decorated
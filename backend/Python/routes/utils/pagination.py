@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+import base64
+import json
+from datetime import date
+
+# -------------------------------
+# Keyset pagination helpers
+# -------------------------------
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def parse_limit(value, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    """
+    Parse the `limit` query argument and clamp it to [1, maximum].
+    Raises ValueError when the value is not an integer.
+    """
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError("'limit' must be an integer.") from e
+    return max(1, min(limit, maximum))
+
+
+def encode_cursor(row_date: date, row_id: str) -> str:
+    """
+    Build an opaque cursor pointing at the (date, id) of the last returned row.
+    """
+    raw = json.dumps([row_date.isoformat(), str(row_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    Decode a cursor produced by `encode_cursor`.
+    Returns (date, id). Raises ValueError on malformed input.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        row_date, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return date.fromisoformat(row_date), str(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor.") from e
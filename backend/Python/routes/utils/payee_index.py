@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+import heapq
+import math
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import and_, func
+
+from config import Config
+from extensions import db
+from models import Payee, Transaction
+from .cache import TTLCache
+from .db_utils import budget_key, form_data_version
+
+# -------------------------------
+# Payee autocomplete
+# -------------------------------
+# Match classes, best first: the name starts with the query, a later word
+# starts with it, or it only occurs inside the name (trigram lookup)
+NAME_PREFIX, WORD_PREFIX, SUBSTRING = range(3)
+
+# Usage weight halves every RECENCY_HALF_LIFE days without a transaction
+RECENCY_HALF_LIFE = 90
+
+payee_index_cache = TTLCache(maxsize=Config.PAYEE_INDEX_CACHE_SIZE, ttl=Config.PAYEE_INDEX_CACHE_TTL)
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class PayeeIndex:
+    """
+    Prefix and trigram index over the payees of one budget. Matches are
+    ranked by match class, then by how often and how recently the payee
+    was used.
+    """
+
+    def __init__(self, payees, today: date = None):
+        """
+        `payees` is an iterable of (id, name, uses, last_used) rows.
+        """
+        today = today or date.today()
+        self.payees = []
+        self.lowered = []
+        self.scores = []
+        self.names = []
+        self.words = []
+        self.grams = defaultdict(set)
+
+        for position, (payee_id, name, uses, last_used) in enumerate(payees):
+            lowered = name.lower()
+            self.payees.append({'id': payee_id, 'name': name})
+            self.lowered.append(lowered)
+            age = (today - last_used).days if last_used else None
+            self.scores.append(0.0 if age is None else math.log1p(uses) * 0.5 ** (max(age, 0) / RECENCY_HALF_LIFE))
+            self.names.append((lowered, position))
+            self.words.extend((word, position) for word in lowered.split()[1:])
+            for gram in trigrams(lowered):
+                self.grams[gram].add(position)
+
+        self.names.sort()
+        self.words.sort()
+
+    def __len__(self):
+        return len(self.payees)
+
+    @staticmethod
+    def _prefixed(entries, query):
+        for i in range(bisect_left(entries, (query,)), len(entries)):
+            key, position = entries[i]
+            if not key.startswith(query):
+                break
+            yield position
+
+    def search(self, query: str, limit: int = 10) -> list:
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        matches = {}
+        for position in self._prefixed(self.names, query):
+            matches[position] = NAME_PREFIX
+        for position in self._prefixed(self.words, query):
+            matches.setdefault(position, WORD_PREFIX)
+        if len(query) >= 3:
+            candidates = set.intersection(*(self.grams.get(g, set()) for g in trigrams(query)))
+            for position in candidates:
+                if position not in matches and query in self.lowered[position]:
+                    matches[position] = SUBSTRING
+
+        best = heapq.nsmallest(limit, matches.items(),
+                               key=lambda m: (m[1], -self.scores[m[0]], self.payees[m[0]]['name']))
+        return [self.payees[position] for position, _ in best]
+
+
+def load_payee_index(budget_id) -> PayeeIndex:
+    """
+    Build the index of a budget's active payees with their usage counts,
+    in one query.
+    """
+    rows = (
+        db.session.query(Payee.id, Payee.name, func.count(Transaction.id), func.max(Transaction.date))
+        .outerjoin(Transaction, and_(Transaction.payee_id == Payee.id, Transaction.deleted == False))  # noqa: E712
+        .filter(Payee.budget_id == budget_id, Payee.deleted == False)  # noqa: E712
+        .group_by(Payee.id, Payee.name)
+        .all()
+    )
+    return PayeeIndex(rows)
+
+
+def get_payee_index(budget_id) -> PayeeIndex:
+    """
+    Cached payee index of a budget. Payee writes invalidate it through the
+    form data version; usage counts are refreshed when PAYEE_INDEX_CACHE_TTL expires.
+    """
+    key = budget_key(budget_id)
+    version = form_data_version(key)
+    cached = payee_index_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    index = load_payee_index(budget_id)
+    payee_index_cache.set(key, (version, index))
+    return index
+
+
+def search_payees_sql(budget_id, query: str, limit: int = 10) -> list:
+    """
+    Substring search in the database, for workers without the in-memory index.
+    On Postgres the pg_trgm index from Postgres/payee_trgm.sql serves the LIKE.
+    """
+    query = query.strip().lower()
+    if not query:
+        return []
+    pattern = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    lowered = func.lower(Payee.name)
+    rows = (
+        db.session.query(Payee.id, Payee.name)
+        .filter_by(budget_id=budget_id, deleted=False)
+        .filter(lowered.like(f'%{pattern}%', escape='\\'))
+        .order_by(lowered.like(f'{pattern}%', escape='\\').desc(), Payee.name)
+        .limit(limit)
+    )
+    return [{'id': p.id, 'name': p.name} for p in rows]
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+import uuid
+
+from sqlalchemy import case, exists, func, insert, literal, select, tuple_, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import String
+
+from extensions import db
+from models import Budget, Category, Month
+
+# -------------------------------
+# Month rollover
+# -------------------------------
+# A month's categories are created from the previous month's, with the
+# positive balances carried forward into `carryover`. Overspending is not
+# carried; it stays in its month until covered.
+
+# Longest span one rollover may create
+MAX_ROLLOVER_MONTHS = 120
+
+
+class new_uuid(FunctionElement):
+    """
+    A fresh random UUID string per row, so INSERT ... SELECT can fill the
+    String(36) primary keys without a Python-side default.
+    """
+    type = String(36)
+    inherit_cache = True
+
+
+@compiles(new_uuid, 'postgresql')
+def _new_uuid_postgresql(element, compiler, **kw):
+    return 'gen_random_uuid()'
+
+
+@compiles(new_uuid)
+def _new_uuid_default(element, compiler, **kw):
+    return ("lower(hex(randomblob(4)) || '-' || hex(randomblob(2)) || '-4' || substr(hex(randomblob(2)), 2) || '-' "
+            "|| substr('89ab', 1 + abs(random()) % 4, 1) || substr(hex(randomblob(2)), 2) || '-' "
+            "|| hex(randomblob(6)))")
+
+
+def previous_month(year: int, month: int):
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def next_month(year: int, month: int):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def month_range(start, end) -> list:
+    """
+    (year, month) pairs from `start` to `end`, inclusive.
+    """
+    periods = []
+    while start <= end:
+        periods.append(start)
+        start = next_month(*start)
+    return periods
+
+
+def latest_category_month(budget_id, before):
+    """
+    The latest (year, month) before `before` that has categories, or None.
+    """
+    row = db.session.execute(
+        select(Month.year, Month.month)
+        .where(Month.budget_id == budget_id,
+               Month.deleted == False,  # noqa: E712
+               tuple_(Month.year, Month.month) < before,
+               exists().where(Category.month_id == Month.id))
+        .order_by(Month.year.desc(), Month.month.desc())
+        .limit(1)
+    ).first()
+    return (row.year, row.month) if row else None
+
+
+def ensure_months(budget_key, periods, lookup=()) -> dict:
+    """
+    Month ids of `periods`, inserting the missing month rows in one statement.
+    Months in `lookup` are only read. Returns a dict mapping (year, month) -> month id.
+    """
+    rows = db.session.execute(
+        select(Month.id, Month.year, Month.month)
+        .where(Month.budget_id == budget_key, tuple_(Month.year, Month.month).in_(list(lookup) + periods))
+    ).all()
+    month_ids = {(m.year, m.month): m.id for m in rows}
+
+    missing = [
+        {'id': str(uuid.uuid4()), 'year': year, 'month': month, 'budgeted': 0, 'activity': 0,
+         'to_be_budgeted': 0, 'deleted': False, 'budget_id': budget_key}
+        for year, month in periods if (year, month) not in month_ids
+    ]
+    if missing:
+        db.session.execute(insert(Month), missing)
+        month_ids.update({(m['year'], m['month']): m['id'] for m in missing})
+    return month_ids
+
+
+def roll_month(source_month_id, target_month_id) -> tuple:
+    """
+    Roll the categories of one month into the next: create the target's
+    missing categories with a single INSERT ... SELECT, then bring the
+    carryover of the existing ones in line with the source balances.
+    Returns (categories created, categories updated).
+    """
+    source = aliased(Category)
+    carry = case((source.balance > 0, source.balance), else_=0)
+    already_rolled = exists().where(Category.month_id == target_month_id,
+                                    Category.category_name_id == source.category_name_id)
+    created = db.session.execute(
+        insert(Category).from_select(
+            ['id', 'category_name_id', 'category_group_id', 'hidden', 'deleted', 'budget_id',
+             'budgeted', 'activity', 'carryover', 'balance', 'month_id'],
+            select(new_uuid(), source.category_name_id, source.category_group_id, source.hidden, literal(False),
+                   source.budget_id, literal(0), literal(0), carry, carry,
+                   literal(target_month_id, Category.month_id.type))
+            .where(source.month_id == source_month_id,
+                   source.deleted == False,  # noqa: E712
+                   ~already_rolled)
+        )
+    ).rowcount
+
+    source_carry = (
+        select(carry)
+        .where(source.month_id == source_month_id,
+               source.category_name_id == Category.category_name_id,
+               source.deleted == False)  # noqa: E712
+        .limit(1)
+        .scalar_subquery()
+    )
+    new_carryover = func.coalesce(source_carry, 0)
+    updated = db.session.execute(
+        update(Category)
+        .where(Category.month_id == target_month_id, Category.carryover != new_carryover)
+        .values(carryover=new_carryover,
+                balance=new_carryover + func.coalesce(Category.budgeted, 0) + func.coalesce(Category.activity, 0))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return created, updated
+
+
+def rollover_months(budget_id, through, start=None) -> dict:
+    """
+    Create the categories of every month from `start` to `through` (inclusive,
+    (year, month) pairs) from the month before it, carrying balances forward.
+    `start` defaults to the month after the latest earlier month with
+    categories, so one call backfills any gap. Idempotent: months that were
+    already rolled over only get their carryover refreshed. The budget row is
+    locked until the caller commits, so concurrent rollovers of a budget (user
+    requests, the rollover-months command) run one after the other instead of
+    both inserting the same months and categories.
+    Returns {'months': [...], 'created': n, 'updated': n}.
+    """
+    summary = {'months': [], 'created': 0, 'updated': 0}
+    if start is None:
+        latest = latest_category_month(budget_id, through)
+        if latest is None:
+            return summary
+        start = next_month(*latest)
+    periods = month_range(start, through)
+    if not periods:
+        return summary
+
+    # The stored form of the budget id, for the inserted month rows. Months and
+    # categories are read after the lock, so a rollover that held it is seen.
+    budget_key = db.session.scalar(select(Budget.id).where(Budget.id == budget_id).with_for_update())
+    if budget_key is None:
+        return summary
+    month_ids = ensure_months(budget_key, periods, lookup=[previous_month(*start)])
+
+    for period in periods:
+        source_month_id = month_ids.get(previous_month(*period))
+        created, updated = roll_month(source_month_id, month_ids[period]) if source_month_id else (0, 0)
+        summary['months'].append(f'{period[0]:04d}-{period[1]:02d}')
+        summary['created'] += created
+        summary['updated'] += updated
+    return summary
+
+
+def rollover_up_to(budget_id, periods) -> dict:
+    """
+    Roll over through the latest of `periods` (year, month) pairs that is at
+    most MAX_ROLLOVER_MONTHS after the budget's latest month with categories.
+    Later periods are not rolled over, so one mistyped far-future date cannot
+    create thousands of months; the caller creates just their month rows.
+    The caller commits. Returns the summary of rollover_months().
+    """
+    latest = latest_category_month(budget_id, max(periods))
+    if latest is None:
+        return {'months': [], 'created': 0, 'updated': 0}
+    limit = latest[0] * 12 + latest[1] + MAX_ROLLOVER_MONTHS
+    within = [period for period in periods if period[0] * 12 + period[1] <= limit]
+    if not within:
+        return {'months': [], 'created': 0, 'updated': 0}
+    return rollover_months(budget_id, max(within), start=next_month(*latest))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+from collections import Counter, defaultdict
+from datetime import date
+
+from sqlalchemy import func
+
+from extensions import db
+from models import CategoryName, Payee, PayeeSuggestion
+
+# -------------------------------
+# Payee suggestions
+# -------------------------------
+
+
+def summarize_suggestions(rows):
+    """
+    Collapse the frequency rows of one payee into a suggestion: the most used
+    category name and account, the average amount of the chosen category and
+    the latest amount. Returns None when there is no usage.
+    """
+    rows = [r for r in rows if r.uses > 0]
+    if not rows:
+        return None
+
+    by_category = Counter()
+    by_account = Counter()
+    for row in rows:
+        by_category[row.category_name_id] += row.uses
+        by_account[row.account_id] += row.uses
+    total = sum(by_category.values())
+
+    # Prefer a real category over "uncategorized" on equal usage
+    category_name_id = max(by_category, key=lambda c: (by_category[c], c is not None))
+    account_id = max(by_account, key=by_account.get)
+    chosen = [r for r in rows if r.category_name_id == category_name_id]
+    latest = max(rows, key=lambda r: r.last_date or date.min)
+
+    return {
+        'category_name_id': category_name_id,
+        'account_id': account_id,
+        'amount': round(sum(r.amount_total for r in chosen) / sum(r.uses for r in chosen), 2),
+        'last_amount': latest.last_amount,
+        'uses': total,
+        'confidence': round(by_category[category_name_id] / total, 2),
+    }
+
+
+def get_payee_suggestion(budget_id, payee_id):
+    """
+    Suggested category, account and amount for one payee, or None.
+    """
+    rows = (
+        db.session.query(PayeeSuggestion)
+        .filter(PayeeSuggestion.budget_id == budget_id, PayeeSuggestion.payee_id == payee_id)
+        .all()
+    )
+    suggestion = summarize_suggestions(rows)
+    if suggestion is None:
+        return None
+
+    category_name = None
+    if suggestion['category_name_id'] is not None:
+        category_name = db.session.query(CategoryName.name).filter(
+            CategoryName.id == suggestion['category_name_id']
+        ).scalar()
+    return dict(suggestion, payee_id=payee_id, category_name=category_name)
+
+
+def predict_categories(budget_id, payee_names) -> dict:
+    """
+    Most used category name per payee name, for many payees in one query.
+    Returns {lower payee name: category_name_id}; payees without categorized
+    history are left out.
+    """
+    names = {name.lower() for name in payee_names}
+    if not names:
+        return {}
+
+    rows = (
+        db.session.query(func.lower(Payee.name).label('payee_name'), PayeeSuggestion.category_name_id,
+                         func.sum(PayeeSuggestion.uses).label('uses'))
+        .join(Payee, Payee.id == PayeeSuggestion.payee_id)
+        .filter(PayeeSuggestion.budget_id == budget_id,
+                PayeeSuggestion.category_name_id.isnot(None),
+                PayeeSuggestion.uses > 0,
+                func.lower(Payee.name).in_(names))
+        .group_by(func.lower(Payee.name), PayeeSuggestion.category_name_id)
+    )
+
+    best = defaultdict(lambda: (0, None))
+    for row in rows:
+        if row.uses > best[row.payee_name][0]:
+            best[row.payee_name] = (row.uses, row.category_name_id)
+    return {name: category_name_id for name, (_, category_name_id) in best.items()}
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+import json
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+# -------------------------------
+# JSON encoding
+# -------------------------------
+# Wire format of the non-JSON types returned by the models:
+#   Decimal (amounts)      -> string, exact ("-50.00")
+#   date / datetime        -> ISO 8601 ("2025-01-31", "2025-01-31T12:00:00")
+#   UUID                   -> canonical string
+#   numpy scalars (reports) -> number
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+
+def encode_default(value):
+    """
+    Encoder hook for the values orjson does not handle natively.
+    """
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj, indent: bool = False) -> bytes:
+    """
+    Encode `obj` as compact UTF-8 JSON.
+    """
+    if orjson:
+        return orjson.dumps(obj, default=encode_default,
+                            option=ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+    return json.dumps(obj, default=_stdlib_default, separators=(',', ':'),
+                      indent=2 if indent else None).encode()
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson, used by jsonify() and
+    request.get_json(). The response body is written as bytes without the
+    intermediate str of the default provider.
+    """
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if orjson else json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj, indent=self._app.debug) + b'\n', mimetype=self.mimetype)
+
+
+# -------------------------------
+# Row serialization
+# -------------------------------
+
+def rows_to_dicts(names, rows) -> list:
+    """
+    Dictionaries from plain result tuples (Query.with_entities / Core
+    selects), skipping ORM instances and the identity map.
+    """
+    return [dict(zip(names, row)) for row in rows]
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import os
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+from sqlalchemy import event
+
+# The application reads its configuration on import
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Budget, User  # noqa: E402
+
+flask_app = create_app()
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    new_user = User(login='tester', password='x', email='tester@example.com', name='Tester', active=True)
+    db.session.add(new_user)
+    db.session.commit()
+    return new_user
+
+
+@pytest.fixture
+def auth_headers(user):
+    token = jwt.encode({'user_id': str(user.id), 'exp': datetime.now(timezone.utc) + timedelta(hours=1)},
+                       Config.SECRET_KEY, algorithm="HS256")
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def budget_id(app):
+    """
+    UUID of a new budget, as received by the routes from the URL converter.
+    SQLite stores UUID parameters as 32-character hex, so string id columns
+    referring to the budget are filled with `.hex` to compare equal.
+    """
+    new_id = uuid.uuid4()
+    db.session.add(Budget(id=new_id.hex, name='Test budget'))
+    db.session.commit()
+    return new_id
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    Context manager collecting the SQL statements executed inside it.
+    """
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    return counter
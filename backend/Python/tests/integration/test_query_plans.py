@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Query plan regression suite for the hot lookups.
+
+Creates a throw-away database on the server given by TEST_DATABASE_URL,
+applies Postgres/init.sql, triggers.sql and indexes.sql, seeds a large
+synthetic dataset and asserts via EXPLAIN that the lookups used by the
+API are answered by index scans, not sequential scans.
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost/postgres pytest tests/integration
+"""
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+
+psycopg2 = pytest.importorskip('psycopg2')
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+POSTGRES_DIR = Path(__file__).resolve().parents[3] / 'Postgres'
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason='TEST_DATABASE_URL is not set')
+
+BUDGET_ID = '00000000-0000-0000-0000-000000000001'
+
+# Rollup triggers are not under test here; skip them to keep seeding fast
+SEED = """
+SET session_replication_role = replica;
+
+INSERT INTO budgets (id, name)
+SELECT ('00000000-0000-0000-0000-' || lpad(b::text, 12, '0'))::uuid, 'budget ' || b
+FROM generate_series(1, 20) b;
+
+INSERT INTO category_groups (name, budget_id)
+SELECT 'group ' || b.id, b.id FROM budgets b;
+
+INSERT INTO category_names (name)
+SELECT 'category ' || i FROM generate_series(1, 30) i;
+
+INSERT INTO accounts (name, budget_id, balance)
+SELECT 'account ' || b.id || ' ' || i, b.id, 0
+FROM budgets b, generate_series(1, 5) i;
+
+INSERT INTO months (month, year, budget_id)
+SELECT (m % 12) + 1, 2020 + m / 12, b.id
+FROM budgets b, generate_series(0, 59) m;
+
+INSERT INTO categories (category_name_id, category_group_id, budget_id, month_id)
+SELECT cn.id, cg.id, m.budget_id, m.id
+FROM months m
+JOIN category_groups cg ON cg.budget_id = m.budget_id
+CROSS JOIN category_names cn;
+
+INSERT INTO payees (name, budget_id)
+SELECT 'payee ' || b.id || ' ' || i, b.id
+FROM budgets b, generate_series(1, 500) i;
+
+INSERT INTO transactions (date, account_id, payee_id, amount, budget_id, deleted)
+SELECT date '2020-01-01' + (g % 1800), a.id, p.id, (g % 200) - 100, b.id, g % 50 = 0
+FROM budgets b
+CROSS JOIN LATERAL (SELECT id FROM accounts WHERE budget_id = b.id LIMIT 1) a
+CROSS JOIN LATERAL (SELECT id FROM payees WHERE budget_id = b.id LIMIT 1) p
+CROSS JOIN generate_series(1, 10000) g;
+
+SET session_replication_role = DEFAULT;
+ANALYZE;
+"""
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+@pytest.fixture(scope='module')
+def cursor():
+    database = f'budget_plan_tests_{uuid.uuid4().hex[:8]}'
+    admin = psycopg2.connect(TEST_DATABASE_URL)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'CREATE DATABASE {database}')
+
+    dsn = psycopg2.extensions.make_dsn(TEST_DATABASE_URL, dbname=database)
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for name in ('init.sql', 'triggers.sql'):
+                cur.execute((POSTGRES_DIR / name).read_text())
+            cur.execute(SEED)
+            # CREATE INDEX CONCURRENTLY must run one statement at a time
+            for statement in (POSTGRES_DIR / 'indexes.sql').read_text().split(';'):
+                if statement.strip() and not all(line.startswith('--') for line in statement.strip().splitlines()):
+                    cur.execute(statement)
+            yield cur
+    finally:
+        conn.close()
+        with admin.cursor() as cur:
+            cur.execute(f'DROP DATABASE IF EXISTS {database}')
+        admin.close()
+
+
+def explain(cursor, sql, params=None):
+    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+    return list(plan_nodes(cursor.fetchone()[0][0]['Plan']))
+
+
+def assert_index_scan(nodes, table, index):
+    seq_scans = [n for n in nodes if n['Node Type'] == 'Seq Scan' and n.get('Relation Name') == table]
+    assert not seq_scans, f'sequential scan on {table}'
+    used = {n.get('Index Name') for n in nodes}
+    assert index in used, f'{index} not used, plan used {sorted(filter(None, used))}'
+
+
+@pytest.fixture(scope='module')
+def ids(cursor):
+    cursor.execute("""
+        SELECT m.id, c.category_name_id, c.id
+        FROM months m JOIN categories c ON c.month_id = m.id
+        WHERE m.budget_id = %s AND m.year = 2022 AND m.month = 6
+        LIMIT 1
+    """, (BUDGET_ID,))
+    month_id, category_name_id, category_id = cursor.fetchone()
+    cursor.execute('SELECT id FROM accounts WHERE budget_id = %s LIMIT 1', (BUDGET_ID,))
+    account_id = cursor.fetchone()[0]
+    return {'month_id': month_id, 'category_name_id': category_name_id,
+            'category_id': category_id, 'account_id': account_id}
+
+
+def test_transaction_list_first_page(cursor):
+    nodes = explain(cursor, """
+        SELECT * FROM transactions
+        WHERE budget_id = %s AND deleted = false
+        ORDER BY date DESC, id DESC LIMIT 101
+    """, (BUDGET_ID,))
+    assert_index_scan(nodes, 'transactions', 'ix_transactions_budget_date_id')
+    assert not any(n['Node Type'] == 'Sort' for n in nodes)
+
+
+def test_transaction_list_keyset_page(cursor):
+    nodes = explain(cursor, """
+        SELECT * FROM transactions
+        WHERE budget_id = %s AND deleted = false
+          AND (date, id) < ('2021-03-01', '00000000-0000-0000-0000-000000000000')
+        ORDER BY date DESC, id DESC LIMIT 101
+    """, (BUDGET_ID,))
+    assert_index_scan(nodes, 'transactions', 'ix_transactions_budget_date_id')
+    assert not any(n['Node Type'] == 'Sort' for n in nodes)
+
+
+def test_transactions_by_account(cursor, ids):
+    nodes = explain(cursor, """
+        SELECT * FROM transactions
+        WHERE account_id = %s AND deleted = false AND date >= '2024-01-01'
+    """, (ids['account_id'],))
+    assert_index_scan(nodes, 'transactions', 'ix_transactions_account_date')
+
+
+def test_get_category_month_month_lookup(cursor):
+    nodes = explain(cursor, """
+        SELECT * FROM months
+        WHERE budget_id = %s AND month = 6 AND year = 2022
+        LIMIT 1
+    """, (BUDGET_ID,))
+    assert_index_scan(nodes, 'months', 'ix_months_budget_year_month')
+
+
+def test_get_category_month_category_lookup(cursor, ids):
+    nodes = explain(cursor, """
+        SELECT * FROM categories
+        WHERE budget_id = %s AND category_name_id = %s AND month_id = %s
+        LIMIT 1
+    """, (BUDGET_ID, ids['category_name_id'], ids['month_id']))
+    assert_index_scan(nodes, 'categories', 'ix_categories_budget_name_month')
+
+
+def test_get_payee_lookup(cursor):
+    nodes = explain(cursor, """
+        SELECT * FROM payees
+        WHERE lower(name) = lower(%s) AND budget_id = %s
+        LIMIT 1
+    """, ('Payee 1', BUDGET_ID))
+    assert_index_scan(nodes, 'payees', 'ix_payees_budget_lower_name')
+
+
+def test_form_data_payees(cursor):
+    nodes = explain(cursor, 'SELECT id, name FROM payees WHERE budget_id = %s AND deleted = false', (BUDGET_ID,))
+    assert_index_scan(nodes, 'payees', 'ix_payees_budget_active')
@@ -1 +1,910 @@
+#!/usr/bin/env python3
+import base64
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
 
+import jwt
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as SATimeoutError
+from sqlalchemy.orm import Query
+
+from app import create_app
+from config import Config
+from db_pool import InstrumentedQueuePool, pool_status
+from extensions import db
+from models import (Account, AccountDailyBalance, Budget, Category, CategoryGroup, CategoryName, IdempotencyKey,
+                    Month, Payee, PayeeSuggestion, Transaction, User)
+from profiling import StackSampler, dump_profile, request_metrics
+from routes.balances import INTERVALS, point_count
+from routes import transactions
+from routes.sync import encode_sync_token
+from routes.transactions import TRANSACTION_COLUMNS
+from routes.utils import idempotency
+from routes.utils.pagination import decode_cursor, encode_cursor
+from routes.utils.payee_index import PayeeIndex
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def add_transactions(budget_id, count):
+    """
+    Add `count` transactions, each with its own account, payee and category,
+    so lazy loading would cost extra queries per row.
+    """
+    month = Month(month=1, year=2025, budget_id=budget_id.hex)
+    group = CategoryGroup(name=f'Group {uuid.uuid4().hex}', budget_id=budget_id.hex)
+    db.session.add_all([month, group])
+    db.session.flush()
+
+    for i in range(count):
+        account = Account(id=uuid.uuid4(), name=f'Account {uuid.uuid4().hex}', budget_id=budget_id.hex)
+        payee = Payee(name=f'Payee {uuid.uuid4().hex}', budget_id=budget_id.hex)
+        category_name = CategoryName(name=f'Category {uuid.uuid4().hex}')
+        db.session.add_all([account, payee, category_name])
+        db.session.flush()
+        category = Category(category_name_id=category_name.id, category_group_id=group.id,
+                            budget_id=budget_id.hex, month_id=month.id)
+        db.session.add(category)
+        db.session.flush()
+        db.session.add(Transaction(date=date(2025, 1, 1 + i % 28), account_id=account.id.hex, payee_id=payee.id,
+                                   category_id=category.id, amount=-10, budget_id=budget_id.hex))
+    db.session.commit()
+    db.session.expunge_all()
+
+
+# -------------------------------
+# N+1 query regressions
+# -------------------------------
+
+@pytest.mark.parametrize('path, params', [
+    ('/transactions', {'expand': 'names'}),
+    ('/categories', {}),
+])
+def test_list_query_count_does_not_grow_with_rows(client, auth_headers, budget_id, count_queries, path, params):
+    url = f'/api/v1/budgets/{budget_id}{path}'
+    # Warm the per-worker caches so both measured requests start alike
+    client.get(url, query_string=params, headers=auth_headers)
+
+    add_transactions(budget_id, 2)
+    with count_queries() as few:
+        response = client.get(url, query_string=params, headers=auth_headers)
+    assert response.status_code == 200
+
+    add_transactions(budget_id, 20)
+    with count_queries() as many:
+        response = client.get(url, query_string=params, headers=auth_headers)
+    assert response.status_code == 200
+
+    assert len(many) == len(few), many
+
+
+def test_transaction_list_expand_names(client, auth_headers, budget_id):
+    add_transactions(budget_id, 3)
+    response = client.get(f'/api/v1/budgets/{budget_id}/transactions', query_string={'expand': 'names'},
+                          headers=auth_headers)
+    rows = response.get_json()['data']
+    assert len(rows) == 3
+    assert all(r['account_name'].startswith('Account ') for r in rows)
+    assert all(r['payee_name'].startswith('Payee ') for r in rows)
+    assert all(r['category_name'].startswith('Category ') for r in rows)
+
+
+def fetch_pages(client, url, headers, params):
+    """
+    Follow next_cursor from the first page to the last; returns the pages' rows.
+    """
+    pages, cursor = [], None
+    while True:
+        query = dict(params, cursor=cursor) if cursor else params
+        response = client.get(url, query_string=query, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        pages.append(body['data'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_pagination_cursor_round_trip():
+    cursor = encode_cursor(date(2025, 1, 31), 'f3c1')
+    assert decode_cursor(cursor) == (date(2025, 1, 31), 'f3c1')
+    assert '=' not in cursor
+
+
+def test_transaction_pages_split_a_date_without_duplicates_or_gaps(client, auth_headers, budget_id):
+    # Two transactions per day, so pages of 3 end in the middle of a date
+    add_transactions(budget_id, 56)
+    url = f'/api/v1/budgets/{budget_id}/transactions'
+
+    pages = fetch_pages(client, url, auth_headers, {'limit': 3})
+    assert [len(page) for page in pages] == [3] * 18 + [2]
+    assert any(pages[i][-1]['date'] == pages[i + 1][0]['date'] for i in range(len(pages) - 1))
+
+    rows = [row for page in pages for row in page]
+    expected = sorted(((t.date.isoformat(), t.id) for t in Transaction.query), reverse=True)
+    assert [(row['date'], row['id']) for row in rows] == expected
+
+
+def test_transaction_cursor_keeps_the_filters(client, auth_headers, budget_id):
+    add_transactions(budget_id, 56)
+    url = f'/api/v1/budgets/{budget_id}/transactions'
+    params = {'limit': 4, 'date_from': '2025-01-10', 'date_to': '2025-01-15'}
+
+    rows = [row for page in fetch_pages(client, url, auth_headers, params) for row in page]
+    assert len(rows) == 12
+    assert all('2025-01-10' <= row['date'] <= '2025-01-15' for row in rows)
+    assert len({row['id'] for row in rows}) == 12
+
+    # A cursor from an unfiltered page still honours the filter it is sent with
+    first = client.get(url, query_string={'limit': 1}, headers=auth_headers).get_json()
+    narrowed = client.get(url, query_string={**params, 'cursor': first['next_cursor']},
+                          headers=auth_headers).get_json()
+    assert [row['date'] for row in narrowed['data']] == ['2025-01-15'] * 2 + ['2025-01-14'] * 2
+
+
+@pytest.mark.parametrize('cursor', [
+    'garbage',
+    encode_cursor(date(2025, 1, 1), 'x')[:-3],
+    base64.urlsafe_b64encode(b'["not-a-date","x"]').decode(),
+    base64.urlsafe_b64encode(b'["2025-01-01"]').decode(),
+    base64.urlsafe_b64encode(b'{"date":"2025-01-01","id":"x"}').decode(),
+    base64.urlsafe_b64encode(b'[20250101,"x"]').decode(),
+])
+def test_invalid_transaction_cursor_is_rejected(client, auth_headers, budget_id, cursor):
+    response = client.get(f'/api/v1/budgets/{budget_id}/transactions', query_string={'cursor': cursor},
+                          headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Invalid cursor.'
+
+
+def test_export_ndjson_streams_filtered_rows(client, auth_headers, budget_id, monkeypatch):
+    add_transactions(budget_id, 5)
+    Transaction.query.filter_by(date=date(2025, 1, 2)).update({'amount': Decimal('-50.10')})
+    db.session.commit()
+    # Rows must come through yield_per, never a fully loaded list
+    monkeypatch.setattr(Query, 'all', lambda self: pytest.fail('export loaded every row with .all()'))
+
+    response = client.get(f'/api/v1/budgets/{budget_id}/transactions/export',
+                          query_string={'date_from': '2025-01-02'}, headers=auth_headers, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    chunks = list(response.response)
+    assert len(chunks) == 4
+
+    rows = [json.loads(chunk) for chunk in chunks]
+    assert [row['date'] for row in rows] == ['2025-01-02', '2025-01-03', '2025-01-04', '2025-01-05']
+    assert [row['amount'] for row in rows] == ['-50.10', '-10.00', '-10.00', '-10.00']
+    assert set(rows[0]) == set(TRANSACTION_COLUMNS)
+
+
+def test_export_csv_writes_header_and_batches(client, auth_headers, budget_id, monkeypatch):
+    add_transactions(budget_id, 5)
+    monkeypatch.setattr(transactions, 'EXPORT_BATCH_SIZE', 2)
+
+    response = client.get(f'/api/v1/budgets/{budget_id}/transactions/export', query_string={'format': 'csv'},
+                          headers=auth_headers, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=transactions.csv'
+    # One chunk per batch of two rows; the header goes out with the first
+    chunks = [chunk.decode() for chunk in response.response]
+    assert len(chunks) == 3
+
+    rows = list(csv.reader(io.StringIO(''.join(chunks))))
+    assert tuple(rows[0]) == TRANSACTION_COLUMNS
+    amount = TRANSACTION_COLUMNS.index('amount')
+    assert [row[amount] for row in rows[1:]] == ['-10.00'] * 5
+
+
+@pytest.mark.parametrize('params', [{'format': 'xml'}, {'date_from': '01/02/2025'}, {'deleted': 'maybe'}])
+def test_export_rejects_bad_arguments(client, auth_headers, budget_id, params):
+    response = client.get(f'/api/v1/budgets/{budget_id}/transactions/export', query_string=params,
+                          headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_json_encoding_of_amounts_dates_and_ids(app):
+    transaction = Transaction(id='t1', date=date(2025, 1, 31), amount=Decimal('-50.10'), budget_id=uuid.UUID(int=1))
+    body = app.json.response(transaction.to_dict()).get_json()
+    assert (body['date'], body['amount'], body['budget_id']) == ('2025-01-31', '-50.10', str(uuid.UUID(int=1)))
+    assert app.json.loads(app.json.dumps({'amount': Decimal('1.5')})) == {'amount': '1.5'}
+
+
+def test_model_serializer_reloads_expired_columns(budget_id):
+    budget = db.session.get(Budget, budget_id.hex)
+    db.session.expire(budget)
+    assert budget.to_dict() == {'id': budget_id.hex, 'name': 'Test budget', 'change_version': 0}
+    assert Budget.serialize_many([budget]) == [budget.to_dict()]
+
+
+def test_transaction_form_data_query_count(client, auth_headers, budget_id, count_queries):
+    add_transactions(budget_id, 5)
+    transaction_id = Transaction.query.first().id
+    db.session.expunge_all()
+
+    with count_queries() as statements:
+        response = client.get(f'/api/v1/budgets/{budget_id}/transactions/{transaction_id}/form-data',
+                              headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['payee_name'].startswith('Payee ')
+    # user lookup, transaction with joined names, categories, payees, accounts
+    assert len(statements) == 5, statements
+
+
+# -------------------------------
+# Authentication
+# -------------------------------
+
+def test_deactivated_user_is_rejected_after_being_cached(client, auth_headers, budget_id, user):
+    url = f'/api/v1/budgets/{budget_id}/categories'
+    assert client.get(url, headers=auth_headers).status_code == 200
+
+    user.active = False
+    db.session.commit()
+
+    assert client.get(url, headers=auth_headers).status_code == 401
+
+
+def test_missing_authorization_header(client, budget_id):
+    response = client.get(f'/api/v1/budgets/{budget_id}/categories')
+    assert response.status_code == 401
+
+
+# -------------------------------
+# Month summaries
+# -------------------------------
+
+def test_month_summary_range_is_one_query(client, auth_headers, budget_id, count_queries):
+    add_transactions(budget_id, 3)
+    db.session.add(Month(month=2, year=2025, budget_id=budget_id.hex))
+    db.session.commit()
+    url = f'/api/v1/budgets/{budget_id}/months'
+    client.get(url, query_string={'from': '2025-01'}, headers=auth_headers)
+
+    with count_queries() as statements:
+        response = client.get(url, query_string={'from': '2024-12', 'to': '2025-03'}, headers=auth_headers)
+    assert response.status_code == 200
+    assert len(statements) == 1, statements
+
+    months = response.get_json()
+    assert [m['month'] for m in months] == ['2025-01', '2025-02']
+    (group,) = months[0]['category_groups']
+    assert len(group['categories']) == 3
+    assert months[1]['category_groups'] == []
+
+    response = client.get(f'{url}/2025-01', headers=auth_headers)
+    assert response.get_json()['month'] == '2025-01'
+    assert client.get(f'{url}/2025-13', headers=auth_headers).status_code == 400
+    assert client.get(f'{url}/2030-01', headers=auth_headers).status_code == 404
+
+
+def test_bulk_category_assignment(client, auth_headers, budget_id, count_queries):
+    add_transactions(budget_id, 3)
+    january = Month.query.filter_by(month=1).one()
+    categories = Category.query.filter_by(month_id=january.id).order_by(Category.id).all()
+    february = Month(month=2, year=2025, budget_id=budget_id.hex)
+    db.session.add(february)
+    db.session.flush()
+    db.session.add_all([Category(category_name_id=c.category_name_id, category_group_id=c.category_group_id,
+                                 budget_id=budget_id.hex, month_id=february.id) for c in categories])
+    Category.query.filter_by(id=categories[0].id).update({'activity': -10, 'balance': -10})
+    db.session.commit()
+    first, second, third = (c.id for c in categories)
+    url = f'/api/v1/budgets/{budget_id}/months/2025-01/categories'
+
+    with count_queries() as statements:
+        response = client.patch(url, json={'assigned': {first: 4, second: '12.50'}}, headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+    assert len([s for s in statements if s.startswith('UPDATE categories')]) == 1, statements
+    month = response.get_json()
+    assert Decimal(month['budgeted']) == Decimal('16.50')
+    budgeted = {c['id']: Decimal(c['budgeted']) for c in month['category_groups'][0]['categories']}
+    assert budgeted == {first: 4, second: Decimal('12.50'), third: 0}
+
+    response = client.patch(url, json={'preset': 'cover_overspending', 'assigned': {third: 5}}, headers=auth_headers)
+    categories = response.get_json()['category_groups'][0]['categories']
+    assert {c['id']: (Decimal(c['budgeted']), Decimal(c['balance'])) for c in categories} == {
+        first: (10, 0), second: (Decimal('12.50'), Decimal('12.50')), third: (5, 5)}
+
+    response = client.patch(f'/api/v1/budgets/{budget_id}/months/2025-02/categories',
+                            json={'preset': 'copy_last_month'}, headers=auth_headers)
+    month = response.get_json()
+    assert Decimal(month['budgeted']) == Decimal('27.50')
+    assert Decimal(month['to_be_budgeted']) == Decimal('27.50')
+
+    assert client.patch(url, json={}, headers=auth_headers).status_code == 400
+    assert client.patch(url, json={'assigned': {first: 'x'}}, headers=auth_headers).status_code == 400
+    assert client.patch(url, json={'preset': 'zero'}, headers=auth_headers).status_code == 400
+    assert client.patch(url, json={'assigned': {str(uuid.uuid4()): 1}}, headers=auth_headers).status_code == 404
+
+
+def test_month_rollover_carries_balances_forward(client, auth_headers, budget_id):
+    add_transactions(budget_id, 3)
+    january = Month.query.filter_by(month=1).one()
+    first, second, third = Category.query.filter_by(month_id=january.id).order_by(Category.id).all()
+    Category.query.filter_by(id=first.id).update({'budgeted': 50, 'balance': 40})
+    Category.query.filter_by(id=second.id).update({'deleted': True})
+    db.session.commit()
+    url = f'/api/v1/budgets/{budget_id}/months'
+
+    response = client.post(f'{url}/rollover', json={'through': '2025-03'}, headers=auth_headers)
+    assert response.get_json() == {'months': ['2025-02', '2025-03'], 'created': 4, 'updated': 0}
+    march = client.get(f'{url}/2025-03', headers=auth_headers).get_json()
+    carried = {c['category_name_id']: Decimal(c['balance']) for c in march['category_groups'][0]['categories']}
+    assert carried == {first.category_name_id: 40, third.category_name_id: 0}
+
+    # Repeating is a no-op; a later change in January flows forward on the next run
+    response = client.post(f'{url}/rollover', json={'through': '2025-03'}, headers=auth_headers)
+    assert response.get_json() == {'months': ['2025-03'], 'created': 0, 'updated': 0}
+    Category.query.filter_by(id=first.id).update({'balance': 45})
+    db.session.commit()
+    response = client.post(f'{url}/rollover', json={'from': '2025-02', 'through': '2025-03'}, headers=auth_headers)
+    assert response.get_json() == {'months': ['2025-02', '2025-03'], 'created': 0, 'updated': 2}
+
+    assert client.post(f'{url}/rollover', json={'from': '2025-04', 'through': '2025-03'},
+                       headers=auth_headers).status_code == 400
+    assert client.post(f'{url}/rollover', json={'through': '2025-13'}, headers=auth_headers).status_code == 400
+
+
+# -------------------------------
+# Reports
+# -------------------------------
+
+def test_spending_and_trend_reports(client, auth_headers, budget_id):
+    add_transactions(budget_id, 4)
+    url = f'/api/v1/budgets/{budget_id}/reports'
+
+    for group_by in ('category', 'payee', 'account'):
+        response = client.get(f'{url}/spending', query_string={'group_by': group_by}, headers=auth_headers)
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert len(data) == 4
+        assert all(row['amount'] == 10 and row['name'] for row in data)
+
+    response = client.get(f'{url}/spending', query_string={'group_by': 'month'}, headers=auth_headers)
+    assert response.get_json()['data'] == [{'month': '2025-01', 'amount': 40, 'count': 4}]
+
+    response = client.get(f'{url}/trends', headers=auth_headers)
+    (row,) = response.get_json()['data']
+    assert row['month'] == '2025-01'
+    assert (row['income'], row['expense'], row['net'], row['net_worth']) == (0, 40, -40, -40)
+
+    response = client.get(f'{url}/spending', query_string={'group_by': 'memo'}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+# -------------------------------
+# Balance series
+# -------------------------------
+
+def test_balance_series_downsamples_daily_changes(client, auth_headers, budget_id):
+    first, second = uuid.uuid4().hex, uuid.uuid4().hex
+    db.session.add_all([
+        AccountDailyBalance(account_id=first, date=date(2024, 12, 20), budget_id=budget_id.hex, amount=100),
+        AccountDailyBalance(account_id=first, date=date(2025, 1, 5), budget_id=budget_id.hex, amount=-30),
+        AccountDailyBalance(account_id=second, date=date(2025, 2, 10), budget_id=budget_id.hex, amount=50),
+    ])
+    db.session.commit()
+    url = f'/api/v1/budgets/{budget_id}/balances'
+
+    response = client.get(url, query_string={'date_from': '2025-01-01', 'date_to': '2025-02-15'}, headers=auth_headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [p['date'] for p in body['total']] == ['2025-01-31', '2025-02-15']
+    assert [p['balance'] for p in body['total']] == [70, 120]
+    balances = {a['account_id']: [p['balance'] for p in a['points']] for a in body['accounts']}
+    assert balances == {first: [70, 70], second: [0, 50]}
+
+    response = client.get(url, query_string={'interval': 'day', 'account_id': first}, headers=auth_headers)
+    points = response.get_json()['total']
+    assert (points[0], points[-1]) == ({'date': '2024-12-20', 'balance': 100}, {'date': '2025-01-05', 'balance': 70})
+    assert len(points) == 17
+
+    assert client.get(url, query_string={'interval': 'year'}, headers=auth_headers).status_code == 400
+
+    # Too many points is rejected from the bounds alone, before any series is built
+    for interval, date_from in (('day', '2025-01-01'), ('week', '1900-01-01'), ('month', '1000-01-01')):
+        started = time.perf_counter()
+        response = client.get(url, query_string={'interval': interval, 'date_from': date_from, 'date_to': '9999-12-31'},
+                              headers=auth_headers)
+        assert response.status_code == 400 and time.perf_counter() - started < 0.5
+    for interval in INTERVALS:
+        response = client.get(url, query_string={'interval': interval, 'date_from': '2024-12-18',
+                                                 'date_to': '2025-03-03'}, headers=auth_headers)
+        assert len(response.get_json()['total']) == point_count(date(2024, 12, 18), date(2025, 3, 3), interval)
+
+
+# -------------------------------
+# Payee search
+# -------------------------------
+
+def test_payee_index_ranks_by_match_then_usage():
+    index = PayeeIndex([
+        ('1', 'Super Market', 1, date(2025, 1, 1)),
+        ('2', 'Market Hall', 2, date(2024, 1, 1)),
+        ('3', 'Marketplace', 40, date(2025, 1, 1)),
+        ('4', 'Flea market', 0, None),
+        ('5', 'Supermarket', 5, date(2025, 1, 1)),
+    ], today=date(2025, 1, 2))
+
+    # Name prefixes, then word prefixes, then substrings
+    assert [p['id'] for p in index.search('mark')] == ['3', '2', '1', '4', '5']
+    # Within a class: frequent and recent first
+    assert [p['id'] for p in index.search('ARKET', limit=4)] == ['3', '5', '1', '2']
+    assert index.search('  ') == []
+    assert index.search('zz') == []
+
+
+@pytest.mark.parametrize('index_ttl', [300, 0])
+def test_payee_search_endpoint(app, client, auth_headers, budget_id, index_ttl, monkeypatch):
+    monkeypatch.setitem(app.config, 'PAYEE_INDEX_CACHE_TTL', index_ttl)
+    db.session.add_all([Payee(name=name, budget_id=budget_id.hex) for name in ('Grocer', 'Green Grocer', 'Gas')])
+    db.session.add(Payee(name='Grocery Outlet', budget_id=budget_id.hex, deleted=True))
+    db.session.commit()
+    url = f'/api/v1/budgets/{budget_id}/payees/search'
+
+    response = client.get(url, query_string={'q': 'gro'}, headers=auth_headers)
+    assert response.status_code == 200
+    assert [p['name'] for p in response.get_json()] == ['Grocer', 'Green Grocer']
+
+    # A new payee is searchable right after it is committed
+    db.session.add(Payee(name='Grove Cafe', budget_id=budget_id.hex))
+    db.session.commit()
+    response = client.get(url, query_string={'q': 'gro', 'limit': 1}, headers=auth_headers)
+    assert [p['name'] for p in response.get_json()] == ['Grocer']
+    response = client.get(url, query_string={'q': 'grov'}, headers=auth_headers)
+    assert [p['name'] for p in response.get_json()] == ['Grove Cafe']
+
+
+# -------------------------------
+# Payee suggestions
+# -------------------------------
+
+def add_payee_history(budget_id):
+    """
+    A payee with frequency rows as the payee suggestion triggers would leave them,
+    and a category of that name in January 2025.
+    """
+    account = Account(id=uuid.uuid4(), name=f'Account {uuid.uuid4().hex}', budget_id=budget_id.hex)
+    payee = Payee(name='Corner Shop', budget_id=budget_id.hex)
+    groceries, household = CategoryName(name='Groceries'), CategoryName(name='Household')
+    month = Month(month=1, year=2025, budget_id=budget_id.hex)
+    group = CategoryGroup(name='Everyday', budget_id=budget_id.hex)
+    db.session.add_all([account, payee, groceries, household, month, group])
+    db.session.flush()
+    db.session.add_all([
+        Category(category_name_id=groceries.id, category_group_id=group.id, budget_id=budget_id.hex,
+                 month_id=month.id),
+        PayeeSuggestion(budget_id=budget_id.hex, payee_id=payee.id, category_name_id=groceries.id,
+                        account_id=account.id.hex, uses=3, amount_total=-60, last_date=date(2024, 12, 1),
+                        last_amount=-25),
+        PayeeSuggestion(budget_id=budget_id.hex, payee_id=payee.id, category_name_id=household.id,
+                        account_id=account.id.hex, uses=1, amount_total=-40, last_date=date(2024, 12, 20),
+                        last_amount=-40),
+    ])
+    db.session.commit()
+    return account.id, payee.id, groceries.id
+
+
+def test_payee_suggestion(client, auth_headers, budget_id):
+    account_id, payee_id, groceries_id = add_payee_history(budget_id)
+    url = f'/api/v1/budgets/{budget_id}/payees'
+
+    response = client.get(f'{url}/{payee_id}/suggestion', headers=auth_headers)
+    assert response.status_code == 200
+    suggestion = response.get_json()
+    assert suggestion['category_name_id'] == groceries_id
+    assert suggestion['category_name'] == 'Groceries'
+    assert suggestion['account_id'] == account_id.hex
+    assert float(suggestion['amount']) == -20
+    assert float(suggestion['last_amount']) == -40
+    assert (suggestion['uses'], suggestion['confidence']) == (4, 0.75)
+
+    assert client.get(f'{url}/{uuid.uuid4()}/suggestion', headers=auth_headers).status_code == 404
+
+
+def test_import_auto_categorizes_known_payees(client, auth_headers, budget_id):
+    account_id, _, _ = add_payee_history(budget_id)
+    rows = [
+        {'date': '2025-01-03', 'account_id': str(account_id), 'payee_name': 'corner shop', 'amount': '-12.50'},
+        {'date': '2025-02-03', 'account_id': str(account_id), 'payee_name': 'Corner Shop', 'amount': '-8'},
+        {'date': '2025-01-04', 'account_id': str(account_id), 'payee_name': 'New Place', 'amount': '-5'},
+    ]
+    response = client.post(f'/api/v1/budgets/{budget_id}/transactions/import', query_string={'categorize': 'auto'},
+                           json=rows, headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+    assert (response.get_json()['imported'], response.get_json()['categorized']) == (3, 2)
+
+    categorized = {t.amount: t.category_id for t in Transaction.query.all()}
+    # February's Groceries category is rolled over from January on import
+    assert categorized[-12.5] is not None and categorized[-8] not in (None, categorized[-12.5])
+    # No history for the new payee
+    assert categorized[-5] is None
+
+
+def test_import_does_not_roll_over_far_future_months(client, auth_headers, budget_id):
+    account_id, _, groceries_id = add_payee_history(budget_id)
+    rows = [
+        {'date': '2525-01-05', 'account_id': str(account_id), 'payee_name': 'Corner Shop',
+         'category_id': groceries_id, 'amount': '-3'},
+        {'date': '2025-03-05', 'account_id': str(account_id), 'payee_name': 'Corner Shop',
+         'category_id': groceries_id, 'amount': '-4'},
+    ]
+    response = client.post(f'/api/v1/budgets/{budget_id}/transactions/import', json=rows, headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['imported'] == 1
+    assert response.get_json()['errors'] == [{'row': 1, 'message': "Category not found for the transaction month."}]
+
+    # February and March are rolled over; 2525 only gets its month row
+    periods = sorted((m.year, m.month) for m in Month.query.all())
+    assert periods == [(2025, 1), (2025, 2), (2025, 3), (2525, 1)]
+    assert Category.query.count() == 3
+
+
+def test_import_reports_invalid_rows(client, auth_headers, budget_id):
+    account_id, _, groceries_id = add_payee_history(budget_id)
+    valid = {'date': '2025-01-03', 'account_id': str(account_id), 'payee_name': 'Corner Shop',
+             'category_id': groceries_id, 'amount': '-12.50'}
+    rows = [
+        valid,
+        {**valid, 'date': '2025-13-01'},
+        {**valid, 'amount': 'twelve'},
+        {**valid, 'amount': 'NaN'},
+        {**valid, 'account_id': str(uuid.uuid4())},
+        {**valid, 'account_id': 'not-a-uuid'},
+        {**valid, 'payee_name': ' '},
+        'not an object',
+        {**valid, 'payee_name': 42},
+        {**valid, 'memo': {'note': 'x'}},
+        {**valid, 'category_id': [groceries_id]},
+        {**valid, 'category_id': 'groceries'},
+    ]
+    response = client.post(f'/api/v1/budgets/{budget_id}/transactions/import', json=rows, headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['imported'] == 1
+    assert response.get_json()['errors'] == [
+        {'row': 2, 'message': "Invalid date '2025-13-01', expected YYYY-MM-DD."},
+        {'row': 3, 'message': "'amount' must be a number."},
+        {'row': 4, 'message': "'amount' must be a number."},
+        {'row': 5, 'message': "Account not found."},
+        {'row': 6, 'message': "'account_id' must be a UUID."},
+        {'row': 7, 'message': "Payee name is required."},
+        {'row': 8, 'message': "Row must be an object."},
+        {'row': 9, 'message': "'payee_name' must be a string."},
+        {'row': 10, 'message': "'memo' must be a string."},
+        {'row': 11, 'message': "'category_id' must be a string."},
+        {'row': 12, 'message': "'category_id' must be a UUID."},
+    ]
+    assert [t.amount for t in Transaction.query.all()] == [Decimal('-12.50')]
+
+    # The same checks apply to CSV rows; nothing valid means nothing is imported
+    body = ('date,account_id,payee_name,amount\n'
+            f'2025-01-03,{uuid.uuid4()},Corner Shop,-1\n'
+            f'03/01/2025,{account_id},Corner Shop,-2\n')
+    response = client.post(f'/api/v1/budgets/{budget_id}/transactions/import', data=body,
+                           content_type='text/csv', headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [
+        {'row': 1, 'message': "Account not found."},
+        {'row': 2, 'message': "Invalid date '03/01/2025', expected YYYY-MM-DD."},
+    ]
+    assert Transaction.query.count() == 1
+
+
+def test_import_rejects_unreadable_or_oversized_payloads(client, auth_headers, budget_id, monkeypatch):
+    account_id, _, _ = add_payee_history(budget_id)
+    url = f'/api/v1/budgets/{budget_id}/transactions/import'
+    row = {'date': '2025-01-03', 'account_id': str(account_id), 'payee_name': 'Corner Shop', 'amount': '-1'}
+
+    monkeypatch.setattr(transactions, 'MAX_IMPORT_ROWS', 2)
+    response = client.post(url, json=[row] * 3, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "At most 2 rows can be imported at once."
+    assert client.post(url, json=[row] * 2, headers=auth_headers).status_code == 200
+
+    assert client.post(url, json={'rows': [row]}, headers=auth_headers).status_code == 400
+    assert client.post(url, data='x', content_type='text/plain', headers=auth_headers).status_code == 400
+    assert Transaction.query.count() == 2
+
+
+@pytest.mark.parametrize('changes', [
+    {'date': '2024-12-05'},
+    {'date': '2525-01-05'},
+    {'category_id': str(uuid.uuid4())},
+])
+def test_transaction_without_a_category_month_is_rejected(client, auth_headers, budget_id, changes):
+    account_id, _, groceries_id = add_payee_history(budget_id)
+    url = f'/api/v1/budgets/{budget_id}/transactions'
+    body = {'date': '2025-01-05', 'account_id': str(account_id), 'payee_name': 'Corner Shop',
+            'category_id': groceries_id, 'amount': '-7.25'}
+
+    response = client.post(url, json={**body, **changes}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "Category not found for the transaction month."
+    assert Transaction.query.count() == 0
+
+    assert client.post(url, json=body, headers=auth_headers).status_code == 200
+    transaction_id = Transaction.query.one().id
+    response = client.put(f'{url}/{transaction_id}', json={**body, **changes}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "Category not found for the transaction month."
+    db.session.expire_all()
+    assert Transaction.query.one().date == date(2025, 1, 5)
+
+
+def test_idempotency_key_replays_the_stored_response(client, auth_headers, budget_id, monkeypatch):
+    account_id, _, groceries_id = add_payee_history(budget_id)
+    url = f'/api/v1/budgets/{budget_id}/transactions'
+    body = {'date': '2025-01-05', 'account_id': account_id.hex, 'payee_name': 'Corner Shop',
+            'category_id': groceries_id, 'amount': '-7.25'}
+    headers = {**auth_headers, 'Idempotency-Key': 'retry-1'}
+
+    first = client.post(url, json=body, headers=headers)
+    assert first.status_code == 200, first.get_json()
+    retried = client.post(url, json=body, headers=headers)
+    assert retried.status_code == 200
+    assert retried.headers['Idempotent-Replayed'] == 'true'
+    assert retried.get_json() == first.get_json()
+    assert Transaction.query.count() == 1
+
+    # The same key for a different request is rejected
+    assert client.post(url, json={**body, 'amount': '-8'}, headers=headers).status_code == 422
+
+    # A failed request does not keep its key
+    headers = {**auth_headers, 'Idempotency-Key': 'retry-2'}
+    assert client.post(url, json={**body, 'payee_name': ''}, headers=headers).status_code == 400
+    assert client.post(url, json=body, headers=headers).status_code == 200
+    assert Transaction.query.count() == 2
+
+    # A crash before the response is stored leaves neither the write nor the key
+    def crash():
+        raise RuntimeError('worker died')
+    monkeypatch.setattr(idempotency, 'commit_session', crash)
+    headers = {**auth_headers, 'Idempotency-Key': 'retry-3'}
+    assert client.post(url, json=body, headers=headers).status_code == 500
+    monkeypatch.undo()
+    db.session.rollback()
+    assert Transaction.query.count() == 2
+    assert IdempotencyKey.query.filter_by(key='retry-3').count() == 0
+    assert client.post(url, json=body, headers=headers).status_code == 200
+    assert Transaction.query.count() == 3
+
+
+def test_sync_returns_changes_since_token(client, auth_headers, budget_id):
+    add_transactions(budget_id, 3)
+    url = f'/api/v1/budgets/{budget_id}/sync'
+
+    full = client.get(url, headers=auth_headers).get_json()
+    assert full['full'] is True
+    assert [len(full[kind]) for kind in ('transactions', 'payees', 'categories', 'accounts')] == [3, 3, 3, 3]
+
+    # What the change feed triggers do on Postgres when a transaction is deleted
+    deleted_id = full['transactions'][0]['id']
+    Budget.query.filter_by(id=budget_id.hex).update({'change_version': 1})
+    Transaction.query.filter_by(id=deleted_id).update({'deleted': True, 'change_version': 1})
+    db.session.commit()
+
+    delta = client.get(url, query_string={'since': full['sync_token']}, headers=auth_headers).get_json()
+    assert delta['full'] is False
+    assert [(t['id'], t['deleted']) for t in delta['transactions']] == [(deleted_id, True)]
+    assert delta['payees'] == delta['categories'] == delta['accounts'] == []
+
+    unchanged = client.get(url, query_string={'since': delta['sync_token']}, headers=auth_headers).get_json()
+    assert unchanged['transactions'] == [] and unchanged['sync_token'] == delta['sync_token']
+
+    assert client.get(url, query_string={'since': 'garbage'}, headers=auth_headers).status_code == 400
+
+
+# -------------------------------
+# Health
+# -------------------------------
+
+def test_health_status_reports_database_and_pool(client):
+    body = client.get('/api/v1/health/status').get_json()
+    assert body['database'] == 'OK'
+    assert body['pool']['class']
+
+
+def test_instrumented_pool_counts_checkouts_and_timeouts():
+    engine = create_engine('sqlite://', poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0,
+                           pool_timeout=0.01)
+    other = create_engine('sqlite://', poolclass=InstrumentedQueuePool)
+    other.connect().close()
+
+    held = engine.connect()
+    with pytest.raises(SATimeoutError):
+        engine.connect()
+    status = pool_status(engine.pool)
+    held.close()
+
+    assert (status['size'], status['in_use'], status['idle']) == (1, 1, 0)
+    assert (status['checkouts'], status['timeouts'], status['connects']) == (1, 1, 1)
+    assert status['checkout_wait_ms']['max'] >= 0
+    # Every pool counts its own checkouts, also across dispose()
+    engine.dispose()
+    assert pool_status(engine.pool)['checkouts'] == 1
+    assert pool_status(other.pool)['checkouts'] == 1
+    other.dispose()
+
+
+# -------------------------------
+# Async read API
+# -------------------------------
+
+def test_async_read_api_matches_flask_views(tmp_path):
+    starlette_testclient = pytest.importorskip('starlette.testclient')
+    from asgi import create_asgi_app
+
+    class FileConfig(Config):
+        # The sync and async engines need to share one database
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path}/async.db'
+
+    asgi_app = create_asgi_app(FileConfig)
+    flask_app = asgi_app.state.flask_app
+    with flask_app.app_context():
+        db.create_all()
+        budget_id = uuid.uuid4()
+        user = User(login='async', password='x', email='async@example.com', name='Async', active=True)
+        db.session.add_all([user, Budget(id=budget_id.hex, name='Async budget')])
+        db.session.commit()
+        user_id = str(user.id)
+        add_transactions(budget_id, 3)
+        db.session.commit()
+        token = jwt.encode({'user_id': user_id, 'exp': datetime.now(timezone.utc) + timedelta(hours=1)},
+                           Config.SECRET_KEY, algorithm="HS256")
+    headers = {'Authorization': f'Bearer {token}'}
+
+    with starlette_testclient.TestClient(asgi_app) as client:
+        flask_client = flask_app.test_client()
+        for path, params in [('/budgets', {}),
+                             (f'/budgets/{budget_id}/transactions', {'limit': 2}),
+                             (f'/budgets/{budget_id}/transactions', {'expand': 'names', 'deleted': 'all'}),
+                             (f'/budgets/{budget_id}/categories', {}),
+                             (f'/budgets/{budget_id}/payees', {})]:
+            expected = flask_client.get('/api/v1' + path, query_string=params, headers=headers)
+            response = client.get('/api/v1' + path, params=params, headers=headers)
+            assert response.status_code == expected.status_code == 200
+            assert response.json() == expected.get_json(), path
+
+        page = client.get(f'/api/v1/budgets/{budget_id}/transactions', params={'limit': 2}, headers=headers).json()
+        rest = client.get(f'/api/v1/budgets/{budget_id}/transactions', params={'cursor': page['next_cursor']},
+                          headers=headers).json()
+        assert len(page['data']) + len(rest['data']) == 3
+
+        assert client.get(f'/api/v1/budgets/{budget_id}/payees').status_code == 401
+        assert client.get(f'/api/v1/budgets/{budget_id}/transactions', params={'limit': 'x'},
+                          headers=headers).status_code == 400
+        # Writes and the other endpoints fall through to the Flask app
+        rejected = client.post(f'/api/v1/budgets/{budget_id}/payees', json={}, headers=headers)
+        assert rejected.json() == {'status': 'error', 'message': 'Payee name is required.'}
+        assert client.get('/api/v1/health/status').json()['database'] == 'OK'
+
+
+# -------------------------------
+# Read replicas
+# -------------------------------
+
+def test_reads_are_routed_to_replicas(tmp_path):
+    """
+    SQLite copies of the primary stand in for replicas; each renames the
+    budget so the responses show which database served them.
+    """
+    import shutil
+    import sqlite3
+
+    class ReplicaConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path}/primary.db'
+        DATABASE_REPLICA_URLS = [f'sqlite:///{tmp_path}/replica_{n}.db' for n in range(2)]
+        DB_READ_YOUR_WRITES_SECONDS = 60
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(login='replicas', password='x', email='replicas@example.com', name='Replicas', active=True)
+        budget_id = uuid.uuid4()
+        db.session.add_all([user, Budget(id=budget_id.hex, name='primary', change_version=5)])
+        db.session.commit()
+        token = jwt.encode({'user_id': str(user.id), 'exp': datetime.now(timezone.utc) + timedelta(hours=1)},
+                           Config.SECRET_KEY, algorithm="HS256")
+        db.engine.dispose()
+    for n in range(2):
+        shutil.copy(tmp_path / 'primary.db', tmp_path / f'replica_{n}.db')
+        with sqlite3.connect(tmp_path / f'replica_{n}.db') as connection:
+            connection.execute("UPDATE budgets SET name = ?, change_version = 2", (f'replica_{n}',))
+
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def budget_names(**extra):
+        return [b['name'] for b in client.get('/api/v1/budgets', headers={**headers, **extra}).get_json()]
+
+    assert budget_names() + budget_names() + budget_names() == ['replica_0', 'replica_1', 'replica_0']
+    assert budget_names(**{'X-Read-Primary': '1'}) == ['primary']
+    # Sync tokens are always compared with the primary, never a replica that is behind
+    sync = client.get(f'/api/v1/budgets/{budget_id}/sync', query_string={'since': encode_sync_token(budget_id, 5)},
+                      headers=headers).get_json()
+    assert sync['full'] is False and sync['transactions'] == []
+
+    router = app.extensions['db_replicas']
+    router.replicas[0].lag_ms, router.replicas[0].checked_at = 10_000, time.monotonic() + 60
+    assert budget_names() + budget_names() == ['replica_1', 'replica_1']
+    router.replicas[1].failed_until = time.monotonic() + 60
+    assert budget_names() == ['primary']
+    statuses = client.get('/api/v1/health/status').get_json()['replicas']
+    assert [(r['name'], r['usable']) for r in statuses] == [('replica_0', False), ('replica_1', False)]
+
+    # A client that wrote reads its writes from the primary
+    router.replicas[0].lag_ms = router.replicas[1].failed_until = 0
+    assert client.post(f'/api/v1/budgets/{budget_id}/months/rollover', json={},
+                       headers=headers).status_code == 200
+    assert budget_names() == ['primary']
+    router.dispose()
+
+
+# -------------------------------
+# Profiling
+# -------------------------------
+
+class ProfilingConfig(Config):
+    PROFILING_ENABLED = True
+
+
+def test_profiling_reports_latency_and_sql_per_endpoint():
+    profiled_app = create_app(ProfilingConfig)
+    request_metrics.reset()
+    client = profiled_app.test_client()
+
+    response = client.get('/api/v1/health/status')
+    assert 'db;dur=' in response.headers['Server-Timing']
+    assert 'desc="1 statements"' in response.headers['Server-Timing']
+
+    metrics = client.get('/metrics').get_data(as_text=True).splitlines()
+    assert 'http_requests_total{endpoint="health.status",method="GET",status="200"} 1' in metrics
+    assert 'http_request_duration_seconds_bucket{endpoint="health.status",method="GET",le="+Inf"} 1' in metrics
+    assert 'http_request_sql_statements_total{endpoint="health.status",method="GET"} 1' in metrics
+
+
+def test_stack_sampler_collects_and_dumps_profiles(tmp_path):
+    def busy_handler():
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+
+    sampler = StackSampler(interval=0.002)
+    sampler.start()
+    busy_handler()
+    stacks = sampler.stop()
+    assert any(stack.split(';')[-1].startswith('busy_handler') for stack in stacks)
+
+    path = dump_profile(str(tmp_path), 'transactions.get_transactions', 0.1, stacks)
+    assert path.endswith('-transactions.get_transactions-100ms.folded')
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in open(path)) == sum(stacks.values())
+
+
+# -------------------------------
+# Startup
+# -------------------------------
+
+def test_create_app_defers_docs_and_analytics_imports():
+    code = ('import sys; from app import create_app; create_app(); '
+            'print(",".join(m for m in ("flasgger", "flask_migrate", "pandas") if m in sys.modules))')
+    process = subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR,
+                             env=dict(os.environ, DATABASE_URL='sqlite://'), capture_output=True, text=True,
+                             check=True)
+    assert process.stdout.strip() == ''
+
+
+def test_swagger_docs_are_served_on_first_request(client):
+    spec = client.get('/api/v1/docs/apispec_1.json').get_json()
+    assert '/budgets/{budget_id}/reports/spending' in spec['paths']
+    assert client.get('/api/v1/docs/').status_code == 200
@@ -4,6 +4,7 @@ from collections import defaultdict
 from models import Transaction, Category, Budget, Month
 from backend.Python import db
 from sqlalchemy import desc
+from sqlalchemy.orm import joinedload
 import datetime
 import calendar
 
@@ -17,21 +18,19 @@ def home():
     current_month = Month.query.filter_by(year=x.year, month=x.month, deleted=False, budget_id=budget.id).first()
     all_months = Month.query.filter_by(deleted=False, budget_id=budget.id).order_by(Month.year.desc(),Month.month.desc()).all()
 
+    # One query for the categories of every month, groups loaded in the same SELECT
+    categories_data = Category.query.options(joinedload(Category.category_group)).filter_by(
+        budget_id= budget.id,
+        deleted= False,
+        hidden= False
+    ).all()
+    categories_by_month = defaultdict(lambda: defaultdict(list))
+    for c in categories_data:
+        categories_by_month[c.month_id][c.category_group.name].append(c)
+
     result = {}
     for month in all_months:
-
-        categories_data = Category.query.filter_by(
-            budget_id= budget.id,
-            deleted= False,
-            hidden= False,
-            month_id = month.id
-        ).all()
-
-        tmp = defaultdict(list)
-        for c in categories_data:
-            tmp[c.category_group.name].append(c)
-
-        result[f"{calendar.month_name[month.month]} {month.year}"] = dict(tmp)
+        result[f"{calendar.month_name[month.month]} {month.year}"] = dict(categories_by_month[month.id])
 
     return render_template('home.html',
                            active_page='home',
@@ -44,7 +43,11 @@ def transactions():
     try:
         # ORM query
         budget = Budget.query.first() # TODO: To be replaced
-        transactions_data = Transaction.query.filter_by(
+        transactions_data = Transaction.query.options(
+            joinedload(Transaction.account),
+            joinedload(Transaction.payee),
+            joinedload(Transaction.category).joinedload(Category.category_name)
+        ).filter_by(
         budget_id= budget.id,
         deleted= False
         ).order_by(desc(Transaction.date)).all()